@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
+from .cache import bump_generation
 from .models import BlogPost
+from .snapshots import queue_snapshots
 
 
 @admin.register(BlogPost)
@@ -96,12 +99,17 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_per_page = 25
     date_hierarchy = 'published_date'
     
+    def delete_queryset(self, request, queryset):
+        """Bulk delete skips BlogPost.delete, so invalidate cached responses and snapshots here"""
+        slugs = list(queryset.exclude(published_date=None).values_list('slug', flat=True))
+        super().delete_queryset(request, queryset)
+        bump_generation()
+        queue_snapshots(slugs)
+    
     actions = ['publish_posts', 'unpublish_posts', 'mark_as_featured', 'unmark_as_featured']
     
     def publish_posts(self, request, queryset):
         """Bulk action to publish blog posts"""
-        from django.utils import timezone
-        
         updated = 0
         for post in queryset:
             if post.status != 'published':
@@ -116,18 +124,27 @@ class BlogPostAdmin(admin.ModelAdmin):
     
     def unpublish_posts(self, request, queryset):
         """Bulk action to unpublish blog posts"""
-        updated = queryset.update(status='draft')
+        slugs = list(queryset.exclude(published_date=None).values_list('slug', flat=True))
+        updated = queryset.update(status='draft', updated_at=timezone.now())
+        bump_generation()
+        queue_snapshots(slugs)
         self.message_user(request, f'{updated} blog post(s) unpublished.')
     unpublish_posts.short_description = "Unpublish selected posts"
     
     def mark_as_featured(self, request, queryset):
         """Bulk action to mark posts as featured"""
-        updated = queryset.update(featured=True)
+        slugs = list(queryset.exclude(published_date=None).values_list('slug', flat=True))
+        updated = queryset.update(featured=True, updated_at=timezone.now())
+        bump_generation()
+        queue_snapshots(slugs)
         self.message_user(request, f'{updated} blog post(s) marked as featured.')
     mark_as_featured.short_description = "Mark as Featured"
     
     def unmark_as_featured(self, request, queryset):
         """Bulk action to unmark posts as featured"""
-        updated = queryset.update(featured=False)
+        slugs = list(queryset.exclude(published_date=None).values_list('slug', flat=True))
+        updated = queryset.update(featured=False, updated_at=timezone.now())
+        bump_generation()
+        queue_snapshots(slugs)
         self.message_user(request, f'{updated} blog post(s) unmarked as featured.')
     unmark_as_featured.short_description = "Unmark as Featured"
@@ -1,6 +1,18 @@
+import atexit
+
 from django.apps import AppConfig
 
 
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
+
+    def ready(self):
+        from . import images, snapshots  # noqa: F401  (register the image_variants and snapshots jobs)
+        from core import instrumentation
+
+        from .cache import stats_exposition
+        from .counters import flush_on_shutdown
+
+        atexit.register(flush_on_shutdown)
+        instrumentation.register_collector(stats_exposition)
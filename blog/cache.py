@@ -0,0 +1,152 @@
+"""
+Versioned response cache for the public blog endpoints.
+
+Cache keys embed a generation counter for the BlogPost table. Anything that
+changes posts (``BlogPost.save``/``delete``, the admin bulk actions, which
+use ``queryset.update``, and jobs run by the worker) calls
+``bump_generation()``, which invalidates every cached response at once
+without having to track individual keys.
+
+The counter and the time of the last change live in the database
+(``CacheGeneration``), so a bump in one gunicorn worker or in the
+``run_jobs`` process is seen by every other process on its next request.
+Reading them is one primary-key query. The responses themselves are kept
+in the ``blog`` alias in ``CACHES`` (local memory by default). A per-process
+cache is fine for them because their keys change with the generation.
+
+The same key doubles as the list ETag and the time of the last bump as
+Last-Modified. A client whose copy is current gets a 304 before the cache
+or the serializers are touched (see core/conditional.py).
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+from core.conditional import add_validators, make_etag, not_modified
+
+GENERATION_NAME = 'blogpost'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backing blog responses"""
+    return caches[getattr(settings, 'BLOG_RESPONSE_CACHE', 'blog')]
+
+
+def generation_state():
+    """(generation, time of the last change in epoch seconds or None) of the BlogPost table"""
+    from .models import CacheGeneration
+
+    row = CacheGeneration.objects.filter(name=GENERATION_NAME).values_list('value', 'changed_at').first()
+    if row is None:
+        return 0, None
+    generation, changed_at = row
+    return generation, changed_at.timestamp() if changed_at else None
+
+
+def get_generation():
+    """Current generation of the BlogPost table"""
+    return generation_state()[0]
+
+
+def bump_generation():
+    """Invalidate all cached blog responses, in every process"""
+    from .models import CacheGeneration
+
+    now = timezone.now()
+    generations = CacheGeneration.objects.filter(name=GENERATION_NAME)
+    if not generations.update(value=F('value') + 1, changed_at=now):
+        # Seed from the clock so a recreated row never reuses old keys
+        CacheGeneration.objects.get_or_create(
+            name=GENERATION_NAME, defaults={'value': int(time.time() * 1000), 'changed_at': now}
+        )
+
+
+def last_changed():
+    """Time of the last bump (epoch seconds), None if unknown"""
+    return generation_state()[1]
+
+
+def make_key(action, request, generation=None):
+    """Build a cache key from action, auth state and query params (incl. page)"""
+    if generation is None:
+        generation = get_generation()
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(params.encode()).hexdigest()
+    auth_state = 'auth' if request.user.is_authenticated else 'anon'
+    return f'blog:response:{generation}:{action}:{auth_state}:{digest}'
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats():
+    """Hit/miss/304 counters for this process"""
+    with _stats_lock:
+        hits, misses, unchanged = _stats['hits'], _stats['misses'], _stats['not_modified']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'not_modified': unchanged,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+    }
+
+
+def stats_exposition():
+    """``cache_stats()`` as Prometheus counters, for ``/api/metrics/``"""
+    stats = cache_stats()
+    name = 'blog_response_cache_events_total'
+    lines = [f'# HELP {name} Blog response cache lookups of this process.', f'# TYPE {name} counter']
+    for event in ('hits', 'misses', 'not_modified'):
+        lines.append(f'{name}{{event="{event}"}} {stats[event]}')
+    return lines
+
+
+def cache_response(view_func):
+    """Cache successful GET responses of a viewset action"""
+
+    @wraps(view_func)
+    def wrapper(viewset, request, *args, **kwargs):
+        if request.method != 'GET':
+            return view_func(viewset, request, *args, **kwargs)
+
+        cache = get_cache()
+        generation, modified = generation_state()
+        key = make_key(viewset.action, request, generation)
+        etag = make_etag(key)
+        unchanged = not_modified(request, etag, modified)
+        if unchanged is not None:
+            record('not_modified')
+            return unchanged
+
+        cached = cache.get(key)
+        if cached is not None:
+            record('hits')
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return add_validators(response, etag, modified)
+
+        record('misses')
+        response = view_func(viewset, request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if response.status_code != 200:
+            return response
+        cache.set(key, response.data)
+        return add_validators(response, etag, modified)
+
+    return wrapper
@@ -0,0 +1,248 @@
+"""
+Write-behind view counter for blog posts.
+
+Hits are collected in a buffer and written to the database in batches as
+atomic ``F('views') + n`` updates instead of one read-modify-write per request.
+
+Pending hits are flushed:
+- inline, once ``FLUSH_INTERVAL`` seconds have passed since the last flush
+  or ``MAX_PENDING`` posts have buffered hits (bounded staleness)
+- by the ``flush_blog_views`` management command (cron / idle periods)
+- on interpreter shutdown (registered in ``BlogConfig.ready``)
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'FLUSH_INTERVAL': 30,
+    'MAX_PENDING': 100,
+}
+
+
+def get_config():
+    """Return view counter settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'BLOG_VIEW_COUNTER', {})}
+
+
+class LocalViewBuffer:
+    """In-process buffer (one per worker), also used as the stand-in for tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+
+    def add(self, post_id, count=1):
+        with self._lock:
+            self._pending[post_id] += count
+            return len(self._pending)
+
+    def pending(self, post_id):
+        return self._pending.get(post_id, 0)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = dict(self._pending), defaultdict(int)
+        return pending
+
+    def restore(self, deltas):
+        """Put drained hits back after a failed flush"""
+        with self._lock:
+            for post_id, count in deltas.items():
+                self._pending[post_id] += count
+
+
+class CacheViewBuffer:
+    """
+    Buffer shared between workers through the Django cache (memcached/redis).
+
+    Each post has its own counter key, changed only with the atomic
+    ``add``/``incr``/``decr``, so concurrent workers never overwrite each
+    other. When a counter goes from empty to non-empty the post id is
+    registered in the next numbered slot of a dirty log (``incr`` on a
+    sequence key hands out the slot), so a drain only reads the counters of
+    posts that actually have hits. Only one process drains at a time (an
+    ``add``-acquired lock), and it ``decr``s exactly what it read, so hits
+    recorded meanwhile stay buffered.
+    """
+
+    key_prefix = 'blog:views:pending'
+    dirty_prefix = 'blog:views:dirty'
+    sequence_key = 'blog:views:dirty-seq'
+    drained_key = 'blog:views:dirty-drained'
+    lock_key = 'blog:views:draining'
+    lock_timeout = 60
+
+    def __init__(self, backend=None):
+        self.cache = backend or cache
+        self._lock = threading.Lock()
+        self._touched = set()  # posts this process buffered hits for since its last drain
+
+    def _key(self, post_id):
+        return f'{self.key_prefix}:{post_id}'
+
+    def _slot_key(self, slot):
+        return f'{self.dirty_prefix}:{slot}'
+
+    def _increment(self, key, count):
+        """Add to a counter; True if it was empty (or missing) before"""
+        if self.cache.add(key, count, timeout=None):
+            return True
+        try:
+            return self.cache.incr(key, count) == count
+        except ValueError:
+            # Evicted between add() and incr()
+            return self.cache.add(key, count, timeout=None) or self.cache.incr(key, count) == count
+
+    def _register(self, post_id):
+        self.cache.add(self.sequence_key, 0, timeout=None)
+        slot = self.cache.incr(self.sequence_key)
+        self.cache.set(self._slot_key(slot), post_id, timeout=None)
+
+    def add(self, post_id, count=1):
+        if self._increment(self._key(post_id), count):
+            self._register(post_id)
+        with self._lock:
+            self._touched.add(post_id)
+            return len(self._touched)
+
+    def pending(self, post_id):
+        return self.cache.get(self._key(post_id)) or 0
+
+    def has_pending(self):
+        return bool(self._touched)
+
+    def dirty_ids(self):
+        """
+        Post ids registered since the last drain, and the last slot read.
+        Stops at the first slot not written yet, which the next drain picks up.
+        """
+        start = self.cache.get(self.drained_key) or 0
+        end = self.cache.get(self.sequence_key) or 0
+        slots = self.cache.get_many([self._slot_key(slot) for slot in range(start + 1, end + 1)])
+        post_ids, last = set(), start
+        for slot in range(start + 1, end + 1):
+            post_id = slots.get(self._slot_key(slot))
+            if post_id is None:
+                break
+            post_ids.add(post_id)
+            last = slot
+        return post_ids, start, last
+
+    def drain(self):
+        if not self.cache.add(self.lock_key, 1, timeout=self.lock_timeout):
+            return {}  # another worker is draining
+        try:
+            with self._lock:
+                self._touched.clear()
+            post_ids, start, last = self.dirty_ids()
+            # Consume the slots first: a counter emptied below registers again on its next hit
+            self.cache.set(self.drained_key, last, timeout=None)
+            self.cache.delete_many([self._slot_key(slot) for slot in range(start + 1, last + 1)])
+            keys = {self._key(post_id): post_id for post_id in post_ids}
+            pending = {}
+            for key, count in self.cache.get_many(list(keys)).items():
+                if count:
+                    # decr rather than delete so hits recorded meanwhile survive
+                    self.cache.decr(key, count)
+                    pending[keys[key]] = count
+            return pending
+        finally:
+            self.cache.delete(self.lock_key)
+
+    def restore(self, deltas):
+        for post_id, count in deltas.items():
+            self.add(post_id, count)
+
+
+BACKENDS = {
+    'local': LocalViewBuffer,
+    'cache': CacheViewBuffer,
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_buffer():
+    """Return the configured buffer instance"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = BACKENDS[get_config()['BACKEND']]()
+    return _buffer
+
+
+def record_view(post_id):
+    """Buffer one view and flush if the staleness bound has been reached"""
+    config = get_config()
+    buffered = get_buffer().add(post_id)
+    if buffered >= config['MAX_PENDING'] or time.monotonic() - _last_flush >= config['FLUSH_INTERVAL']:
+        # The hits stay buffered on failure; a page view shouldn't fail because of them
+        flush_views(raise_errors=False)
+
+
+def pending_views(post_id):
+    """Number of buffered views not yet written to the database"""
+    return get_buffer().pending(post_id)
+
+
+def flush_views(raise_errors=True):
+    """
+    Write buffered views to the database.
+    Posts with the same delta are updated together, so a flush costs one
+    UPDATE per distinct hit count rather than one per post.
+    Returns the total number of views written. A failed write is re-buffered,
+    then re-raised unless ``raise_errors`` is False.
+    """
+    from .models import BlogPost
+
+    global _last_flush
+    _last_flush = time.monotonic()
+
+    buffer = get_buffer()
+    pending = buffer.drain()
+    if not pending:
+        return 0
+
+    by_delta = defaultdict(list)
+    for post_id, count in pending.items():
+        by_delta[count].append(post_id)
+
+    try:
+        with transaction.atomic():
+            for count, post_ids in by_delta.items():
+                BlogPost.objects.filter(pk__in=post_ids).update(views=F('views') + count)
+    except Exception:
+        logger.exception('Failed to flush blog views, re-buffering %d post(s)', len(pending))
+        buffer.restore(pending)
+        if raise_errors:
+            raise
+        return 0
+
+    return sum(pending.values())
+
+
+def flush_on_shutdown():
+    """atexit hook: never lose buffered views when a worker stops"""
+    if _buffer is None or not _buffer.has_pending():
+        return
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Failed to flush blog views on shutdown')
@@ -0,0 +1,176 @@
+"""
+Responsive derivatives of ``BlogPost.featured_image``.
+
+When a post is saved with a new featured image, ``BlogPost.save`` clears
+``featured_image_variants`` and queues a ``blog.image_variants`` job (see
+jobs/queue.py). The worker resizes the image with Pillow to each configured
+width (never upscaling) and encodes every width as AVIF and WebP, skipping
+formats this Pillow build can't write. The files are saved through the
+field's storage (Cloudinary in production, the filesystem locally and in
+tests) under ``blog/images/variants/``. The map of stored names goes back on
+the post:
+
+    {"source": "blog/images/a.jpg", "width": 2400, "height": 1600,
+     "formats": {"avif": {"320": "blog/images/variants/a-320w.avif", ...},
+                 "webp": {...}}}
+
+``variant_urls`` turns it into URLs plus ready-made ``srcset`` strings for
+the API. Until the job has run the map is empty and clients fall back to
+``featured_image``. Derivatives of a replaced or deleted image are removed
+by the same job, which then queues a snapshot refresh for published posts.
+``manage.py generate_image_variants`` backfills old posts.
+"""
+
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from jobs import queue
+
+from .cache import bump_generation
+from .snapshots import queue_snapshots
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'blog.image_variants'
+
+DEFAULTS = {
+    'ENABLED': True,
+    'WIDTHS': [320, 640, 960, 1280, 1920],
+    'FORMATS': ['avif', 'webp'],  # preferred first
+    'QUALITY': {'avif': 60, 'webp': 80},
+    'DIRECTORY': 'blog/images/variants',
+}
+
+
+def get_config():
+    """Return image variant settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'BLOG_IMAGE_VARIANTS', {})}
+
+
+def supported_formats(config):
+    return [fmt for fmt in config['FORMATS'] if features.check(fmt)]
+
+
+def variant_names(variants):
+    """Every stored file name in a variants map"""
+    return [name for widths in variants.get('formats', {}).values() for name in widths.values()]
+
+
+def queue_variants(post, previous=()):
+    """Queue (re)generation for the post's current image and removal of ``previous`` files"""
+    if not get_config()['ENABLED'] and not previous:
+        return
+    queue.enqueue(JOB_NAME, {
+        'post_id': post.pk,
+        'source': post.featured_image.name or '',
+        'previous': list(previous),
+    })
+
+
+def queue_stale(queryset):
+    """Queue generation for posts whose variants don't match their image (bulk writes, backfills)"""
+    posts = queryset.exclude(featured_image='').exclude(featured_image__isnull=True)
+    jobs = [
+        queue.build(JOB_NAME, {'post_id': post.pk, 'source': post.featured_image.name, 'previous': []})
+        for post in posts.only('pk', 'featured_image', 'featured_image_variants').iterator()
+        if post.featured_image_changed()
+    ]
+    if jobs and get_config()['ENABLED']:
+        queue.enqueue_many(jobs)
+    return len(jobs)
+
+
+def target_widths(width, config):
+    """Configured widths that fit the original, plus the original if it is smaller than all of them"""
+    return sorted({min(target, width) for target in config['WIDTHS']})
+
+
+def prepare(image):
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    mode = 'RGBA' if has_alpha else 'RGB'
+    return image if image.mode == mode else image.convert(mode)
+
+
+def render(image, width, fmt, quality):
+    height = max(1, round(image.height * width / image.width))
+    resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def generate(source, storage, config=None):
+    """Write the derivatives of ``source`` to ``storage`` and return the variants map"""
+    config = config or get_config()
+    with storage.open(source, 'rb') as original:
+        image = Image.open(original)
+        image.load()
+    image = prepare(image)
+
+    stem = os.path.splitext(os.path.basename(source))[0]
+    variants = {'source': source, 'width': image.width, 'height': image.height, 'formats': {}}
+    for fmt in supported_formats(config):
+        stored = {}
+        for width in target_widths(image.width, config):
+            data = render(image, width, fmt, config['QUALITY'].get(fmt, 80))
+            name = f"{config['DIRECTORY']}/{stem}-{width}w.{fmt}"
+            stored[str(width)] = storage.save(name, ContentFile(data))
+        variants['formats'][fmt] = stored
+    return variants
+
+
+def delete_files(names, storage):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning('Could not delete image variant %s', name, exc_info=True)
+
+
+@queue.register(JOB_NAME)
+def generate_variants(payload):
+    from .models import BlogPost
+
+    storage = BlogPost._meta.get_field('featured_image').storage
+    source = payload.get('source')
+    current = BlogPost.objects.filter(pk=payload['post_id'], featured_image=source)
+    if source and get_config()['ENABLED'] and current.exists():
+        try:
+            variants = generate(source, storage)
+        except (OSError, Image.DecompressionBombError) as e:
+            # Missing or unreadable file (remote storages raise a bare OSError on 404):
+            # record it so the post isn't retried on every save
+            logger.warning('No variants for %s: %s', source, e)
+            variants = {'source': source, 'formats': {}}
+        # The image may have been replaced while this job ran
+        if current.update(featured_image_variants=variants):
+            bump_generation()
+            # Snapshots embed the variant URLs
+            published = current.filter(published_date__isnull=False).values_list('slug', flat=True)
+            queue_snapshots(published)
+        else:
+            delete_files(variant_names(variants), storage)
+    delete_files(payload.get('previous', []), storage)
+
+
+def variant_urls(image, variants, build_url):
+    """
+    API representation: per format, the URL of each width and a ``srcset``
+    string. Empty while the variants are missing or belong to a previous image.
+    """
+    if not image or variants.get('source') != image.name or not variants.get('formats'):
+        return {}
+    formats = {}
+    for fmt, widths in variants['formats'].items():
+        urls = {width: build_url(name) for width, name in sorted(widths.items(), key=lambda item: int(item[0]))}
+        formats[fmt] = {
+            'urls': urls,
+            'srcset': ', '.join(f'{url} {width}w' for width, url in urls.items()),
+        }
+    return {'width': variants.get('width'), 'height': variants.get('height'), 'formats': formats}
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_generation
+from blog.models import BlogPost, count_words, reading_time_for
+
+
+class Command(BaseCommand):
+    help = "Recompute stored word counts and reading times for all blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows fetched and updated per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--strip-html',
+            action='store_true',
+            help='Ignore HTML markup when counting words (default: BLOG_READING_TIME_STRIP_HTML)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        # Without the flag, count_words() follows BLOG_READING_TIME_STRIP_HTML like save() does
+        strip_html = options['strip_html'] or None
+
+        queryset = BlogPost.objects.only('pk', 'content', 'word_count', 'reading_time').order_by('pk')
+        scanned = updated = 0
+        batch = []
+
+        # Stream rows with a server-side cursor so memory stays flat
+        for post in queryset.iterator(chunk_size=chunk_size):
+            scanned += 1
+            word_count = count_words(post.content, strip_html=strip_html)
+            reading_time = reading_time_for(word_count)
+            if (word_count, reading_time) != (post.word_count, post.reading_time):
+                post.word_count = word_count
+                post.reading_time = reading_time
+                post.content = ''  # not written back, drop the body early
+                batch.append(post)
+
+            if len(batch) >= chunk_size:
+                updated += self.flush(batch)
+
+        updated += self.flush(batch)
+        if updated:
+            bump_generation()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} post(s), updated {updated}.'
+        ))
+
+    def flush(self, batch):
+        if not batch:
+            return 0
+        count = BlogPost.objects.bulk_update(batch, ['word_count', 'reading_time'])
+        batch.clear()
+        return count
@@ -0,0 +1,160 @@
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework import authentication, renderers
+
+from blog.models import BlogPost
+from blog.serializers import BlogPostListSerializer
+from blog.views import BlogPostViewSet
+from core import authentication as fast_authentication, renderers as fast_renderers
+from leads.models import Booking
+from leads.serializers import BookingListSerializer
+from leads.views import BookingViewSet
+
+VIEWSETS = [BlogPostViewSet, BookingViewSet]
+
+# Class attributes and settings of each profile
+PROFILES = {
+    'stock': {
+        'renderer_classes': [renderers.JSONRenderer, renderers.BrowsableAPIRenderer],
+        'authentication_classes': [authentication.SessionAuthentication],
+        'API_COMPILED_ROWS': False,
+    },
+    'fast': {
+        'renderer_classes': [fast_renderers.FastJSONRenderer],
+        'authentication_classes': [fast_authentication.SessionAuthentication],
+        'API_COMPILED_ROWS': True,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure requests/sec of the public blog list and the booking customer search "
+        "with DRF's stock renderer, session authentication and serializers against the "
+        "fast path (orjson renderer, cookie-less session skip, compiled list rows). "
+        "Sample rows are created in a transaction that is rolled back; the blog "
+        "response cache and query budget checks are off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Posts and bookings per response (default: 100)')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per measurement (default: 200)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+
+    def handle(self, *args, **options):
+        caches = {**settings.CACHES, 'benchmark': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        quiet = {**settings.QUERY_BUDGET, 'ENFORCE': 'off', 'DETECT_REPEATED': False}
+        with override_settings(CACHES=caches, BLOG_RESPONSE_CACHE='benchmark', QUERY_BUDGET=quiet), transaction.atomic():
+            staff = self.seed(options['rows'])
+            anonymous, office = Client(), Client()
+            office.force_login(staff)
+            endpoints = [
+                ('GET /api/blog/ (anonymous)', anonymous, f"/api/blog/?page_size={options['rows']}"),
+                ('GET /api/bookings/customers/ (staff)', office, '/api/bookings/customers/?q=smith'),
+            ]
+            self.stdout.write(f"{options['rows']} rows per response, {options['requests']} requests per run")
+            for label, client, path in endpoints:
+                bodies, best = {}, {}
+                for profile in PROFILES:
+                    with self.profile(profile):
+                        bodies[profile] = client.get(path, HTTP_ACCEPT='application/json').content
+                # Profiles take turns so background noise affects both alike
+                for _ in range(max(options['repeat'], 1)):
+                    for profile in PROFILES:
+                        with self.profile(profile):
+                            rate = self.measure(client, path, options['requests'])
+                        best[profile] = max(rate, best.get(profile, 0))
+                self.stdout.write(
+                    f"{label:<40} stock {best['stock']:8.1f} req/s   fast {best['fast']:8.1f} req/s   "
+                    f"{best['fast'] / best['stock']:5.2f}x   "
+                    f"{'identical' if bodies['fast'] == bodies['stock'] else 'BODIES DIFFER'}"
+                )
+            self.components(options['rows'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def components(self, rows, repeat):
+        """Per-response cost of the serializer and renderer steps on their own"""
+        request = RequestFactory().get('/api/blog/')
+        steps = [
+            ('BlogPostListSerializer', BlogPostListSerializer, list(BlogPost.objects.for_list()[:rows]), {'request': request}),
+            ('BookingListSerializer', BookingListSerializer, list(Booking.objects.all()[:rows]), {}),
+        ]
+        self.stdout.write('')
+        for label, serializer_class, instances, context in steps:
+            timings = {}
+            for compiled in (False, True):
+                with override_settings(API_COMPILED_ROWS=compiled):
+                    timings[compiled] = self.best(lambda: serializer_class(instances, many=True, context=context).data, repeat)
+            self.report(f'{label} ({rows} rows)', timings[False], timings[True])
+
+        data = BlogPostListSerializer(steps[0][2], many=True, context={'request': request}).data
+        self.report(
+            f'Render {len(steps[0][2])} posts',
+            self.best(lambda: renderers.JSONRenderer().render(data), repeat),
+            self.best(lambda: fast_renderers.FastJSONRenderer().render(data), repeat),
+        )
+
+    def report(self, label, stock, fast):
+        self.stdout.write(
+            f'{label:<40} stock {stock * 1000:8.2f} ms      fast {fast * 1000:8.2f} ms      {stock / fast:5.2f}x'
+        )
+
+    def best(self, func, repeat, loops=20):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - started) / loops)
+        return min(timings)
+
+    def seed(self, rows):
+        staff = User.objects.create(username='benchmark-staff', is_staff=True)
+        date = timezone.localdate() + timedelta(days=3)
+        for index in range(rows):
+            BlogPost.objects.create(
+                title=f'Benchmark post {index}',
+                excerpt='Streak free glass',
+                content='Streak free glass with vinegar and a squeegee. ' * 50,
+                category='tips',
+                tags='windows, glass',
+                status='published',
+                author=staff,
+            )
+            Booking.objects.create(
+                service_type='general',
+                selected_date=date,
+                first_name=f'Customer{index}',
+                last_name='Smith',
+                email=f'customer{index}@example.com',
+                phone=f'04{index:08d}',
+                street=f'{index} George St',
+                suburb='Sydney',
+                postcode='2000',
+                price_details={'total': 180},
+            )
+        return staff
+
+    def profile(self, name):
+        stack = ExitStack()
+        config = PROFILES[name]
+        for viewset in VIEWSETS:
+            stack.enter_context(mock.patch.object(viewset, 'renderer_classes', config['renderer_classes']))
+            stack.enter_context(mock.patch.object(viewset, 'authentication_classes', config['authentication_classes']))
+        stack.enter_context(override_settings(API_COMPILED_ROWS=config['API_COMPILED_ROWS']))
+        return stack
+
+    def measure(self, client, path, requests):
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(path, HTTP_ACCEPT='application/json')
+        return requests / (time.perf_counter() - started)
@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from blog import media
+from blog.images import get_config as get_variant_config
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-row cost of building featured image URLs (image plus "
+        "AVIF/WebP variants) the old way (storage.url + build_absolute_uri per URL) "
+        "against the memoized resolver in blog/media.py, using the configured storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Posts per simulated response (default: 100, a full list page)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is kept (default: 5)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        config = get_variant_config()
+        names = [
+            [f'blog/images/post-{index}.jpg'] + [
+                f"{config['DIRECTORY']}/post-{index}-{width}w.{fmt}"
+                for fmt in config['FORMATS']
+                for width in config['WIDTHS']
+            ]
+            for index in range(rows)
+        ]
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        request = RequestFactory().get('/api/blog/', HTTP_HOST=host)
+        storage = media.get_storage()
+
+        def before():
+            for row in names:
+                for name in row:
+                    request.build_absolute_uri(storage.url(name))
+
+        def after():
+            resolver = media.MediaURLResolver(request)
+            for row in names:
+                for name in row:
+                    resolver.url(name)
+
+        def cold():
+            media.storage_url.cache_clear()
+            after()
+
+        results = [
+            ('before: storage.url + build_absolute_uri', self.best(before, options['repeat'])),
+            ('after, cold cache', self.best(cold, options['repeat'])),
+            ('after, warm cache', self.best(after, options['repeat'])),
+        ]
+        urls_per_row = len(names[0]) if names else 0
+        self.stdout.write(f"{rows} rows x {urls_per_row} URLs, storage {settings.STORAGES['default']['BACKEND']}")
+        baseline = results[0][1]
+        for label, seconds in results:
+            per_row = seconds / rows * 1e6 if rows else 0.0
+            speedup = baseline / seconds if seconds else 0.0
+            self.stdout.write(f'{label:<45} {per_row:9.2f} us/row  {speedup:6.1f}x')
+        self.stdout.write(str(media.cache_info()))
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
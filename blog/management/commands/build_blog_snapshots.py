@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every pre-compressed JSON snapshot of the published blog and remove "
+        "orphaned files (see blog/snapshots.py). Runs even when BLOG_SNAPSHOTS['ENABLED'] is off."
+    )
+
+    def handle(self, *args, **options):
+        report = snapshots.rebuild()
+        storage = snapshots.get_storage()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshots in {getattr(storage, 'location', storage)}: "
+            f"{len(report['written'])} written, {len(report['removed'])} removed."
+        ))
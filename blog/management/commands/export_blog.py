@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog import transfer
+from blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = "Write blog posts (with author usernames and image references) as NDJSON, one post per line"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--status', choices=[value for value, _ in BlogPost.STATUS_CHOICES])
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help=f'Posts fetched per round trip (default: {transfer.CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        queryset = BlogPost.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        exported = 0
+        try:
+            for line in transfer.export_lines(queryset, options['chunk_size']):
+                output.write(line)
+                exported += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'Exported {exported} post(s).')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from blog import images
+from blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue AVIF/WebP variants for posts whose featured image has none yet "
+        "(or whose variants belong to an older image). Processed by run_jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Generate the variants in this process instead of queueing jobs',
+        )
+
+    def handle(self, *args, **options):
+        if not options['sync']:
+            queued = images.queue_stale(BlogPost.objects.all())
+            self.stdout.write(self.style.SUCCESS(f'Queued variants for {queued} post(s).'))
+            return
+
+        posts = BlogPost.objects.exclude(featured_image='').exclude(featured_image__isnull=True)
+        generated = 0
+        for post in posts.only('pk', 'featured_image', 'featured_image_variants').iterator():
+            if post.featured_image_changed():
+                images.generate_variants({'post_id': post.pk, 'source': post.featured_image.name})
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} post(s).'))
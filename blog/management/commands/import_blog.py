@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert blog posts by slug from an NDJSON file written by export_blog. "
+        "Safe to re-run; existing posts keep their view counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=transfer.BATCH_SIZE,
+            help=f'Posts per upsert statement (default: {transfer.BATCH_SIZE})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        def progress(report):
+            self.stdout.write(
+                f"{report['rows']} row(s), {report['upserted']} upserted, {report['failed']} failed "
+                f"({report['rows_per_second']} rows/s)"
+            )
+
+        try:
+            with open(options['path'], 'rb') as source:
+                report = transfer.import_file(source, options['batch_size'], options['dry_run'], progress)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        verb = 'Validated' if options['dry_run'] else 'Upserted'
+        summary = (
+            f"{verb} {report['upserted']} of {report['rows']} post(s) in {report['seconds']}s "
+            f"({report['rows_per_second']} rows/s), {report['failed']} failed."
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not report['failed'] else self.style.WARNING(summary))
@@ -0,0 +1,86 @@
+"""
+Memoized media URLs for the blog serializers.
+
+Building a featured image URL used to cost a storage ``url()`` call
+(Cloudinary's SDK assembles the URL in Python) plus ``build_absolute_uri``
+on every row of every response. Both serializers now go through
+``media_urls(context)``:
+
+- ``storage_url(name)`` memoizes the storage URL of each file name in a
+  bounded LRU (``URL_CACHE_SIZE``). Names are immutable: an upload never
+  reuses the name of an existing file, so entries never go stale. The cache
+  is cleared when ``STORAGES`` or ``MEDIA_URL`` change (tests).
+- ``MediaURLResolver`` computes the request's origin once and prefixes
+  relative URLs with it. Absolute URLs such as Cloudinary's are returned
+  unchanged. One resolver is kept per request and shared by every
+  serializer that renders it.
+
+Resized variants are stored as separate files (see blog/images.py). They
+are cached by their own names, so no transformation options are needed in
+the key.
+"""
+
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+URL_CACHE_SIZE = 8192  # about 700 posts with their 10 default variants each
+
+ABSOLUTE_PREFIXES = ('http://', 'https://', '//')
+
+
+def get_storage():
+    from .models import BlogPost
+
+    return BlogPost._meta.get_field('featured_image').storage
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def storage_url(name):
+    """URL of a stored file name (memoized)"""
+    return get_storage().url(name)
+
+
+def cache_info():
+    return storage_url.cache_info()
+
+
+@receiver(setting_changed)
+def clear_url_cache(setting, **kwargs):
+    if setting in ('STORAGES', 'MEDIA_URL'):
+        storage_url.cache_clear()
+
+
+class MediaURLResolver:
+    """Absolute media URLs for one request (or a fixed ``origin``; relative ones without either)"""
+
+    def __init__(self, request=None, origin=''):
+        self.request = request
+        self.origin = request.build_absolute_uri('/')[:-1] if request is not None else origin.rstrip('/')
+
+    def url(self, name):
+        if not name:
+            return None
+        url = storage_url(name)
+        if not self.origin or url.startswith(ABSOLUTE_PREFIXES):
+            return url
+        if url.startswith('/') or self.request is None:
+            return f"{self.origin}/{url.lstrip('/')}"
+        return self.request.build_absolute_uri(url)
+
+
+RELATIVE = MediaURLResolver()
+
+
+def media_urls(context):
+    """The resolver for a serializer context, created once per request (or given as ``media_urls``)"""
+    if 'media_urls' in context:
+        return context['media_urls']
+    request = context.get('request')
+    if request is None:
+        return RELATIVE
+    resolver = getattr(request, '_media_url_resolver', None)
+    if resolver is None:
+        resolver = request._media_url_resolver = MediaURLResolver(request)
+    return resolver
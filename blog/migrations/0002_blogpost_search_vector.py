@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:37
+
+from functools import reduce
+from operator import add
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_WEIGHTS = {
+    "title": "A",
+    "tags": "B",
+    "category": "B",
+    "excerpt": "C",
+    "content": "D",
+}
+
+
+def build_search_index(apps, schema_editor):
+    # GIN index and tsvector backfill only exist on PostgreSQL; other databases
+    # use the in-memory fallback in blog/search.py
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    from django.contrib.postgres.search import SearchVector
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS blog_post_search_vector_gin "
+        "ON blog_blogpost USING gin (search_vector)"
+    )
+    BlogPost = apps.get_model("blog", "BlogPost")
+    BlogPost.objects.update(
+        search_vector=reduce(
+            add,
+            (
+                SearchVector(field, weight=weight, config="english")
+                for field, weight in SEARCH_WEIGHTS.items()
+            ),
+        )
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS blog_post_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+# Posts read and written per round trip; memory stays bounded on large tables
+CHUNK_SIZE = 500
+
+
+def populate_word_count(apps, schema_editor):
+    BlogPost = apps.get_model("blog", "BlogPost")
+    posts = []
+    for post in BlogPost.objects.only("pk", "content").iterator(chunk_size=CHUNK_SIZE):
+        post.word_count = len(post.content.split())
+        posts.append(post)
+        if len(posts) == CHUNK_SIZE:
+            BlogPost.objects.bulk_update(posts, ["word_count"], batch_size=CHUNK_SIZE)
+            posts = []
+    if posts:
+        BlogPost.objects.bulk_update(posts, ["word_count"], batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_blogpost_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_word_count, migrations.RunPython.noop),
+    ]
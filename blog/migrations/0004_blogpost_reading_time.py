@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+# Posts read and written per round trip; memory stays bounded on large tables
+CHUNK_SIZE = 500
+
+
+def populate_reading_time(apps, schema_editor):
+    # Full recount (with --strip-html if wanted): manage.py backfill_reading_time
+    BlogPost = apps.get_model("blog", "BlogPost")
+    posts = []
+    for post in BlogPost.objects.only("pk", "word_count").iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        post.reading_time = max(1, post.word_count // 200)
+        posts.append(post)
+        if len(posts) == CHUNK_SIZE:
+            BlogPost.objects.bulk_update(posts, ["reading_time"], batch_size=CHUNK_SIZE)
+            posts = []
+    if posts:
+        BlogPost.objects.bulk_update(posts, ["reading_time"], batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_blogpost_word_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="reading_time",
+            field=models.PositiveSmallIntegerField(
+                db_index=True,
+                default=1,
+                editable=False,
+                help_text="Minutes, maintained on save",
+            ),
+        ),
+        migrations.RunPython(populate_reading_time, migrations.RunPython.noop),
+    ]
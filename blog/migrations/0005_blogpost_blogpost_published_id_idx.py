@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_blogpost_reading_time"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(
+                fields=["-published_date", "-id"], name="blogpost_published_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_blogpost_blogpost_published_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="featured_image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Resized AVIF/WebP copies, filled in by the image_variants job (see blog/images.py)",
+            ),
+        ),
+    ]
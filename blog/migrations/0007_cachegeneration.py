@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:25
+
+import time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_generation(apps, schema_editor):
+    # Start from the clock so keys cached before the upgrade are never reused
+    CacheGeneration = apps.get_model("blog", "CacheGeneration")
+    CacheGeneration.objects.get_or_create(
+        name="blogpost",
+        defaults={"value": int(time.time() * 1000), "changed_at": timezone.now()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_blogpost_featured_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CacheGeneration",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                ("changed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(seed_generation, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,65 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import BigIntegerField, Count, F, Max, Q
+from django.db.models.functions import Cast, Coalesce, Substr
+from django.utils.html import strip_tags
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 
+from .cache import bump_generation
+from .images import queue_variants as queue_image_variants, variant_names
+from .search import WEIGHTS, get_backend as get_search_backend
+from .snapshots import queue_snapshots
+
+
+# Columns read by BlogPostListSerializer (content and search_vector stay deferred)
+LIST_FIELDS = [
+    'id',
+    'title',
+    'slug',
+    'excerpt',
+    'featured_image',
+    'featured_image_variants',
+    'category',
+    'tags',
+    'status',
+    'published_date',
+    'views',
+    'featured',
+    'reading_time',
+    'created_at',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+]
+
+
+WORDS_PER_MINUTE = 200
+
+# Attempts at inserting a post with a freshly allocated slug before giving up
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+
+def count_words(content, strip_html=None):
+    """Number of words in content, optionally ignoring HTML markup"""
+    if strip_html is None:
+        strip_html = getattr(settings, 'BLOG_READING_TIME_STRIP_HTML', False)
+    if strip_html:
+        content = strip_tags(content)
+    return len(content.split())
+
+
+def reading_time_for(word_count):
+    """Reading time in minutes (average 200 words per minute, at least 1 minute)"""
+    return max(1, word_count // WORDS_PER_MINUTE)
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def for_list(self):
+        """Lean projection for list endpoints: author joined, content deferred"""
+        return self.select_related('author').only(*LIST_FIELDS)
+
 
 class BlogPost(models.Model):
     """Model to store blog posts"""
@@ -21,6 +79,10 @@ class BlogPost(models.Model):
     excerpt = models.TextField(max_length=300, help_text="Short description for preview (max 300 characters)")
     content = models.TextField(help_text="Full blog post content (supports HTML)")
     featured_image = models.ImageField(upload_to='blog/images/', blank=True, null=True)
+    featured_image_variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="Resized AVIF/WebP copies, filled in by the image_variants job (see blog/images.py)"
+    )
     
     # SEO
     meta_description = models.CharField(max_length=160, blank=True, help_text="SEO meta description (max 160 characters)")
@@ -37,46 +99,164 @@ class BlogPost(models.Model):
     # Engagement metrics
     views = models.IntegerField(default=0)
     featured = models.BooleanField(default=False, help_text="Show on homepage")
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, db_index=True, editable=False, help_text="Minutes, maintained on save")
+    
+    # Search (weighted tsvector on PostgreSQL, maintained in save(), see blog/search.py)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BlogPostQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-published_date', '-created_at']
+        indexes = [
+            models.Index(fields=['-published_date', '-id'], name='blogpost_published_id_idx'),
+            # Keyset pagination on (published_date or created_at, id), see core/pagination.py
+            models.Index(
+                Coalesce('published_date', 'created_at').desc(), F('id').desc(), name='blogpost_position_id_idx'
+            ),
+        ]
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored slug, so a rename can drop the old snapshot (blog/snapshots.py)
+        if 'slug' in field_names:
+            instance._loaded_slug = instance.slug
+        return instance
+    
+    @classmethod
+    def allocate_slug(cls, title):
+        """
+        Unique slug for a title in a single query: the plain slug if free,
+        otherwise one past the highest existing numeric suffix. Only tails of
+        up to nine digits count as suffixes so the cast cannot overflow
+        """
+        base_slug = slugify(title)
+        taken = cls.objects.filter(slug__regex=rf'^{base_slug}(-[0-9]{{1,9}})?$').aggregate(
+            base_taken=Count('pk', filter=Q(slug=base_slug)),
+            highest_suffix=Max(
+                Cast(Substr('slug', len(base_slug) + 2), BigIntegerField()),
+                filter=~Q(slug=base_slug),
+            ),
+        )
+        if not taken['base_taken']:
+            return base_slug
+        return f"{base_slug}-{(taken['highest_suffix'] or 0) + 1}"
+    
     def save(self, *args, **kwargs):
         # Auto-generate slug from title if not provided
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            # Ensure unique slug
-            while BlogPost.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+        slug_generated = not self.slug
+        if slug_generated:
+            self.slug = self.allocate_slug(self.title)
         
         # Set published_date when status changes to published
         if self.status == 'published' and not self.published_date:
             from django.utils import timezone
             self.published_date = timezone.now()
         
-        super().save(*args, **kwargs)
+        # Keep word count and reading time in sync so reads never touch content
+        update_fields = kwargs.get('update_fields')
+        
+        # A new or removed featured image invalidates its resized copies
+        image_changed = self.featured_image_changed(update_fields)
+        if image_changed:
+            previous_variants = variant_names(self.featured_image_variants)
+            self.featured_image_variants = {}
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'featured_image_variants'}
+        if 'content' not in self.get_deferred_fields():
+            self.word_count = count_words(self.content)
+            self.reading_time = reading_time_for(self.word_count)
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'word_count', 'reading_time'}
+        
+        if slug_generated:
+            self._save_with_slug_retry(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        
+        if image_changed and (self.featured_image or previous_variants):
+            queue_image_variants(self, previous_variants)
+        
+        # Refresh the search document unless only non-searchable fields changed
+        if update_fields is None or set(update_fields) & set(WEIGHTS):
+            get_search_backend().index(self)
+        
+        bump_generation()
+        
+        # Published now or before (unpublishing removes it from the snapshots);
+        # a renamed post also drops the file under its old slug
+        if self.published_date is not None:
+            queue_snapshots([self.slug, getattr(self, '_loaded_slug', None)])
+        self._loaded_slug = self.slug
+    
+    def featured_image_changed(self, update_fields=None):
+        """True when the stored variants don't belong to the current featured image"""
+        deferred = self.get_deferred_fields()
+        if 'featured_image' in deferred or 'featured_image_variants' in deferred:
+            return False
+        if update_fields is not None and 'featured_image' not in update_fields:
+            return False
+        if self.featured_image and not self.featured_image._committed:
+            return True
+        return (self.featured_image.name or '') != self.featured_image_variants.get('source', '')
+    
+    def _save_with_slug_retry(self, *args, **kwargs):
+        """Insert, re-allocating the slug if a concurrent create took it first"""
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                last_attempt = attempt == SLUG_ALLOCATION_ATTEMPTS - 1
+                if last_attempt or not BlogPost.objects.filter(slug=self.slug).exists():
+                    raise
+                self.slug = self.allocate_slug(self.title)
+    
+    def delete(self, *args, **kwargs):
+        post_id = self.pk
+        stale_variants = variant_names(self.featured_image_variants)
+        result = super().delete(*args, **kwargs)
+        if stale_variants:
+            queue_image_variants(BlogPost(pk=post_id), stale_variants)
+        get_search_backend().remove(post_id)
+        bump_generation()
+        if self.published_date is not None:
+            queue_snapshots([self.slug])
+        return result
     
     def increment_views(self):
-        """Increment view count"""
-        self.views += 1
-        self.save(update_fields=['views'])
+        """Record a view; written to the database in batches by blog.counters"""
+        from .counters import record_view
+        record_view(self.pk)
     
     @property
-    def reading_time(self):
-        """Estimate reading time in minutes (average 200 words per minute)"""
-        word_count = len(self.content.split())
-        minutes = word_count // 200
-        return max(1, minutes)  # At least 1 minute
+    def total_views(self):
+        """Stored views plus buffered views not yet flushed"""
+        from .counters import pending_views
+        return self.views + pending_views(self.pk)
+
+
+class CacheGeneration(models.Model):
+    """
+    Change counter of a table, kept in the database so every web and worker
+    process sees the same value (see blog/cache.py)
+    """
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f'{self.name}: {self.value}'
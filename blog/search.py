@@ -0,0 +1,240 @@
+"""
+Full-text search for blog posts.
+
+Each post has a precomputed, weighted search document (title > tags/category >
+excerpt > content), updated incrementally whenever the post is saved.
+
+- PostgreSQL: stored in ``BlogPost.search_vector`` (tsvector, GIN indexed),
+  ranked with ``ts_rank`` and highlighted with ``ts_headline``.
+- Other databases (SQLite in development/tests): a pure-Python inverted index
+  held in process memory, built lazily from the table on first use.
+"""
+
+import html
+import re
+import threading
+from collections import defaultdict
+from functools import reduce
+from operator import add
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils.html import escape, strip_tags
+from rest_framework.filters import SearchFilter
+
+# Field weights, highest first (PostgreSQL setweight labels)
+WEIGHTS = {
+    'title': 'A',
+    'tags': 'B',
+    'category': 'B',
+    'excerpt': 'C',
+    'content': 'D',
+}
+
+# Same defaults PostgreSQL's ts_rank uses for D, C, B, A
+WEIGHT_SCORES = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+SNIPPET_WORDS = 30
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lowercased word tokens of plain text or HTML"""
+    return [token for token in TOKEN_RE.findall(strip_tags(text or '').lower()) if len(token) > 1]
+
+
+def plain_text(value):
+    return html.unescape(strip_tags(value or ''))
+
+
+def highlight(text, terms, max_words=SNIPPET_WORDS):
+    """Window of ``text`` around the first matching term, matches wrapped in <mark>"""
+    words = plain_text(text).split()
+    if not words:
+        return ''
+
+    def matches(word):
+        return any(token in terms for token in tokenize(word))
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, first - max_words // 3)
+    window = words[start:start + max_words]
+
+    parts = [
+        f'{HIGHLIGHT_START}{escape(word)}{HIGHLIGHT_STOP}' if matches(word) else escape(word)
+        for word in window
+    ]
+    snippet = ' '.join(parts)
+    if start > 0:
+        snippet = '... ' + snippet
+    if start + max_words < len(words):
+        snippet += ' ...'
+    return snippet
+
+
+class PostgresSearchBackend:
+    """tsvector column + GIN index, ranking and highlighting done by PostgreSQL"""
+
+    def __init__(self):
+        self.config = getattr(settings, 'BLOG_SEARCH_CONFIG', 'english')
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return reduce(add, (
+            SearchVector(field, weight=weight, config=self.config)
+            for field, weight in WEIGHTS.items()
+        ))
+
+    def query(self, text):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(text, config=self.config, search_type='websearch')
+
+    def index(self, post):
+        from .models import BlogPost
+
+        BlogPost.objects.filter(pk=post.pk).update(search_vector=self.vector())
+
+    def index_queryset(self, queryset):
+        """Refresh the vectors of many posts with one UPDATE"""
+        queryset.update(search_vector=self.vector())
+
+    def remove(self, post_id):
+        """Nothing to do: the vector is deleted with the row"""
+
+    def filter(self, queryset, text):
+        return queryset.filter(search_vector=self.query(text))
+
+    def search(self, queryset, text):
+        from django.contrib.postgres.search import SearchHeadline, SearchRank
+
+        query = self.query(text)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), query),
+                snippet=SearchHeadline(
+                    'content',
+                    query,
+                    config=self.config,
+                    start_sel=HIGHLIGHT_START,
+                    stop_sel=HIGHLIGHT_STOP,
+                    max_words=SNIPPET_WORDS,
+                    min_words=SNIPPET_WORDS // 2,
+                ),
+            )
+            .order_by('-rank', '-published_date')
+        )
+
+
+class InMemorySearchBackend:
+    """Pure-Python inverted index: term -> {post_id: weighted term frequency}"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._terms = {}
+        self._loaded = False
+
+    def _document(self, post):
+        scores = defaultdict(float)
+        for field, weight in WEIGHTS.items():
+            for token in tokenize(getattr(post, field)):
+                scores[token] += WEIGHT_SCORES[weight]
+        return scores
+
+    def _add(self, post):
+        document = self._document(post)
+        for term, score in document.items():
+            self._postings[term][post.pk] = score
+        self._terms[post.pk] = set(document)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        from .models import BlogPost
+
+        with self._lock:
+            if self._loaded:
+                return
+            for post in BlogPost.objects.only('pk', *WEIGHTS).iterator(chunk_size=500):
+                self._add(post)
+            self._loaded = True
+
+    def index(self, post):
+        with self._lock:
+            if not self._loaded:
+                # Picked up by the initial load on first search
+                return
+            self.remove(post.pk)
+            self._add(post)
+
+    def index_queryset(self, queryset):
+        if not self._loaded:
+            return
+        for post in queryset.only('pk', *WEIGHTS).iterator(chunk_size=500):
+            self.index(post)
+
+    def remove(self, post_id):
+        with self._lock:
+            for term in self._terms.pop(post_id, ()):
+                postings = self._postings[term]
+                postings.pop(post_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def match(self, text):
+        """Scores of posts containing every query term"""
+        self._ensure_loaded()
+        terms = set(tokenize(text))
+        if not terms:
+            return {}
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+        post_ids = set.intersection(*(set(p) for p in postings))
+        return {post_id: sum(p[post_id] for p in postings) for post_id in post_ids}
+
+    def filter(self, queryset, text):
+        return queryset.filter(pk__in=list(self.match(text)))
+
+    def search(self, queryset, text):
+        scores = self.match(text)
+        terms = set(tokenize(text))
+        posts = list(queryset.filter(pk__in=list(scores)))
+        for post in posts:
+            post.rank = scores[post.pk]
+            post.snippet = highlight(post.content, terms)
+        posts.sort(key=lambda post: (post.rank, post.published_date or post.created_at), reverse=True)
+        return posts
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Search backend matching the default database"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if connection.vendor == 'postgresql':
+                    _backend = PostgresSearchBackend()
+                else:
+                    _backend = InMemorySearchBackend()
+    return _backend
+
+
+class IndexedSearchFilter(SearchFilter):
+    """``?search=`` served from the search index instead of ILIKE scans"""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return get_backend().filter(queryset, text)
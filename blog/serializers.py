@@ -1,12 +1,17 @@
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
+from core.serializers import CompiledListSerializer
+from .images import variant_urls
+from .media import media_urls
 from .models import BlogPost
 
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Full serializer for BlogPost model"""
     
     author_name = serializers.SerializerMethodField()
     reading_time = serializers.ReadOnlyField()
+    views = serializers.ReadOnlyField(source='total_views')
     tags_list = serializers.SerializerMethodField()
     featured_image = serializers.SerializerMethodField()
     
@@ -37,13 +42,8 @@ class BlogPostSerializer(serializers.ModelSerializer):
         read_only_fields = ('slug', 'views', 'created_at', 'updated_at', 'reading_time')
     
     def get_featured_image(self, obj):
-        """Get absolute URL for featured image"""
-        if obj.featured_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.featured_image.url)
-            return obj.featured_image.url
-        return None
+        """Get absolute URL for featured image (memoized, see blog/media.py)"""
+        return media_urls(self.context).url(obj.featured_image.name)
     
     def get_author_name(self, obj):
         """Get author's full name"""
@@ -58,13 +58,15 @@ class BlogPostSerializer(serializers.ModelSerializer):
         return []
 
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class BlogPostListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing blog posts"""
     
     author_name = serializers.SerializerMethodField()
     reading_time = serializers.ReadOnlyField()
+    views = serializers.ReadOnlyField(source='total_views')
     tags_list = serializers.SerializerMethodField()
     featured_image = serializers.SerializerMethodField()
+    featured_image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -75,6 +77,7 @@ class BlogPostListSerializer(serializers.ModelSerializer):
             'author_name',
             'excerpt',
             'featured_image',
+            'featured_image_variants',
             'category',
             'tags_list',
             'status',
@@ -84,15 +87,16 @@ class BlogPostListSerializer(serializers.ModelSerializer):
             'reading_time',
             'created_at',
         ]
+        # many=True renders rows with a precompiled converter (see core/serializers.py)
+        list_serializer_class = CompiledListSerializer
     
     def get_featured_image(self, obj):
-        """Get absolute URL for featured image"""
-        if obj.featured_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.featured_image.url)
-            return obj.featured_image.url
-        return None
+        """Get absolute URL for featured image (memoized, see blog/media.py)"""
+        return media_urls(self.context).url(obj.featured_image.name)
+    
+    def get_featured_image_variants(self, obj):
+        """Resized AVIF/WebP URLs and srcset strings ({} until they are generated)"""
+        return variant_urls(obj.featured_image, obj.featured_image_variants, media_urls(self.context).url)
     
     def get_author_name(self, obj):
         """Get author's full name"""
@@ -107,7 +111,17 @@ class BlogPostListSerializer(serializers.ModelSerializer):
         return []
 
 
-class BlogPostCreateSerializer(serializers.ModelSerializer):
+class BlogPostSearchResultSerializer(BlogPostListSerializer):
+    """List serializer plus search rank and highlighted snippet"""
+    
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    
+    class Meta(BlogPostListSerializer.Meta):
+        fields = BlogPostListSerializer.Meta.fields + ['rank', 'snippet']
+
+
+class BlogPostCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating/updating blog posts"""
     
     class Meta:
@@ -0,0 +1,300 @@
+"""
+Pre-rendered JSON snapshots of the published blog.
+
+The public blog pages read the same few documents over and over. These
+are rendered ahead of time with the API's own serializers and written to a
+storage directory. Any static host or CDN can serve them, and so can
+``/api/blog/snapshots/<name>`` (see ``views.snapshot``), without touching
+the database:
+
+    posts/<slug>.json      BlogPostSerializer, as GET /api/blog/<slug>/
+    pages/<n>.json         {count, next, previous, results}, as GET /api/blog/?page=<n>
+    featured.json          as GET /api/blog/featured/
+    recent.json            as GET /api/blog/recent/
+    categories.json        as GET /api/blog/categories/
+
+Every file is stored three times: raw, ``.gz`` and ``.br`` (when the
+``brotli`` package is installed). Each file is replaced atomically: on a
+local filesystem the new bytes go to a temporary file in the same
+directory, which is then renamed over the old one, so readers never see a
+partial file. A file whose bytes didn't change is not written again.
+
+Saving a published post (or deleting one, or the admin bulk actions)
+queues a ``blog.snapshots`` job with the affected slugs, including the old
+slug of a renamed post and posts whose image variants were just made. The
+job rewrites the details of those slugs, the list pages from the first one
+they appear on, and the three small lists.
+``manage.py build_blog_snapshots`` does a full rebuild and removes orphaned
+files.
+
+View counts are as of the last regeneration.
+"""
+
+import gzip
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.db.models import Count, Q
+
+from core.renderers import FastJSONRenderer
+from jobs import queue
+
+from .media import MediaURLResolver
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'blog.snapshots'
+
+DEFAULTS = {
+    'ENABLED': False,
+    'STORAGE': None,  # alias in STORAGES (e.g. a bucket behind a CDN); None writes to LOCATION
+    'LOCATION': 'snapshots',
+    'URL': '/api/blog/snapshots/',
+    'MEDIA_ORIGIN': '',  # prefixed to relative media URLs, e.g. https://api.example.com
+    'PAGE_SIZE': None,  # defaults to REST_FRAMEWORK['PAGE_SIZE']
+}
+
+# Same limits as the featured and recent API actions
+FEATURED_LIMIT = 5
+RECENT_LIMIT = 10
+
+LISTS = ['featured.json', 'recent.json', 'categories.json']
+
+ENCODINGS = {'gzip': '.gz', 'br': '.br'}
+
+_lock = threading.Lock()
+
+
+def get_config():
+    """Return snapshot settings merged with defaults"""
+    config = {**DEFAULTS, **getattr(settings, 'BLOG_SNAPSHOTS', {})}
+    if config['PAGE_SIZE'] is None:
+        config['PAGE_SIZE'] = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 10
+    return config
+
+
+def get_storage(config=None):
+    config = config or get_config()
+    if config['STORAGE']:
+        return storages[config['STORAGE']]
+    return FileSystemStorage(location=config['LOCATION'], base_url=config['URL'])
+
+
+def queue_snapshots(slugs):
+    """Queue regeneration of the snapshots affected by changes to these posts"""
+    if not get_config()['ENABLED']:
+        return
+    slugs = sorted({slug for slug in slugs if slug})
+    if slugs:
+        queue.enqueue(JOB_NAME, {'slugs': slugs})
+
+
+def compress(content):
+    """The stored variants of a raw JSON document, keyed by name suffix"""
+    variants = {'': content, '.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return variants
+
+
+def read(storage, name):
+    try:
+        with storage.open(name, 'rb') as stored:
+            return stored.read()
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def replace(storage, name, data):
+    """Write ``name`` so readers see either the old bytes or the new ones"""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote storages replace an object in one PUT; save() would pick a new name
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(data))
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(data)
+        os.chmod(temporary, storage.file_permissions_mode or 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write(storage, name, data):
+    """Store a document and its compressed copies; False if it was already current"""
+    content = FastJSONRenderer().render(data)
+    if read(storage, name) == content:
+        return False
+    # Raw file last: its presence means the compressed copies are current too
+    for suffix, variant in sorted(compress(content).items(), reverse=True):
+        replace(storage, name + suffix, variant)
+    return True
+
+
+def remove(storage, name):
+    removed = False
+    for suffix in ['', *ENCODINGS.values()]:
+        if storage.exists(name + suffix):
+            storage.delete(name + suffix)
+            removed = True
+    return removed
+
+
+class Snapshots:
+    """Renders snapshot documents from the database into a storage"""
+
+    def __init__(self, config=None):
+        self.config = config or get_config()
+        self.storage = get_storage(self.config)
+        self.page_size = self.config['PAGE_SIZE']
+        self.context = {'media_urls': MediaURLResolver(origin=self.config['MEDIA_ORIGIN'])}
+        self.written = []
+        self.removed = []
+
+    def published(self):
+        from .models import BlogPost
+
+        return BlogPost.objects.filter(status='published')
+
+    def ordered(self, queryset):
+        # The list API orders by -published_date; id breaks ties so pages are stable
+        return queryset.order_by('-published_date', '-created_at', '-id')
+
+    def save(self, name, data):
+        if write(self.storage, name, data):
+            self.written.append(name)
+
+    def delete(self, name):
+        if remove(self.storage, name):
+            self.removed.append(name)
+
+    def page_count(self):
+        count = self.published().count()
+        return count, max(1, -(-count // self.page_size))
+
+    def page_url(self, number, pages):
+        return self.storage.url(f'pages/{number}.json') if 1 <= number <= pages else None
+
+    def detail(self, post):
+        from .serializers import BlogPostSerializer
+
+        self.save(f'posts/{post.slug}.json', BlogPostSerializer(post, context=self.context).data)
+
+    def pages(self, first=1):
+        """Rewrite list pages ``first`` onwards and drop pages past the end"""
+        from .serializers import BlogPostListSerializer
+
+        count, pages = self.page_count()
+        queryset = self.ordered(self.published().for_list())
+        for number in range(max(1, first), pages + 1):
+            start = (number - 1) * self.page_size
+            rows = queryset[start:start + self.page_size]
+            self.save(f'pages/{number}.json', {
+                'count': count,
+                'next': self.page_url(number + 1, pages),
+                'previous': self.page_url(number - 1, pages),
+                'results': BlogPostListSerializer(rows, many=True, context=self.context).data,
+            })
+        for name in self.listdir('pages'):
+            number = name.split('.', 1)[0]
+            if not number.isdigit() or int(number) > pages:
+                self.delete(f'pages/{name}')
+        return pages
+
+    def lists(self):
+        from .serializers import BlogPostListSerializer
+
+        published = self.published().for_list()
+        featured = self.ordered(published.filter(featured=True))[:FEATURED_LIMIT]
+        recent = self.ordered(published)[:RECENT_LIMIT]
+        categories = (
+            self.published().values('category').annotate(count=Count('category')).order_by('-count', 'category')
+        )
+        self.save('featured.json', BlogPostListSerializer(featured, many=True, context=self.context).data)
+        self.save('recent.json', BlogPostListSerializer(recent, many=True, context=self.context).data)
+        self.save('categories.json', list(categories))
+
+    def listdir(self, directory):
+        try:
+            return [name for name in self.storage.listdir(directory)[1] if name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+
+    def first_page(self, post):
+        """Page number a published post is listed on"""
+        newer = self.published().filter(
+            Q(published_date__gt=post.published_date)
+            | Q(published_date=post.published_date, created_at__gt=post.created_at)
+            | Q(published_date=post.published_date, created_at=post.created_at, id__gt=post.id)
+        ).count()
+        return newer // self.page_size + 1
+
+    def regenerate(self, slugs):
+        """Refresh what changes to ``slugs`` affect; returns ``{'written', 'removed'}``"""
+        from .models import BlogPost
+
+        first = None
+        posts = {post.slug: post for post in BlogPost.objects.select_related('author').filter(slug__in=slugs)}
+        for slug in slugs:
+            post = posts.get(slug)
+            if post is not None and post.status == 'published':
+                self.detail(post)
+                page = self.first_page(post)
+            else:
+                # Unpublished or deleted: its old position is unknown, so every page may shift
+                self.delete(f'posts/{slug}.json')
+                page = 1
+            first = page if first is None else min(first, page)
+        self.pages(first or 1)
+        self.lists()
+        return {'written': self.written, 'removed': self.removed}
+
+    def rebuild(self):
+        """Render everything and remove files of posts that are no longer published"""
+        slugs = set()
+        for post in self.published().select_related('author').iterator(chunk_size=200):
+            self.detail(post)
+            slugs.add(post.slug)
+        for name in self.listdir('posts'):
+            if name[:-len('.json')] not in slugs:
+                self.delete(f'posts/{name}')
+        self.pages()
+        self.lists()
+        return {'written': self.written, 'removed': self.removed}
+
+
+def regenerate(slugs):
+    # Worker threads share one directory; one regeneration at a time keeps pages consistent
+    with _lock:
+        return Snapshots().regenerate(slugs)
+
+
+def rebuild():
+    with _lock:
+        return Snapshots().rebuild()
+
+
+@queue.register(JOB_NAME)
+def regenerate_snapshots(payload):
+    if not get_config()['ENABLED']:
+        return
+    report = regenerate(payload.get('slugs', []))
+    logger.info('Blog snapshots: %d written, %d removed', len(report['written']), len(report['removed']))
@@ -1,3 +1,695 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from core import renderers
+from core.authentication import SessionAuthentication
+from core.querybudget import QueryBudgetExceeded, RepeatedQueryMiddleware, query_budget, query_shape
+from core.serializers import compile_rows
+
+from jobs.models import Job
+
+from . import images, snapshots, transfer
+from .cache import GENERATION_NAME, bump_generation, cache_stats, get_cache
+from . import counters
+from .counters import CacheViewBuffer, get_buffer, pending_views
+from .models import BlogPost, CacheGeneration
+from .serializers import BlogPostListSerializer, BlogPostSearchResultSerializer
+from .views import BlogPostViewSet
+
+SIZES = [1, 10, 100]
+
+STANDARD_ACTIONS = ['list', 'create', 'retrieve', 'update', 'partial_update', 'destroy']
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        get_buffer().drain()
+        self.addCleanup(get_buffer().drain)
+        self.posts = [
+            BlogPost.objects.create(title=f'Counted {index}', excerpt='e', content='c', status='published')
+            for index in range(3)
+        ]
+
+    def test_views_are_buffered_then_flushed_grouped_by_delta(self):
+        with self.assertNumQueries(0):
+            for post, hits in zip(self.posts, [2, 2, 5]):
+                for _ in range(hits):
+                    post.increment_views()
+        self.assertEqual(self.posts[2].total_views, 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counters.flush_views(), 9)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)  # one per distinct delta
+        self.assertEqual(
+            list(BlogPost.objects.order_by('id').values_list('views', flat=True)), [2, 2, 5]
+        )
+        self.assertFalse(get_buffer().has_pending())
+
+    def test_failed_flush_restores_the_buffer(self):
+        self.posts[0].increment_views()
+        with mock.patch.object(BlogPost.objects, 'filter', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError), self.assertLogs('blog.counters', 'ERROR'):
+                counters.flush_views()
+        self.assertEqual(pending_views(self.posts[0].pk), 1)
+
+    def test_flush_on_the_request_path_never_fails_the_request(self):
+        with override_settings(BLOG_VIEW_COUNTER={'FLUSH_INTERVAL': 0}):
+            with mock.patch.object(BlogPost.objects, 'filter', side_effect=RuntimeError('db down')):
+                with self.assertLogs('blog.counters', 'ERROR'):
+                    counters.record_view(self.posts[0].pk)
+        self.assertEqual(pending_views(self.posts[0].pk), 1)
+
+    def test_cache_buffer_shared_between_workers(self):
+        shared = LocMemCache('view-counter-test', {})
+        workers = [CacheViewBuffer(shared), CacheViewBuffer(shared)]
+        for worker in workers:
+            worker.add(self.posts[0].pk)
+            worker.add(self.posts[1].pk, 3)
+        self.assertEqual(workers[1].pending(self.posts[0].pk), 2)
+
+        # A drain in progress elsewhere is not repeated
+        shared.add(CacheViewBuffer.lock_key, 1)
+        self.assertEqual(workers[0].drain(), {})
+        shared.delete(CacheViewBuffer.lock_key)
+
+        # Only the registered posts are read, never the post table
+        with self.assertNumQueries(0):
+            self.assertEqual(workers[0].drain(), {self.posts[0].pk: 2, self.posts[1].pk: 6})
+        self.assertEqual(workers[1].drain(), {})
+        workers[1].add(self.posts[0].pk)
+        self.assertEqual(workers[0].drain(), {self.posts[0].pk: 1})
+
+        # A counter emptied by a drain registers again; one evicted is recreated
+        workers[0].add(self.posts[2].pk)
+        shared.delete(workers[0]._key(self.posts[2].pk))
+        workers[1].add(self.posts[2].pk, 4)
+        self.assertEqual(workers[1].drain(), {self.posts[2].pk: 4})
+        workers[0].restore({self.posts[0].pk: 3})
+        self.assertEqual(workers[0].drain(), {self.posts[0].pk: 3})
+
+    def test_shutdown_flush_skips_an_empty_buffer(self):
+        with mock.patch.object(counters, 'flush_views') as flush:
+            counters.flush_on_shutdown()
+        flush.assert_not_called()
+
+
+class QueryBudgetFrameworkTests(TestCase):
+    def test_budget_exceeded_lists_repeated_shapes(self):
+        user = User.objects.create(username='writer')
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget(2, label='loop'):
+                for _ in range(3):
+                    User.objects.filter(pk=user.pk).first()
+        self.assertIn('loop: 3 queries, budget is 2', str(raised.exception))
+        self.assertIn('3x SELECT', str(raised.exception))
+
+    def test_budget_as_decorator(self):
+        @query_budget(1)
+        def lookup():
+            return User.objects.count()
+
+        self.assertEqual(lookup(), 0)
+
+    def test_query_shape_normalizes_literals_and_in_lists(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE a = 1 AND b = 'x' AND c IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...)',
+        )
+
+    @override_settings(QUERY_BUDGET={'DETECT_REPEATED': True, 'REPEAT_THRESHOLD': 3})
+    def test_middleware_flags_repeated_queries(self):
+        users = [User.objects.create(username=f'user{index}') for index in range(3)]
+
+        def per_row_lookup(request):
+            for user in users:
+                User.objects.get(pk=user.pk)
+            return HttpResponse()
+
+        with self.assertLogs('core.querybudget', 'WARNING') as logs:
+            response = RepeatedQueryMiddleware(per_row_lookup)(RequestFactory().get('/api/blog/'))
+        self.assertEqual(response['X-Repeated-Queries'], '3')
+        self.assertIn('possible N+1', logs.output[0])
+
+
+class BlogQueryBudgetTests(TestCase):
+    """Every BlogPostViewSet action stays within its declared query budget at 1, 10 and 100 posts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='editor', first_name='Ed', is_staff=True)
+        cls.authors = [User.objects.create(username=f'author{index}') for index in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        get_cache().clear()
+        get_buffer().drain()
+        self.addCleanup(get_buffer().drain)
+
+    def create_posts(self, count):
+        BlogPost.objects.all().delete()
+        for index in range(count):
+            BlogPost.objects.create(
+                title=f'Window cleaning tips {index}',
+                content='Streak free glass with vinegar and a squeegee. ' * 20,
+                excerpt='Streak free glass',
+                category='tips' if index % 2 else 'guides',
+                tags='windows, glass',
+                status='published',
+                featured=index % 3 == 0,
+                author=self.authors[index % len(self.authors)],
+            )
+        get_cache().clear()
+        return BlogPost.objects.order_by('id').first()
+
+    def assert_within_budget(self, action, size, call):
+        budget = BlogPostViewSet.query_budgets[action]
+        with query_budget(budget, label=f'{action} with {size} posts'):
+            response = call()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 300, getattr(response, 'data', None))
+        return response
+
+    def test_every_action_has_a_budget(self):
+        actions = STANDARD_ACTIONS + [view.__name__ for view in BlogPostViewSet.get_extra_actions()]
+        self.assertEqual(sorted(set(actions) - set(BlogPostViewSet.query_budgets)), [])
+
+    def test_read_actions(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                post = self.create_posts(size)
+                self.client.force_authenticate(None)
+                self.assert_within_budget('list', size, lambda: self.client.get('/api/blog/?page_size=100'))
+                self.assert_within_budget('retrieve', size, lambda: self.client.get(f'/api/blog/{post.slug}/'))
+                self.assert_within_budget('featured', size, lambda: self.client.get('/api/blog/featured/'))
+                self.assert_within_budget('categories', size, lambda: self.client.get('/api/blog/categories/'))
+                self.assert_within_budget('popular', size, lambda: self.client.get('/api/blog/popular/'))
+                self.assert_within_budget('recent', size, lambda: self.client.get('/api/blog/recent/'))
+                self.assert_within_budget(
+                    'search', size, lambda: self.client.get('/api/blog/search/?q=squeegee&page_size=100')
+                )
+
+                self.client.force_authenticate(self.staff)
+                self.assert_within_budget('export', size, lambda: self.client.get('/api/blog/export/'))
+
+    def test_write_actions(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                post = self.create_posts(size)
+                self.client.force_authenticate(self.staff)
+                payload = {
+                    'title': 'Oven cleaning',
+                    'excerpt': 'Bicarb soda',
+                    'content': 'Bicarb soda paste overnight.',
+                    'status': 'published',
+                    'author': self.authors[0].pk,
+                }
+                created = self.assert_within_budget(
+                    'create', size, lambda: self.client.post('/api/blog/', payload, format='json')
+                )
+                slug = created.data['data']['slug']
+                self.assert_within_budget(
+                    'update', size, lambda: self.client.put(f'/api/blog/{slug}/', payload, format='json')
+                )
+                self.assert_within_budget(
+                    'partial_update',
+                    size,
+                    lambda: self.client.patch(f'/api/blog/{slug}/', {'featured': True}, format='json'),
+                )
+                self.assert_within_budget('unpublish', size, lambda: self.client.patch(f'/api/blog/{post.slug}/unpublish/'))
+                self.assert_within_budget('publish', size, lambda: self.client.patch(f'/api/blog/{post.slug}/publish/'))
+                self.assert_within_budget('destroy', size, lambda: self.client.delete(f'/api/blog/{slug}/'))
+
+    def test_import(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                self.create_posts(size)
+                lines = [
+                    json.dumps({
+                        'slug': f'imported-{index}',
+                        'title': f'Imported {index}',
+                        'content': 'Moved from staging.',
+                        'author': self.authors[index % len(self.authors)].username,
+                        'status': 'published',
+                        'created_at': '2024-03-01T09:00:00Z',
+                    })
+                    for index in range(size)
+                ]
+                upload = io.BytesIO('\n'.join(lines).encode())
+                upload.name = 'blog.ndjson'
+                self.client.force_authenticate(self.staff)
+                response = self.assert_within_budget(
+                    'import_posts',
+                    size,
+                    lambda: self.client.post('/api/blog/import/', {'file': upload}, format='multipart'),
+                )
+                self.assertEqual(response.data['upserted'], size)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        get_buffer().drain()
+        self.addCleanup(get_buffer().drain)
+        self.client = APIClient()
+        self.post = BlogPost.objects.create(title='Mould', excerpt='e', content='c', status='published')
+
+    def test_list_answers_304_with_only_the_generation_query(self):
+        first = self.client.get('/api/blog/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        with self.assertNumQueries(1):
+            again = self.client.get('/api/blog/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+        self.post.title = 'Black mould'
+        self.post.save()
+        self.assertEqual(self.client.get('/api/blog/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_generation_bump_is_seen_by_other_processes(self):
+        first = self.client.get('/api/blog/')
+        # Another process (the job worker) changes posts with an UPDATE the local cache never sees
+        CacheGeneration.objects.filter(name=GENERATION_NAME).update(value=F('value') + 1)
+        again = self.client.get('/api/blog/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], first['ETag'])
+
+    def test_cache_stats_are_in_metrics(self):
+        self.client.get('/api/blog/')
+        self.client.get('/api/blog/')
+        staff = User.objects.create(username='ops', is_staff=True)
+        self.client.force_authenticate(staff)
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn(f'blog_response_cache_events_total{{event="hits"}} {cache_stats()["hits"]}', body)
+        self.assertIn('blog_response_cache_events_total{event="misses"}', body)
+
+    def test_retrieve_304_still_counts_views(self):
+        url = f'/api/blog/{self.post.slug}/'
+        first = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(pending_views(self.post.pk), 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        # Admin bulk actions update() the rows and bump the generation
+        BlogPost.objects.filter(pk=self.post.pk).update(featured=True)
+        bump_generation()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class ImageVariantTests(TestCase):
+    """Featured image derivatives, stored on the local filesystem"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        storages = override_settings(
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            BLOG_IMAGE_VARIANTS={'WIDTHS': [320, 640, 1280], 'FORMATS': ['webp']},
+        )
+        storages.enable()
+        self.addCleanup(storages.disable)
+        get_cache().clear()
+
+    def upload(self, name, size=(800, 400)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (30, 120, 60)).save(buffer, format='PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def run_jobs(self):
+        for job in Job.objects.filter(name=images.JOB_NAME, status='queued').order_by('id'):
+            images.generate_variants(job.payload)
+            job.delete()
+
+    def test_upload_queues_variants_exposed_by_list_serializer(self):
+        post = BlogPost.objects.create(
+            title='Balcony glass', excerpt='e', content='c', status='published', featured_image=self.upload('glass.png')
+        )
+        self.assertEqual(post.featured_image_variants, {})
+        self.run_jobs()
+
+        post.refresh_from_db()
+        storage = post.featured_image.storage
+        webp = post.featured_image_variants['formats']['webp']
+        self.assertEqual(sorted(webp, key=int), ['320', '640', '800'])  # never upscaled
+        for name in webp.values():
+            with storage.open(name) as variant:
+                self.assertEqual(Image.open(variant).format, 'WEBP')
+
+        data = APIClient().get('/api/blog/').data['results'][0]['featured_image_variants']
+        self.assertEqual((data['width'], data['height']), (800, 400))
+        self.assertIn('-320w.webp 320w, ', data['formats']['webp']['srcset'])
+        self.assertTrue(data['formats']['webp']['urls']['640'].startswith('http://testserver/'))
+
+    def test_replacing_the_image_removes_old_variants(self):
+        post = BlogPost.objects.create(title='Ovens', excerpt='e', content='c', featured_image=self.upload('oven.png'))
+        self.run_jobs()
+        post.refresh_from_db()
+        old_names = images.variant_names(post.featured_image_variants)
+
+        post.featured_image = self.upload('oven-after.png', size=(500, 500))
+        post.save()
+        self.assertEqual(post.featured_image_variants, {})
+        self.run_jobs()
+
+        post.refresh_from_db()
+        storage = post.featured_image.storage
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+        self.assertEqual(post.featured_image_variants['source'], post.featured_image.name)
+        self.assertEqual(sorted(post.featured_image_variants['formats']['webp'], key=int), ['320', '500'])
+
+    def test_saving_other_fields_does_not_requeue(self):
+        post = BlogPost.objects.create(title='Grout', excerpt='e', content='c', featured_image=self.upload('grout.png'))
+        self.run_jobs()
+        post.refresh_from_db()
+        post.title = 'Grout lines'
+        post.save()
+        self.assertFalse(Job.objects.filter(name=images.JOB_NAME).exists())
+
+    def test_storage_errors_are_recorded_not_retried(self):
+        post = BlogPost.objects.create(title='Decks', excerpt='e', content='c', featured_image=self.upload('deck.png'))
+        storage = post.featured_image.storage
+        with mock.patch.object(storage, 'open', side_effect=OSError('404 Not Found')):
+            with self.assertLogs('blog.images', 'WARNING'):
+                self.run_jobs()
+        post.refresh_from_db()
+        self.assertEqual(post.featured_image_variants, {'source': post.featured_image.name, 'formats': {}})
+
+
+class SnapshotTests(TestCase):
+    """Pre-rendered JSON written to a temporary directory and served by views.snapshot"""
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        config = override_settings(
+            BLOG_SNAPSHOTS={'ENABLED': True, 'LOCATION': location, 'PAGE_SIZE': 2},
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        config.enable()
+        self.addCleanup(config.disable)
+        self.storage = snapshots.get_storage()
+        get_cache().clear()
+
+    def run_jobs(self):
+        reports = []
+        for job in Job.objects.filter(name=snapshots.JOB_NAME, status='queued').order_by('id'):
+            reports.append(snapshots.regenerate(job.payload['slugs']))
+            job.delete()
+        return reports
+
+    def load(self, name):
+        with self.storage.open(name) as stored:
+            return json.loads(stored.read())
+
+    def publish(self, title, **fields):
+        return BlogPost.objects.create(title=title, excerpt='e', content='c', status='published', **fields)
+
+    def test_publish_writes_detail_pages_and_lists(self):
+        BlogPost.objects.create(title='Draft', excerpt='e', content='c')
+        self.assertFalse(Job.objects.filter(name=snapshots.JOB_NAME).exists())
+
+        for title in ['Ovens', 'Grout', 'Windows']:
+            post = self.publish(title, featured=True, category='tips')
+        self.run_jobs()
+
+        self.assertEqual(self.load(f'posts/{post.slug}.json')['title'], 'Windows')
+        first = self.load('pages/1.json')
+        self.assertEqual(first['count'], 3)
+        self.assertEqual([row['title'] for row in first['results']], ['Windows', 'Grout'])
+        self.assertEqual(first['next'], '/api/blog/snapshots/pages/2.json')
+        self.assertEqual(len(self.load('pages/2.json')['results']), 1)
+        self.assertEqual(len(self.load('featured.json')), 3)
+        self.assertEqual(self.load('categories.json'), [{'category': 'tips', 'count': 3}])
+        with self.storage.open('pages/1.json.gz') as compressed:
+            self.assertEqual(json.loads(gzip.decompress(compressed.read())), first)
+
+        # Nothing changed, nothing rewritten
+        self.assertEqual(snapshots.regenerate([post.slug])['written'], [])
+
+    def test_editing_an_older_post_only_rewrites_its_page(self):
+        oldest = self.publish('Ovens')
+        for title in ['Grout', 'Windows']:
+            self.publish(title)
+        self.run_jobs()
+
+        oldest.title = 'Ovens and racks'
+        oldest.save()
+        report = self.run_jobs()[0]
+        self.assertEqual(report['written'], ['posts/ovens.json', 'pages/2.json', 'recent.json'])
+
+    def test_unpublish_removes_detail_and_trailing_page(self):
+        posts = [self.publish(title) for title in ['Ovens', 'Grout', 'Windows']]
+        self.run_jobs()
+
+        posts[0].status = 'draft'
+        posts[0].save()
+        self.run_jobs()
+        self.assertFalse(self.storage.exists('posts/ovens.json'))
+        self.assertFalse(self.storage.exists('pages/2.json.gz'))
+        self.assertEqual(self.load('pages/1.json')['count'], 2)
+
+    def test_rename_removes_the_old_detail(self):
+        post = self.publish('Ovens')
+        self.run_jobs()
+        post.slug = 'oven-racks'
+        post.save()
+        self.run_jobs()
+        self.assertFalse(self.storage.exists('posts/ovens.json'))
+        self.assertEqual(self.load('posts/oven-racks.json')['title'], 'Ovens')
+
+        loaded = BlogPost.objects.get(pk=post.pk)
+        loaded.slug = 'oven-trays'
+        loaded.save()
+        self.run_jobs()
+        self.assertFalse(self.storage.exists('posts/oven-racks.json'))
+        self.assertTrue(self.storage.exists('posts/oven-trays.json'))
+
+    def test_new_image_variants_refresh_the_snapshots(self):
+        post = self.publish('Ovens')
+        self.run_jobs()
+        BlogPost.objects.filter(pk=post.pk).update(featured_image='blog/images/missing.png')
+        with self.assertLogs('blog.images', 'WARNING'):
+            images.generate_variants({'post_id': post.pk, 'source': 'blog/images/missing.png'})
+        job = Job.objects.get(name=snapshots.JOB_NAME, status='queued')
+        self.assertEqual(job.payload, {'slugs': ['ovens']})
+
+    def test_view_serves_precompressed_copy(self):
+        self.publish('Ovens')
+        self.run_jobs()
+
+        client = APIClient()
+        with self.assertNumQueries(0):
+            response = client.get('/api/blog/snapshots/pages/1.json', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 1)
+
+        plain = client.get('/api/blog/snapshots/pages/1.json')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(plain.json()['results'][0]['title'], 'Ovens')
+        again = client.get('/api/blog/snapshots/pages/1.json', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(client.get('/api/blog/snapshots/pages/9.json').status_code, 404)
+
+
+class FastPathTests(TestCase):
+    """orjson renderer, cookie-less session skip and compiled rows give the stock DRF output"""
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'title': 'Café \u2028 tips',
+            'when': datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'price': Decimal('180.50'),
+            'counts': {1: 2},
+            'tags': ('a', 'b'),
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_session_authentication_skips_requests_without_cookie(self):
+        request = RequestFactory().get('/api/blog/')
+        request.user = mock.Mock(side_effect=AssertionError('user resolved'))
+        self.assertIsNone(SessionAuthentication().authenticate(Request(request)))
+
+    def test_compiled_rows_match_stock_serializer(self):
+        author = User.objects.create(username='ed', first_name='Ed')
+        for index in range(3):
+            BlogPost.objects.create(
+                title=f'Tiles {index}', excerpt='e', content='Grout and tiles', tags='tiles, grout',
+                status='published', featured=bool(index % 2), author=author if index else None,
+            )
+        queryset = BlogPost.objects.for_list()
+        context = {'request': RequestFactory().get('/api/blog/')}
+        compiled = BlogPostListSerializer(queryset, many=True, context=context).data
+        with override_settings(API_COMPILED_ROWS=False):
+            stock = BlogPostListSerializer(queryset, many=True, context=context).data
+        self.assertEqual(JSONRenderer().render(compiled), JSONRenderer().render(stock))
+
+        # Annotations missing from the instance are skipped like the stock path does
+        post = queryset.first()
+        row = compile_rows(BlogPostSearchResultSerializer(context=context))(post)
+        self.assertEqual(row, BlogPostSearchResultSerializer(post, context=context).data)
+        self.assertNotIn('rank', row)
+
+
+class KeysetPaginationTests(TestCase):
+    def test_cursor_pages_include_drafts_and_tied_dates(self):
+        get_cache().clear()
+        published = datetime(2026, 1, 5, 9, 0, tzinfo=dt_timezone.utc)
+        for index in range(8):
+            BlogPost.objects.create(
+                title=f'Tied {index}', excerpt='e', content='c', status='published', published_date=published
+            )
+        for index in range(4):
+            BlogPost.objects.create(title=f'Draft {index}', excerpt='e', content='c')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='editor'))
+
+        pages = []
+        url = '/api/blog/?pagination=cursor'
+        while url:
+            data = client.get(url).data
+            pages.append([post['slug'] for post in data['results']])
+            url = data['next']
+        self.assertEqual([len(page) for page in pages], [10, 2])
+        expected = [f'draft-{index}' for index in reversed(range(4))] + [f'tied-{index}' for index in reversed(range(8))]
+        self.assertEqual(pages[0] + pages[1], expected)
+
+        # Anonymous users page through the published posts the same way
+        data = APIClient().get('/api/blog/?pagination=cursor').data
+        self.assertEqual([post['slug'] for post in data['results']], expected[4:])
+
+
+class SlugAllocationTests(TestCase):
+    def create(self, slug):
+        return BlogPost.objects.create(slug=slug, title=slug, excerpt='e', content='c')
+
+    def test_free_base_slug_is_used_even_with_numeric_neighbours(self):
+        self.create('tips-2024')
+        self.assertEqual(BlogPost.allocate_slug('Tips'), 'tips')
+        self.create('tips')
+        self.assertEqual(BlogPost.allocate_slug('Tips'), 'tips-2025')
+
+    def test_long_numeric_tails_are_not_suffixes(self):
+        self.create('order')
+        self.create('order-3')
+        self.create('order-12345678901234567890')
+        self.assertEqual(BlogPost.allocate_slug('Order'), 'order-4')
+
+
+class ReadingTimeBackfillTests(TestCase):
+    def test_backfill_follows_the_strip_html_setting(self):
+        markup = '<p class="lead" data-x="1">one</p>\n' * 300
+        post = BlogPost.objects.create(title='Markup', excerpt='e', content=markup)
+        with override_settings(BLOG_READING_TIME_STRIP_HTML=True):
+            call_command('backfill_reading_time', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 300)
+
+        call_command('backfill_reading_time', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 900)
+
+
+class TransferTests(TestCase):
+    def test_overlong_rows_are_reported_not_truncated(self):
+        rows = [
+            {'slug': 'ok', 'title': 'Fine', 'content': 'c'},
+            {'slug': 'long-title', 'title': 'T' * 201, 'content': 'c'},
+            {'slug': 's' * 201, 'title': 'Long slug', 'content': 'c'},
+            {'title': 'x ' * 150, 'content': 'c'},  # slugified title is too long too
+        ]
+        report = transfer.import_rows(rows)
+        self.assertEqual((report['upserted'], report['failed']), (1, 3))
+        self.assertEqual([(error['row'], list(error['errors'])) for error in report['errors']], [
+            (2, ['title']), (3, ['slug']), (4, ['title']),
+        ])
+        self.assertEqual(list(BlogPost.objects.values_list('slug', flat=True)), ['ok'])
+
+    def test_text_fields_and_flags_are_validated_per_row(self):
+        rows = [
+            {'slug': 'ok', 'title': 'Fine', 'content': 'c', 'featured': True},
+            {'slug': 'meta', 'title': 'Meta', 'content': 'c', 'meta_description': 'm' * 161},
+            {'slug': 'keywords', 'title': 'Keywords', 'content': 'c', 'meta_keywords': 'k' * 201},
+            {'slug': 'category', 'title': 'Category', 'content': 'c', 'category': 'c' * 101},
+            {'slug': 'tags', 'title': 'Tags', 'content': 'c', 'tags': 't' * 201},
+            {'slug': 'quoted', 'title': 'Quoted', 'content': 'c', 'featured': 'false'},
+            {'slug': 'plain', 'title': 'Plain', 'content': 'c', 'excerpt': 'e' * 300},
+        ]
+        report = transfer.import_rows(rows)
+        self.assertEqual([(error['row'], list(error['errors'])) for error in report['errors']], [
+            (2, ['meta_description']), (3, ['meta_keywords']), (4, ['category']), (5, ['tags']), (6, ['featured']),
+        ])
+        self.assertEqual(dict(BlogPost.objects.values_list('slug', 'featured')), {'ok': True, 'plain': False})
+
+    def test_new_posts_keep_the_exported_created_at(self):
+        existing = BlogPost.objects.create(slug='kept', title='Kept', excerpt='e', content='c')
+        exported = '2024-03-01T09:00:00Z'
+        report = transfer.import_rows([
+            {'slug': 'kept', 'title': 'Kept again', 'content': 'c', 'created_at': exported},
+            {'slug': 'moved', 'title': 'Moved', 'content': 'c', 'created_at': exported},
+            {'slug': 'undated', 'title': 'Undated', 'content': 'c'},
+        ])
+        self.assertEqual(report['upserted'], 3)
+        dates = dict(BlogPost.objects.values_list('slug', 'created_at'))
+        self.assertEqual(dates['moved'], datetime(2024, 3, 1, 9, tzinfo=dt_timezone.utc))
+        self.assertEqual(dates['kept'], existing.created_at)
+        self.assertGreater(dates['undated'], existing.created_at)
+
+
+class ServerTimingTests(TestCase):
+    def test_header_is_for_staff_unless_configured(self):
+        staff = User.objects.create(username='ops', is_staff=True)
+        client = APIClient()
+        self.assertNotIn('Server-Timing', client.get('/api/blog/'))
+        client.force_authenticate(staff)
+        self.assertIn('db;dur=', client.get('/api/blog/')['Server-Timing'])
+
+        with override_settings(DEBUG=True):
+            self.assertIn('Server-Timing', APIClient().get('/api/blog/'))
+        with override_settings(REQUEST_METRICS={'SERVER_TIMING': 'all'}):
+            self.assertIn('Server-Timing', APIClient().get('/api/blog/'))
+        with override_settings(REQUEST_METRICS={'SERVER_TIMING': 'off'}):
+            client = APIClient()
+            client.force_authenticate(staff)
+            self.assertNotIn('Server-Timing', client.get('/api/blog/'))
@@ -0,0 +1,275 @@
+"""
+Blog content export and import as NDJSON, for moving posts between environments.
+
+Each line is one post keyed by ``slug``, with the author as a username and
+the featured image as a reference (``{"name", "url"}``); image files are not
+copied, so both environments should share the media storage or the files
+should be synced separately. Resized variants are regenerated by the
+image_variants job for posts whose image changed.
+
+Exports stream from a server-side cursor. Imports read the file line by
+line and upsert every ``batch_size`` posts with one
+``bulk_create(update_conflicts=True, unique_fields=['slug'])``, so memory
+stays constant and running the same import twice yields the same posts.
+View counts and creation dates of existing posts are left alone; new posts
+get the exported ``created_at`` (or the import time when there is none).
+"""
+
+import io
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from .cache import bump_generation
+from .images import queue_stale as queue_stale_image_variants
+from .models import BlogPost, count_words, reading_time_for
+from .search import get_backend as get_search_backend
+from .snapshots import queue_snapshots
+
+CONTENT_TYPE = 'application/x-ndjson'
+
+EXPORT_FIELDS = [
+    'slug',
+    'title',
+    'author',
+    'excerpt',
+    'content',
+    'featured_image',
+    'meta_description',
+    'meta_keywords',
+    'category',
+    'tags',
+    'status',
+    'published_date',
+    'views',
+    'featured',
+    'created_at',
+    'updated_at',
+]
+
+TEXT_FIELDS = ['excerpt', 'meta_description', 'meta_keywords', 'category', 'tags']
+
+# Overwritten when an imported slug already exists (views and created_at are kept)
+UPSERT_FIELDS = [
+    'title',
+    'author',
+    'excerpt',
+    'content',
+    'featured_image',
+    'meta_description',
+    'meta_keywords',
+    'category',
+    'tags',
+    'status',
+    'published_date',
+    'featured',
+    'word_count',
+    'reading_time',
+    'updated_at',
+]
+
+CHUNK_SIZE = 500
+BATCH_SIZE = 200
+MAX_REPORTED_ERRORS = 1000
+
+
+def image_reference(name):
+    if not name:
+        return None
+    return {'name': name, 'url': BlogPost._meta.get_field('featured_image').storage.url(name)}
+
+
+def export_lines(queryset, chunk_size=CHUNK_SIZE):
+    """NDJSON lines for ``queryset``, read through a server-side cursor"""
+    columns = ['author__username' if field == 'author' else field for field in EXPORT_FIELDS]
+    for row in queryset.order_by('id').values_list(*columns).iterator(chunk_size=chunk_size):
+        post = dict(zip(EXPORT_FIELDS, row))
+        post['featured_image'] = image_reference(post['featured_image'])
+        yield json.dumps(post, cls=DjangoJSONEncoder) + '\n'
+
+
+def read_lines(text_file):
+    """Yield one dict per line, or an error message for lines that aren't a JSON object"""
+    for line in text_file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f'Invalid JSON: {e}'
+            continue
+        yield row if isinstance(row, dict) else 'Expected a JSON object'
+
+
+def build_post(row, authors):
+    """Unsaved BlogPost for an import row; raises ValidationError"""
+    title = str(row.get('title') or '').strip()
+    content = row.get('content')
+    if not title:
+        raise ValidationError({'title': 'This field is required.'})
+    check_length('title', title)
+    if not isinstance(content, str) or not content.strip():
+        raise ValidationError({'content': 'This field is required.'})
+
+    slug = row.get('slug') or slugify(title)
+    validate_slug(slug)
+    check_length('slug', slug)
+
+    status = row.get('status') or 'draft'
+    if status not in dict(BlogPost.STATUS_CHOICES):
+        raise ValidationError({'status': f'"{status}" is not a valid choice.'})
+
+    published_date = parse_timestamp(row, 'published_date')
+    if published_date is None and status == 'published':
+        published_date = timezone.now()
+
+    image = row.get('featured_image')
+    if isinstance(image, dict):
+        image = image.get('name')
+
+    text = {field: str(row.get(field) or '') for field in TEXT_FIELDS}
+    for field, value in text.items():
+        if BlogPost._meta.get_field(field).max_length:
+            check_length(field, value)
+
+    featured = row.get('featured')
+    if featured is None:
+        featured = False
+    elif not isinstance(featured, bool):
+        raise ValidationError({'featured': 'Must be a valid boolean.'})
+
+    word_count = count_words(content)
+    return BlogPost(
+        slug=slug,
+        title=title,
+        author_id=authors.get(row.get('author')),
+        content=content,
+        featured_image=image or None,
+        status=status,
+        published_date=published_date,
+        views=int(row.get('views') or 0),
+        featured=featured,
+        word_count=word_count,
+        reading_time=reading_time_for(word_count),
+        created_at=parse_timestamp(row, 'created_at'),
+        **text,
+    )
+
+
+def check_length(field, value):
+    max_length = BlogPost._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise ValidationError({
+            field: f'Ensure this value has at most {max_length} characters (it has {len(value)}).'
+        })
+
+
+def parse_timestamp(row, field):
+    """Aware datetime of an optional row value; raises ValidationError"""
+    if not row.get(field):
+        return None
+    value = parse_datetime(str(row[field]))
+    if value is None:
+        raise ValidationError({field: 'Invalid datetime.'})
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def upsert(posts):
+    """Insert or update a batch of posts by slug with one statement"""
+    # auto_now_add overwrites created_at on insert; the exported dates are set afterwards
+    created = {post.slug: post.created_at for post in posts if post.created_at}
+    with transaction.atomic():
+        if created:
+            existing = BlogPost.objects.filter(slug__in=created).values_list('slug', flat=True)
+            for slug in existing:
+                del created[slug]
+        BlogPost.objects.bulk_create(
+            posts,
+            update_conflicts=True,
+            unique_fields=['slug'],
+            update_fields=UPSERT_FIELDS,
+        )
+        if created:
+            BlogPost.objects.filter(slug__in=created).update(created_at=Case(
+                *[When(slug=slug, then=Value(date)) for slug, date in created.items()],
+                output_field=DateTimeField(),
+            ))
+        upserted = BlogPost.objects.filter(slug__in=[post.slug for post in posts])
+        get_search_backend().index_queryset(upserted)
+        # bulk_create() skips save(), so new featured images are picked up here
+        queue_stale_image_variants(upserted)
+        queue_snapshots([post.slug for post in posts])
+
+
+def import_rows(rows, batch_size=BATCH_SIZE, dry_run=False, progress=None):
+    """
+    Upsert rows in batches. Returns ``{'rows', 'upserted', 'failed', 'errors',
+    'seconds', 'rows_per_second'}``; ``progress(report)`` is called after each batch.
+    """
+    started = time.monotonic()
+    report = {'rows': 0, 'upserted': 0, 'failed': 0, 'errors': []}
+    numbered = enumerate(rows, start=1)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            break
+
+        usernames = {row.get('author') for _, row in batch if isinstance(row, dict) and row.get('author')}
+        authors = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        # Last occurrence wins: one statement can't update the same slug twice
+        posts = {}
+        for number, row in batch:
+            report['rows'] += 1
+            try:
+                if isinstance(row, str):
+                    raise ValidationError(row)
+                post = build_post(row, authors)
+            except ValidationError as e:
+                errors = e.message_dict if hasattr(e, 'error_dict') else {'non_field_errors': e.messages}
+            except (TypeError, ValueError) as e:
+                errors = {'non_field_errors': [str(e)]}
+            else:
+                posts[post.slug] = post
+                continue
+            report['failed'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': number, 'errors': errors})
+
+        if posts and not dry_run:
+            upsert(list(posts.values()))
+        report['upserted'] += len(posts)
+        if progress:
+            progress(summarize(report, started))
+
+    if report['upserted'] and not dry_run:
+        bump_generation()
+    return summarize(report, started)
+
+
+def summarize(report, started):
+    seconds = time.monotonic() - started
+    return {
+        **report,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(report['rows'] / seconds, 1) if seconds else 0.0,
+    }
+
+
+def import_file(binary_file, batch_size=BATCH_SIZE, dry_run=False, progress=None):
+    """Import from a binary file object (upload or opened file)"""
+    text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig')
+    try:
+        return import_rows(read_lines(text_file), batch_size, dry_run, progress)
+    finally:
+        text_file.detach()
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BlogPostViewSet
+from .views import BlogPostViewSet, snapshot
 
 router = DefaultRouter()
 router.register(r'blog', BlogPostViewSet, basename='blog')
 
 urlpatterns = [
+    path('blog/snapshots/<path:name>', snapshot, name='blog-snapshot'),
     path('', include(router.urls)),
 ]
 
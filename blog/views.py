@@ -1,14 +1,29 @@
+import hashlib
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from core.conditional import add_validators, make_etag, not_modified
+from core.pagination import FlexiblePagination
+from core.querybudget import QueryBudgetMixin
+from rest_framework.filters import OrderingFilter
+from . import snapshots, transfer
+from .cache import cache_response, get_generation
 from .models import BlogPost
-from .serializers import BlogPostSerializer, BlogPostListSerializer, BlogPostCreateSerializer
+from .search import IndexedSearchFilter, get_backend as get_search_backend
+from .serializers import (
+    BlogPostSerializer,
+    BlogPostListSerializer,
+    BlogPostCreateSerializer,
+    BlogPostSearchResultSerializer,
+)
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for BlogPost management
     
@@ -18,22 +33,64 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     - GET /api/blog/{slug}/ - Retrieve specific blog post
     - PUT/PATCH /api/blog/{slug}/ - Update blog post
     - DELETE /api/blog/{slug}/ - Delete blog post
+    - GET /api/blog/search/?q= - Ranked full-text search with highlighted snippets
+    - GET /api/blog/export/ - Stream all posts as NDJSON (staff only)
+    - POST /api/blog/import/ - Upsert posts by slug from an NDJSON 'file' upload (staff only, ?dry_run=true)
+    
+    Lists accept ?pagination=cursor (keyset on published_date or created_at, id) and ?count=false
+    Reads send ETag/Last-Modified and answer If-None-Match/If-Modified-Since with 304
     """
     
     queryset = BlogPost.objects.all()
     serializer_class = BlogPostSerializer
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = FlexiblePagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
     
     # Filter options
-    filterset_fields = ['status', 'category', 'featured', 'author']
+    filterset_fields = {
+        'status': ['exact'],
+        'category': ['exact'],
+        'featured': ['exact'],
+        'author': ['exact'],
+        'reading_time': ['exact', 'lte', 'gte'],
+    }
     
-    # Search options
-    search_fields = ['title', 'excerpt', 'content', 'tags', 'category']
+    # Search options: ?search= uses the full-text index over
+    # title, tags, category, excerpt and content (see blog/search.py)
     
     # Ordering options
-    ordering_fields = ['published_date', 'created_at', 'views', 'title']
+    ordering_fields = ['published_date', 'created_at', 'views', 'title', 'reading_time']
     ordering = ['-published_date']
+    # Drafts have no published_date; cursor pages position them by created_at
+    cursor_null_fallbacks = {'published_date': 'created_at'}
+    
+    # Actions serialized with BlogPostListSerializer, served from the lean projection
+    LIST_ACTIONS = ['list', 'featured', 'popular', 'recent']
+    
+    # Maximum queries per action, asserted at 1, 10 and 100 posts in blog/tests.py
+    # (see core/querybudget.py). Writes include the search vector UPDATE on PostgreSQL
+    # the snapshot job INSERT for published posts and the generation bump (see blog/cache.py).
+    # Cached reads add one primary-key query for the generation.
+    query_budgets = {
+        'list': 3,  # cache generation + count + page
+        'retrieve': 3,  # post + cache generation + occasional view counter flush
+        'featured': 2,
+        'categories': 2,
+        'popular': 2,
+        'recent': 2,
+        'search': 4,  # generation + in-memory index load (first search only) + count + page
+        'export': 1,
+        # per batch of transfer.BATCH_SIZE posts (+2 to keep exported created_at of new posts);
+        # SQLite splits the INSERT by its variable limit
+        'import_posts': 11,
+        'create': 7,
+        'update': 5,
+        'partial_update': 4,
+        'publish': 5,
+        'unpublish': 5,
+        'destroy': 4,
+    }
     
     def get_serializer_class(self):
         """Use appropriate serializer based on action"""
@@ -54,8 +111,12 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         Filter queryset based on user authentication
         Public users only see published posts
         Authenticated users see all posts
+        List actions load only the columns BlogPostListSerializer needs
         """
-        queryset = BlogPost.objects.all()
+        if self.action in self.LIST_ACTIONS:
+            queryset = BlogPost.objects.for_list()
+        else:
+            queryset = BlogPost.objects.select_related('author')
         
         if not self.request.user.is_authenticated:
             # Public users only see published posts
@@ -75,18 +136,32 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         # else:
         #     permission_classes = [IsAuthenticatedOrReadOnly]
         permission_classes = [AllowAny]
+        if self.action in ['export', 'import_posts']:
+            permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List blog posts (responses cached per query, see blog/cache.py)"""
+        return super().list(request, *args, **kwargs)
+    
     def retrieve(self, request, *args, **kwargs):
-        """Retrieve blog post and increment view count"""
+        """Retrieve blog post and increment view count (304 if the client's copy is current)"""
         instance = self.get_object()
         
-        # Increment views (only for published posts)
+        # Increment views (only for published posts), also when answering 304
         if instance.status == 'published':
             instance.increment_views()
         
+        # View counts are left out of the validators so counting never defeats a 304;
+        # the generation covers admin bulk actions
+        etag = make_etag('blog', instance.pk, instance.updated_at.isoformat(), get_generation())
+        unchanged = not_modified(request, etag, instance.updated_at)
+        if unchanged is not None:
+            return unchanged
+        
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return add_validators(Response(serializer.data), etag, instance.updated_at)
     
     def create(self, request, *args, **kwargs):
         """Create new blog post"""
@@ -113,6 +188,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         )
     
     @action(detail=False, methods=['get'])
+    @cache_response
     def featured(self, request):
         """Get featured blog posts"""
         featured_posts = self.get_queryset().filter(featured=True, status='published')[:5]
@@ -120,6 +196,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cache_response
     def categories(self, request):
         """Get list of all categories with post counts"""
         from django.db.models import Count
@@ -132,9 +209,10 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             .order_by('-count')
         )
         
-        return Response(categories)
+        return Response(list(categories))
     
     @action(detail=False, methods=['get'])
+    @cache_response
     def popular(self, request):
         """Get most popular blog posts (by views)"""
         popular_posts = self.get_queryset().filter(status='published').order_by('-views')[:10]
@@ -142,12 +220,58 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cache_response
     def recent(self, request):
         """Get recent blog posts"""
         recent_posts = self.get_queryset().filter(status='published').order_by('-published_date')[:10]
         serializer = BlogPostListSerializer(recent_posts, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    @cache_response
+    def search(self, request):
+        """Full-text search ranked by relevance, with highlighted snippets"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Query parameter "q" is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Field filters (?category=, ?featured=...) still apply; ordering is by rank
+        queryset = DjangoFilterBackend().filter_queryset(request, self.get_queryset(), self)
+        results = get_search_backend().search(queryset, query)
+        
+        page = self.paginate_queryset(results)
+        if page is not None:
+            serializer = BlogPostSearchResultSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = BlogPostSearchResultSerializer(results, many=True, context={'request': request})
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream posts (all statuses, list filters applied) as NDJSON"""
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(transfer.export_lines(queryset), content_type=transfer.CONTENT_TYPE)
+        response['Content-Disposition'] = 'attachment; filename="blog.ndjson"'
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_posts(self, request):
+        """Upsert posts by slug from an uploaded NDJSON export"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the posts as a "file" field'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = request.query_params.get('dry_run', '').lower() in ('true', '1', 'yes')
+        report = transfer.import_file(upload.file, dry_run=dry_run)
+        return Response({'success': not report['failed'], 'dry_run': dry_run, **report})
+    
     @action(detail=True, methods=['patch'])
     def publish(self, request, slug=None):
         """Publish a blog post"""
@@ -182,3 +306,32 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             'message': 'Blog post unpublished successfully!',
             'data': serializer.data
         })
+
+
+@require_safe
+def snapshot(request, name):
+    """
+    Serve a pre-rendered snapshot (see blog/snapshots.py) in the best
+    encoding the client accepts, without the ORM or DRF
+    """
+    if not name.endswith('.json') or '..' in name.split('/'):
+        raise Http404
+    storage = snapshots.get_storage()
+    accepted = request.headers.get('Accept-Encoding', '')
+    for encoding in ['br', 'gzip', None]:
+        if encoding is not None and encoding not in accepted:
+            continue
+        data = snapshots.read(storage, name + snapshots.ENCODINGS.get(encoding, ''))
+        if data is not None:
+            break
+    else:
+        raise Http404
+    
+    etag = make_etag('snapshot', name, encoding, hashlib.md5(data).hexdigest())
+    response = not_modified(request, etag) or HttpResponse(data, content_type='application/json')
+    if response.status_code == 200:
+        add_validators(response, etag)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework import authentication
+
+
+class SessionAuthentication(authentication.SessionAuthentication):
+    """
+    DRF session authentication that returns early for requests without a
+    session cookie. Those are always anonymous, so the lazy ``request.user``
+    (session store and auth backend lookups) is never evaluated for them.
+    Public reads from the frontend never carry the cookie.
+    """
+
+    def authenticate(self, request):
+        if settings.SESSION_COOKIE_NAME not in request._request.COOKIES:
+            return None
+        return super().authenticate(request)
@@ -0,0 +1,48 @@
+"""
+Conditional GET (ETag / Last-Modified) for API reads.
+
+Views compute the validators from data they already have: the
+``updated_at`` of a fetched row, a cache generation counter, or one
+aggregate query. They call ``not_modified()`` before serializing. A match
+returns an empty 304 without rendering anything. Otherwise the full
+response gets the same validators through ``add_validators()``.
+
+Responses are marked ``Cache-Control: no-cache`` so browsers and the
+frontend revalidate every time instead of guessing a freshness lifetime.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Quoted ETag hashing the given parts (ids, timestamps, generations, params)"""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def timestamp(value):
+    """Seconds since the epoch for a datetime or number (None stays None)"""
+    if value is None:
+        return None
+    return int(value.timestamp() if hasattr(value, 'timestamp') else value)
+
+
+def add_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(timestamp(last_modified))
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response carrying the validators if the request's copy is current, else None"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp(last_modified))
+    if response is None:
+        return None
+    return add_validators(response, etag, last_modified)
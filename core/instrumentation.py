@@ -0,0 +1,303 @@
+"""
+Per-request performance instrumentation.
+
+``RequestMetricsMiddleware`` (first in ``MIDDLEWARE``) measures each
+request's wall time, database queries and database time (through a
+``connection.execute_wrapper``), serializer time and response size, and tags
+them with the DRF viewset and action that handled the request. Serializer
+time is reported by ``TimedSerializerMixin`` on the API serializers: the
+outermost ``to_representation``/``run_validation`` call of each serializer
+is timed, so nested and list serializers are not counted twice.
+
+Every request then gets
+
+- a ``Server-Timing`` header (``app``, ``db``, ``serializer``), by default
+  only for staff users or with ``DEBUG`` since it tells anyone how long the
+  database took
+- a JSON log line on the ``core.requests`` logger
+- an observation in the in-process histograms served in Prometheus text
+  format by ``/api/metrics/`` (see ``core/views.py``)
+
+Apps add their own series to that page with ``register_collector``.
+
+Histograms live in the worker process, so each gunicorn worker reports its
+own series; Prometheus adds them up when scraping each worker or the
+numbers can be read per worker.
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.requests')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': 'staff',  # 'staff' (staff users, everyone when DEBUG), 'all' or 'off'
+    'LOG': True,
+    'TOKEN': '',  # bearer token accepted by /api/metrics/ besides staff sessions
+    'DURATION_BUCKETS': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],  # seconds
+    'QUERY_BUCKETS': [0, 1, 2, 5, 10, 20, 50, 100],
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_config():
+    """Return request metrics settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+class RequestMetrics:
+    """Measurements of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = 'unresolved'
+        self.action = ''
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    def tag(self, view_func, method):
+        """Label the request with the DRF viewset and action of ``view_func``"""
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            self.view = getattr(view_func, '__name__', 'view')
+            return
+        self.view = view_class.__name__
+        actions = getattr(view_func, 'actions', None) or {}
+        self.action = actions.get(method.lower(), method.lower())
+
+
+class TimedSerializerMixin:
+    """Adds the serializer's representation and validation time to the current request"""
+
+    def to_representation(self, instance):
+        return timed_serializer_call(super().to_representation, instance)
+
+    def run_validation(self, *args, **kwargs):
+        return timed_serializer_call(super().run_validation, *args, **kwargs)
+
+
+def timed_serializer_call(method, *args, **kwargs):
+    metrics = _current.get()
+    if metrics is None or metrics.serializer_depth:
+        return method(*args, **kwargs)
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        return method(*args, **kwargs)
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - started
+        metrics.serializer_depth -= 1
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with labels, safe to share between threads"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = sorted(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.setdefault(labels, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, dict(values, buckets=list(values['buckets']))) for labels, values in self.series.items())
+        for labels, values in series:
+            label_text = format_labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values['buckets']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {values["count"]}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {values["sum"]:.6f}')
+            lines.append(f'{self.name}_count{{{label_text}}} {values["count"]}')
+        return lines
+
+
+class Counter:
+    """Labelled Prometheus counter"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            lines.append(f'{self.name}{{{format_labels(labels)}}} {value:g}')
+        return lines
+
+
+LABEL_NAMES = ('view', 'action', 'method', 'status')
+
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return ','.join(f'{name}="{escape(value)}"' for name, value in zip(LABEL_NAMES, labels))
+
+
+_config = get_config()
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Wall time of API requests.', _config['DURATION_BUCKETS']
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per API request.', _config['QUERY_BUCKETS']
+)
+DB_SECONDS = Counter('http_request_db_seconds_total', 'Time spent in database queries.')
+SERIALIZER_SECONDS = Counter('http_request_serializer_seconds_total', 'Time spent in DRF serializers.')
+RESPONSE_BYTES = Counter('http_response_size_bytes_total', 'Response body bytes (streaming responses excluded).')
+
+METRICS = [REQUEST_SECONDS, REQUEST_QUERIES, DB_SECONDS, SERIALIZER_SECONDS, RESPONSE_BYTES]
+
+# Functions returning extra exposition lines, registered by apps (see register_collector)
+COLLECTORS = []
+
+
+def record(metrics, method, status_code, seconds, size):
+    labels = (metrics.view, metrics.action, method, str(status_code))
+    REQUEST_SECONDS.observe(labels, seconds)
+    REQUEST_QUERIES.observe(labels, metrics.db_queries)
+    DB_SECONDS.inc(labels, metrics.db_seconds)
+    SERIALIZER_SECONDS.inc(labels, metrics.serializer_seconds)
+    if size is not None:
+        RESPONSE_BYTES.inc(labels, size)
+
+
+def exposition():
+    """All metrics in Prometheus text format"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.exposition()
+    for collector in COLLECTORS:
+        lines += collector()
+    return '\n'.join(lines) + '\n'
+
+
+def register_collector(collector):
+    """Add a function returning Prometheus text lines to ``/api/metrics/``"""
+    if collector not in COLLECTORS:
+        COLLECTORS.append(collector)
+    return collector
+
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
+
+
+def wants_server_timing(request, mode):
+    """Whether this response gets a Server-Timing header under the SERVER_TIMING mode"""
+    if mode == 'all':
+        return True
+    if mode != 'staff':
+        return False
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_staff)
+
+
+def server_timing(metrics, seconds):
+    return ', '.join([
+        f'app;dur={seconds * 1000:.1f}',
+        f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries"',
+        f'serializer;dur={metrics.serializer_seconds * 1000:.1f}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    """Measure every request; keep it first in MIDDLEWARE so the wall time covers the whole stack"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+
+    def __call__(self, request):
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        seconds = time.perf_counter() - metrics.started
+        size = None if response.streaming else len(response.content)
+        record(metrics, request.method, response.status_code, seconds, size)
+        if wants_server_timing(request, self.config['SERVER_TIMING']):
+            response['Server-Timing'] = server_timing(metrics, seconds)
+        if self.config['LOG']:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'view': metrics.view,
+                'action': metrics.action,
+                'duration_ms': round(seconds * 1000, 2),
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_seconds * 1000, 2),
+                'serializer_ms': round(metrics.serializer_seconds * 1000, 2),
+                'response_bytes': size,
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics.tag(view_func, request.method)
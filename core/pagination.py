@@ -0,0 +1,141 @@
+"""
+Pagination shared by the API viewsets.
+
+Page-number pagination stays the default. Clients can opt in to cheaper modes:
+
+- ``?pagination=cursor`` (or any ``?cursor=`` link): keyset pagination on the
+  view's ordering plus ``id`` as tie-breaker. No COUNT(*) and no OFFSET, so
+  deep pages cost the same as the first one. The cursor position is the
+  first ordering field only, so it must not be NULL: views map nullable
+  fields to a fallback in ``cursor_null_fallbacks`` (the key becomes
+  ``Coalesce(field, fallback)``), and rows with a NULL key and no fallback
+  are left out of cursor pages.
+- ``?count=false``: page-number pagination without the COUNT(*) query;
+  ``count`` is returned as null and ``next`` is found by fetching one extra row.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on the view's ordering with ``id`` appended as tie-breaker"""
+
+    ordering = '-id'
+    position_field = 'cursor_position'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        if ordering[0].lstrip('-') in getattr(view, 'cursor_null_fallbacks', {}):
+            ordering[0] = ('-' if ordering[0].startswith('-') else '') + self.position_field
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        field_name = super().get_ordering(request, queryset, view)[0].lstrip('-')
+        fallback = getattr(view, 'cursor_null_fallbacks', {}).get(field_name)
+        if fallback:
+            queryset = queryset.annotate(**{self.position_field: Coalesce(field_name, fallback)})
+        else:
+            # Rows with a NULL cursor field can't be positioned, so they are skipped
+            try:
+                if queryset.model._meta.get_field(field_name).null:
+                    queryset = queryset.exclude(**{f'{field_name}__isnull': True})
+            except FieldDoesNotExist:
+                pass
+        return super().paginate_queryset(queryset, request, view)
+
+
+class UncountedPageNumberPagination(PageNumberPagination):
+    """Page-number pagination that never runs COUNT(*)"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            page_number = int(page_number)
+            if page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='That page number is not valid'
+            ))
+
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='That page contains no results'
+            ))
+
+        self.request = request
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': None,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class FlexiblePagination(PageNumberPagination):
+    """
+    Page-number pagination with opt-in cursor and count-free modes.
+    Cursor mode is limited to the actions in ``view.cursor_pagination_actions``
+    (default: ``list``), since it re-orders the queryset.
+    """
+
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def __init__(self):
+        self.delegate = None
+
+    def get_delegate(self, request, view):
+        cursor_actions = getattr(view, 'cursor_pagination_actions', ('list',))
+        wants_cursor = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+        if wants_cursor and getattr(view, 'action', None) in cursor_actions:
+            return KeysetPagination()
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0', 'no'):
+            return UncountedPageNumberPagination()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.get_delegate(request, view)
+        if self.delegate is not None:
+            return self.delegate.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.delegate is not None:
+            return self.delegate.get_paginated_response(data)
+        return super().get_paginated_response(data)
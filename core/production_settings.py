@@ -28,8 +28,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # WhiteNoise configuration for serving static files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# Add WhiteNoise middleware
-MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+# Add WhiteNoise middleware (directly after SecurityMiddleware)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+)
 
 # Media files
 MEDIA_URL = '/media/'
@@ -39,6 +42,22 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='').split(',')
 CORS_ALLOW_CREDENTIALS = True
 
+# Query budgets: count queries only when asked to (development defaults follow DEBUG)
+QUERY_BUDGET = {
+    **QUERY_BUDGET,
+    'ENFORCE': config('QUERY_BUDGET_ENFORCE', default='off'),
+    'DETECT_REPEATED': config('QUERY_DETECT_REPEATED', default=False, cast=bool),
+}
+
+# JSON only unless the browsable API is asked for (settings.py follows DEBUG)
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if config('API_BROWSABLE', default=False, cast=bool) else []),
+    ],
+}
+
 # Security settings
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True
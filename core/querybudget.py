@@ -0,0 +1,192 @@
+"""
+Query budgets: catch N+1 queries before they reach production.
+
+- ``query_budget(n)`` is a context manager and decorator that fails with
+  ``QueryBudgetExceeded`` when the wrapped code runs more than ``n`` queries.
+  The error lists the captured SQL and any repeated query shapes.
+- ``QueryBudgetMixin`` lets a viewset declare ``query_budgets = {action: n}``.
+  Requests that go over their action's budget are logged or raise,
+  depending on ``QUERY_BUDGET['ENFORCE']`` (``'off'``, ``'warn'`` or ``'raise'``).
+  The test suites assert the same budgets at several table sizes.
+- ``RepeatedQueryMiddleware`` (``QUERY_BUDGET['DETECT_REPEATED']``, on with
+  DEBUG) logs requests that run the same query shape ``REPEAT_THRESHOLD``
+  or more times. This is the usual sign of a per-row lookup.
+
+A query's shape is its SQL with literals, ``IN`` lists and savepoint names
+normalized. A loop of ``SELECT ... WHERE id = %s`` is therefore one shape
+seen N times.
+"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENFORCE': 'off',
+    'DETECT_REPEATED': False,
+    'REPEAT_THRESHOLD': 5,
+}
+
+SHAPE_PATTERNS = [
+    (re.compile(r'"s\d+_x\d+"'), '"savepoint"'),
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def get_config():
+    """Return query budget settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """SQL with literals, IN lists and savepoint names normalized"""
+    for pattern, replacement in SHAPE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryRecorder:
+    """Collects the SQL run on every database connection of the current thread"""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def start(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def stop(self):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=2):
+        """``[(shape, times)]`` for shapes run at least ``threshold`` times, most frequent first"""
+        shapes = Counter(query_shape(sql) for sql in self.queries)
+        return [(shape, times) for shape, times in shapes.most_common() if times >= threshold]
+
+    def report(self):
+        lines = [f'{index}. {sql}' for index, sql in enumerate(self.queries, start=1)]
+        repeated = self.repeated()
+        if repeated:
+            lines.append('Repeated query shapes:')
+            lines += [f'  {times}x {shape}' for shape, times in repeated]
+        return '\n'.join(lines)
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail if the block runs more than ``max_queries`` queries.
+
+        with query_budget(3):
+            client.get('/api/blog/')
+
+        @query_budget(1)
+        def test_lookup(self): ...
+    """
+
+    def __init__(self, max_queries, label=''):
+        self.max_queries = max_queries
+        self.label = label
+
+    def __enter__(self):
+        self.recorder = QueryRecorder().start()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.stop()
+        if exc_type is None and self.recorder.count > self.max_queries:
+            raise QueryBudgetExceeded(budget_message(self.label, self.recorder, self.max_queries))
+        return False
+
+
+def budget_message(label, recorder, max_queries):
+    subject = f'{label}: ' if label else ''
+    return f'{subject}{recorder.count} queries, budget is {max_queries}\n{recorder.report()}'
+
+
+class QueryBudgetMixin:
+    """
+    Viewset mixin enforcing ``query_budgets`` per action (see QUERY_BUDGET['ENFORCE']).
+
+    Queries run after the response is returned, such as those of a streaming
+    export, are not counted here. The tests cover them.
+    """
+
+    query_budgets = {}
+
+    def initial(self, request, *args, **kwargs):
+        self.query_recorder = None
+        if get_config()['ENFORCE'] != 'off' and self.action in self.query_budgets:
+            self.query_recorder = QueryRecorder().start()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        recorder = getattr(self, 'query_recorder', None)
+        if recorder is None:
+            return response
+        recorder.stop()
+        self.query_recorder = None
+        max_queries = self.query_budgets[self.action]
+        if recorder.count > max_queries:
+            message = budget_message(f'{type(self).__name__}.{self.action}', recorder, max_queries)
+            if get_config()['ENFORCE'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class RepeatedQueryMiddleware:
+    """Development aid: log requests that repeat a query shape REPEAT_THRESHOLD or more times"""
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config['DETECT_REPEATED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        repeated = recorder.repeated(self.config['REPEAT_THRESHOLD'])
+        if repeated:
+            response['X-Repeated-Queries'] = str(sum(times for _, times in repeated))
+            logger.warning(
+                'Repeated queries in %s %s (possible N+1):\n%s',
+                request.method,
+                request.path,
+                '\n'.join(f'  {times}x {shape}' for shape, times in repeated),
+            )
+        return response
@@ -0,0 +1,37 @@
+"""
+JSON rendering with orjson when it is installed.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer``
+for the default settings (compact, unescaped unicode, U+2028/U+2029
+escaped). Dates, times and anything else orjson doesn't handle natively
+go through DRF's ``JSONEncoder``, so datetimes keep the ``Z`` suffix and
+millisecond precision. Pretty printing (``Accept: application/json;
+indent=4``), ASCII-only output and values orjson rejects (e.g. integers
+over 64 bits) fall back to the stdlib renderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # stdlib json via JSONRenderer
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson (stdlib json without it)"""
+
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same JavaScript-safe escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
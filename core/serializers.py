@@ -0,0 +1,130 @@
+"""
+Precompiled row converters for list serializers.
+
+``Serializer.to_representation`` goes through ``field.get_attribute`` and
+``field.to_representation`` for every field of every row, even when they
+only return the model attribute unchanged. ``compile_rows`` looks at the
+fields once per response and returns a plain function building the same
+dict:
+
+- model columns whose representation is the value itself (ints, strings,
+  booleans, string choices) and ``ReadOnlyField``s are read directly;
+- ``SerializerMethodField``s call the bound method;
+- ISO 8601 date, time and datetime columns are formatted directly, with
+  the current time zone looked up once per response instead of per value;
+- other fields (decimals, annotations) keep ``get_attribute`` and
+  ``to_representation``.
+
+Serializers opt in with ``Meta.list_serializer_class = CompiledListSerializer``.
+Only ``many=True`` output changes; serializers with relational fields keep
+the stock path. ``API_COMPILED_ROWS = False`` switches it off.
+"""
+
+from operator import attrgetter, methodcaller
+
+from django.conf import settings
+from django.db.models.manager import BaseManager
+from django.db.models.query_utils import DeferredAttribute
+from rest_framework import fields, relations, serializers
+from rest_framework.fields import SkipField
+from rest_framework.settings import ISO_8601, api_settings
+
+from .instrumentation import TimedSerializerMixin
+
+# Field classes whose to_representation() returns a column value of the matching type unchanged
+IDENTITY_FIELDS = (
+    fields.BooleanField,
+    fields.CharField,
+    fields.EmailField,
+    fields.IntegerField,
+    fields.SlugField,
+    fields.URLField,
+)
+
+
+def is_identity(field, model_attribute):
+    if type(field) is fields.ReadOnlyField:
+        return True
+    if not isinstance(model_attribute, DeferredAttribute):
+        return False
+    if type(field) is fields.ChoiceField:
+        return all(isinstance(key, str) for key in field.choices)
+    return type(field) in IDENTITY_FIELDS
+
+
+def iso_format(field, default):
+    output_format = getattr(field, 'format', default)
+    return output_format is not None and output_format.lower() == ISO_8601
+
+
+def datetime_representation(field):
+    """DateTimeField.to_representation for aware datetimes, converting to a time zone resolved once"""
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def represent(value):
+        if getattr(value, 'tzinfo', None) is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return represent
+
+
+def compile_representation(field, model_attribute):
+    """None when the column value is its own representation, else a function formatting it"""
+    if is_identity(field, model_attribute):
+        return None
+    if isinstance(model_attribute, DeferredAttribute):
+        if type(field) is fields.DateTimeField and iso_format(field, api_settings.DATETIME_FORMAT):
+            return datetime_representation(field)
+        if type(field) is fields.DateField and iso_format(field, api_settings.DATE_FORMAT):
+            return methodcaller('isoformat')
+        if type(field) is fields.TimeField and iso_format(field, api_settings.TIME_FORMAT):
+            return methodcaller('isoformat')
+    return field.to_representation
+
+
+def compile_rows(serializer):
+    """
+    Function returning ``serializer.to_representation(instance)`` for one
+    instance, or None if a field needs the stock path
+    """
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    plan = []
+    for field in serializer._readable_fields:
+        if isinstance(field, (relations.RelatedField, relations.ManyRelatedField, serializers.BaseSerializer)):
+            return None
+        if type(field) is fields.SerializerMethodField:
+            plan.append((field.field_name, getattr(serializer, field.method_name), None))
+            continue
+        model_attribute = getattr(model, field.source, None) if len(field.source_attrs) == 1 else None
+        if isinstance(model_attribute, (DeferredAttribute, property)):
+            getter = attrgetter(field.source)
+        else:
+            getter = field.get_attribute
+        plan.append((field.field_name, getter, compile_representation(field, model_attribute)))
+
+    def convert(instance):
+        row = {}
+        for name, getter, represent in plan:
+            try:
+                value = getter(instance)
+            except SkipField:
+                continue
+            row[name] = value if value is None or represent is None else represent(value)
+        return row
+
+    return convert
+
+
+class CompiledListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """ListSerializer that renders rows with ``compile_rows(child)``"""
+
+    def to_representation(self, data):
+        convert = compile_rows(self.child) if getattr(settings, 'API_COMPILED_ROWS', True) else None
+        if convert is None:
+            return super().to_representation(data)
+        iterable = data.all() if isinstance(data, BaseManager) else data
+        return [convert(item) for item in iterable]
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
+    "django.contrib.postgres",
     # Cloudinary must be before staticfiles
     "cloudinary_storage",
     "cloudinary",
@@ -49,9 +50,12 @@ INSTALLED_APPS = [
     # Local apps
     "leads",
     "blog",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestMetricsMiddleware",  # first, so timings cover the whole stack
+    "core.querybudget.RepeatedQueryMiddleware",  # only active with QUERY_BUDGET['DETECT_REPEATED']
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS middleware
@@ -98,6 +102,24 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Response cache for public blog endpoints (see blog/cache.py). Its generation
+    # counter is kept in the database, so a per-process cache is safe with several
+    # workers; FileBasedCache or DatabaseCache only make them share the bodies.
+    "blog": {
+        "BACKEND": config('BLOG_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": config('BLOG_CACHE_LOCATION', default='blog-responses'),
+        "TIMEOUT": config('BLOG_CACHE_TIMEOUT', default=300, cast=int),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -219,8 +241,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Skips the session lookup for requests without a session cookie (see core/authentication.py)
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
+        'core.authentication.SessionAuthentication',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -234,8 +257,115 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # orjson when installed (see core/renderers.py); the browsable API only while developing
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.FastJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if config('API_BROWSABLE', default=DEBUG, cast=bool) else []),
     ],
 }
+
+# List serializers render rows with precompiled converters (see core/serializers.py)
+API_COMPILED_ROWS = config('API_COMPILED_ROWS', default=True, cast=bool)
+
+# Blog view counter (write-behind buffer, see blog/counters.py)
+# BACKEND: 'local' (per worker) or 'cache' (shared via the Django cache)
+BLOG_VIEW_COUNTER = {
+    'BACKEND': config('BLOG_VIEW_COUNTER_BACKEND', default='local'),
+    'FLUSH_INTERVAL': config('BLOG_VIEW_FLUSH_INTERVAL', default=30, cast=int),  # seconds
+    'MAX_PENDING': 100,
+}
+
+# Resized AVIF/WebP copies of blog featured images, generated by the job
+# worker after upload (see blog/images.py)
+BLOG_IMAGE_VARIANTS = {
+    'ENABLED': config('BLOG_IMAGE_VARIANTS_ENABLED', default=True, cast=bool),
+    'WIDTHS': [320, 640, 960, 1280, 1920],
+    'FORMATS': ['avif', 'webp'],
+}
+
+# Pre-rendered, pre-compressed JSON of the published blog (see blog/snapshots.py),
+# refreshed by the job worker on publish. Web and worker must share the storage:
+# set STORAGE to a STORAGES alias (e.g. a bucket behind the CDN) when they run apart.
+BLOG_SNAPSHOTS = {
+    'ENABLED': config('BLOG_SNAPSHOTS_ENABLED', default=True, cast=bool),
+    'STORAGE': config('BLOG_SNAPSHOTS_STORAGE', default=None),
+    'LOCATION': BASE_DIR / 'snapshots',
+    'URL': config('BLOG_SNAPSHOTS_URL', default='/api/blog/snapshots/'),
+    'MEDIA_ORIGIN': config('BLOG_SNAPSHOTS_MEDIA_ORIGIN', default=''),
+}
+
+# Ignore HTML markup when counting words for BlogPost.reading_time
+BLOG_READING_TIME_STRIP_HTML = config('BLOG_READING_TIME_STRIP_HTML', default=False, cast=bool)
+
+# Booking time slots (see leads/availability.py)
+# Each slot can take CREWS bookings at once; capacity can be changed per slot in the admin
+BOOKING_AVAILABILITY = {
+    'DAY_START': config('BOOKING_DAY_START', default='08:00'),
+    'DAY_END': config('BOOKING_DAY_END', default='18:00'),
+    'SLOT_MINUTES': config('BOOKING_SLOT_MINUTES', default=30, cast=int),
+    'CREWS': config('BOOKING_CREWS', default=2, cast=int),
+    'HORIZON_DAYS': 60,
+    'CLOSED_WEEKDAYS': [],  # 0 = Monday
+}
+
+# Booking price tables (see leads/pricing.py for the defaults and layout)
+# VERIFY rejects bookings whose price_details total differs from the server-side quote;
+# off, mismatches are only logged (leads.serializers logger)
+BOOKING_PRICING = {
+    'VERIFY': config('BOOKING_VERIFY_PRICES', default=False, cast=bool),
+}
+
+# Background jobs (database queue, run with `manage.py run_jobs`, see jobs/queue.py)
+JOB_QUEUE = {
+    'THREADS': config('JOB_WORKER_THREADS', default=4, cast=int),
+    'BATCH_SIZE': 20,
+    'POLL_INTERVAL': config('JOB_POLL_INTERVAL', default=2, cast=int),  # seconds
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 30,  # seconds, doubled per failed attempt
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,  # seconds without a heartbeat before a crashed worker's jobs are retried
+    'HEARTBEAT_INTERVAL': 60,  # seconds between heartbeats of running jobs
+    'KEEP_DONE_DAYS': 7,
+}
+
+# Email (console backend prints messages instead of sending them)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Sustainable Shine <bookings@sustainableshine.com.au>')
+
+# Booking side effects (see leads/notifications.py)
+BOOKING_NOTIFICATIONS = {
+    'SMS_BACKEND': config('BOOKING_SMS_BACKEND', default='leads.notifications.ConsoleSMSBackend'),
+    'ADMIN_EMAILS': config('BOOKING_ADMIN_EMAILS', default='', cast=Csv()),
+    'REMINDER_HOURS_BEFORE': 24,
+}
+
+# Duplicate booking submissions (see leads/idempotency.py)
+# Expired records are removed by `manage.py sweep_booking_submissions`
+BOOKING_IDEMPOTENCY = {
+    'KEY_TTL': 24 * 3600,  # seconds an Idempotency-Key is remembered
+    'FINGERPRINT_TTL': config('BOOKING_FINGERPRINT_TTL', default=600, cast=int),
+}
+
+# Per-request timings: Server-Timing headers, JSON logs on the `core.requests`
+# logger and Prometheus histograms at /api/metrics/ (see core/instrumentation.py)
+REQUEST_METRICS = {
+    'ENABLED': config('REQUEST_METRICS_ENABLED', default=True, cast=bool),
+    # Server-Timing header: 'staff' (staff users, everyone when DEBUG), 'all' or 'off'
+    'SERVER_TIMING': config('REQUEST_METRICS_SERVER_TIMING', default='staff'),
+    'LOG': config('REQUEST_METRICS_LOG', default=True, cast=bool),
+    'TOKEN': config('METRICS_TOKEN', default=''),  # lets Prometheus scrape without a staff session
+}
+
+# Query budgets (see core/querybudget.py): viewsets declare `query_budgets`
+# per action; ENFORCE is 'off', 'warn' (log) or 'raise'. DETECT_REPEATED logs
+# requests that repeat the same query shape (N+1) REPEAT_THRESHOLD+ times.
+QUERY_BUDGET = {
+    'ENFORCE': config('QUERY_BUDGET_ENFORCE', default='warn' if DEBUG else 'off'),
+    'DETECT_REPEATED': config('QUERY_DETECT_REPEATED', default=DEBUG, cast=bool),
+    'REPEAT_THRESHOLD': 5,
+}
@@ -19,9 +19,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .views import MetricsView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path("api/", include("leads.urls")),
     path("api/", include("blog.urls")),
 ]
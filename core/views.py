@@ -0,0 +1,32 @@
+import hmac
+
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+
+from . import instrumentation
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """Staff sessions, or scrapers sending ``Authorization: Bearer <REQUEST_METRICS['TOKEN']>``"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = instrumentation.get_config()['TOKEN']
+        scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+        return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(supplied.strip(), token)
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of this worker process in Prometheus text format.
+    GET /api/metrics/
+    """
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            instrumentation.exposition(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
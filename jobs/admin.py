@@ -0,0 +1,37 @@
+from django.contrib import admin
+from . import queue
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Inspect queued, running and dead-lettered background jobs"""
+    
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    date_hierarchy = 'created_at'
+    readonly_fields = [
+        'name',
+        'payload',
+        'status',
+        'attempts',
+        'locked_at',
+        'locked_by',
+        'heartbeat_at',
+        'last_error',
+        'created_at',
+        'finished_at',
+    ]
+    list_per_page = 50
+    
+    actions = ['requeue_jobs']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def requeue_jobs(self, request, queryset):
+        """Bulk action to retry dead jobs"""
+        requeued = queue.requeue(queryset)
+        self.message_user(request, f'{requeued} dead job(s) queued again.')
+    requeue_jobs.short_description = "Requeue selected dead jobs"
@@ -0,0 +1,59 @@
+import json
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs on a thread pool until stopped (SIGINT/SIGTERM). "
+        "Use --once to drain the due jobs and exit, or --stats to print queue counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help='Worker threads (default: JOB_QUEUE THREADS)')
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed per poll (default: JOB_QUEUE BATCH_SIZE)')
+        parser.add_argument('--poll-interval', type=float, help='Seconds between polls of an empty queue')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due')
+        parser.add_argument(
+            '--stats-interval',
+            type=int,
+            default=60,
+            help='Seconds between throughput reports (0 disables them)',
+        )
+        parser.add_argument('--stats', action='store_true', help='Print queue counts as JSON and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue.queue_stats()))
+            return
+
+        worker = Worker(
+            threads=options['threads'],
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        interval = options['stats_interval']
+        last_report = time.monotonic()
+
+        def report():
+            nonlocal last_report
+            if interval and time.monotonic() - last_report >= interval:
+                last_report = time.monotonic()
+                self.report(worker)
+
+        self.stdout.write(
+            f'Worker {worker.worker_id} started with {worker.threads} thread(s).'
+        )
+        worker.run(once=options['once'], on_tick=report)
+        self.report(worker)
+
+    def report(self, worker):
+        self.stdout.write(json.dumps({'worker': worker.metrics.snapshot(), 'queue': queue.queue_stats()}))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+def copy_locked_at(apps, schema_editor):
+    # Jobs running during the upgrade count as alive since they were claimed
+    Job = apps.get_model("jobs", "Job")
+    Job.objects.filter(status="running").update(heartbeat_at=models.F("locked_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Refreshed by the worker while the job runs",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(copy_locked_at, migrations.RunPython.noop),
+    ]
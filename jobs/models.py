@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, written in the same transaction as the change that caused it"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead (retries exhausted)'),
+    ]
+    
+    name = models.CharField(max_length=100, help_text="Registered handler name (see jobs/queue.py)")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Refreshed by the worker while the job runs"
+    )
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's claim query: due queued jobs, oldest first
+            models.Index(
+                fields=['run_at', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_run_at_idx',
+            ),
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_idx'),
+        ]
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,203 @@
+"""
+Durable background jobs stored in the database.
+
+Producers call ``enqueue`` inside their own transaction (outbox pattern):
+the job row commits or rolls back together with the change that caused it,
+and the request returns without doing the work.
+
+The ``run_jobs`` worker (jobs/worker.py) claims due jobs in batches and
+runs their handlers on a thread pool:
+
+- handlers are registered by name with ``@register('app.job_name')``
+- a failed attempt is retried after an exponential backoff
+  (``BACKOFF_BASE x 2^(attempt - 1)``, capped at ``BACKOFF_MAX``, plus jitter)
+- once ``max_attempts`` is reached the job is dead-lettered (status ``dead``)
+  and kept with its last error for inspection / requeue from the admin
+- while a job runs, its worker refreshes ``heartbeat_at`` every
+  ``HEARTBEAT_INTERVAL``; a ``running`` job whose heartbeat is older than
+  ``LOCK_TIMEOUT`` belonged to a crashed worker and is claimed again. Only
+  the worker that holds the lock (``locked_by``) can complete or fail a job,
+  so a worker that lost its lock doesn't overwrite the new attempt
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'THREADS': 4,
+    'BATCH_SIZE': 20,
+    'POLL_INTERVAL': 2,  # seconds between polls of an empty queue
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 30,  # seconds
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,  # seconds without a heartbeat before a running job is reclaimed
+    'HEARTBEAT_INTERVAL': 60,
+    'KEEP_DONE_DAYS': 7,
+}
+
+_handlers = {}
+
+
+def get_config():
+    """Return job queue settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'JOB_QUEUE', {})}
+
+
+def register(name):
+    """Decorator registering ``handler(payload)`` for jobs called ``name``"""
+    def decorator(handler):
+        _handlers[name] = handler
+        return handler
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise LookupError(f"No handler registered for job '{name}'")
+
+
+def build(name, payload=None, run_at=None, max_attempts=None):
+    """Unsaved Job, for ``enqueue_many``"""
+    return Job(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or get_config()['MAX_ATTEMPTS'],
+    )
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None):
+    """Queue one job; call inside the producer's transaction"""
+    job = build(name, payload, run_at, max_attempts)
+    job.save()
+    return job
+
+
+def enqueue_many(jobs):
+    """Queue several ``build()`` jobs with one INSERT"""
+    return Job.objects.bulk_create(jobs)
+
+
+def backoff(attempts, config=None):
+    """Delay before retrying after the given number of failed attempts"""
+    config = config or get_config()
+    delay = min(config['BACKOFF_BASE'] * 2 ** max(attempts - 1, 0), config['BACKOFF_MAX'])
+    return timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def claim(worker_id, limit, config=None):
+    """
+    Lock up to ``limit`` due jobs for this worker and return them.
+    Uses SKIP LOCKED where supported so several workers can poll at once.
+    """
+    config = config or get_config()
+    now = timezone.now()
+    stale = now - timedelta(seconds=config['LOCK_TIMEOUT'])
+    due = Q(status='queued', run_at__lte=now) | Q(status='running', heartbeat_at__lt=stale)
+
+    with transaction.atomic():
+        locked = Job.objects.select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
+        )
+        ids = list(locked.filter(due).order_by('run_at', 'id').values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Re-checking ``due`` keeps two workers from both taking a job where rows can't be locked
+        Job.objects.filter(due, id__in=ids).update(
+            status='running', locked_at=now, heartbeat_at=now, locked_by=worker_id,
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(id__in=ids, locked_by=worker_id, locked_at=now).order_by('run_at', 'id'))
+
+
+def heartbeat(worker_id, ids):
+    """Mark this worker's running jobs as alive"""
+    if not ids:
+        return 0
+    return Job.objects.filter(id__in=ids, status='running', locked_by=worker_id).update(heartbeat_at=timezone.now())
+
+
+def owned(job):
+    """The job's row, as long as the worker that claimed it still holds the lock"""
+    return Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by)
+
+
+def lost(job):
+    logger.warning('Job %s #%s was reclaimed from %s, result discarded', job.name, job.pk, job.locked_by)
+    return 'lost'
+
+
+def complete(job):
+    """Mark the job done; returns 'done', or 'lost' if another worker reclaimed it"""
+    if not owned(job).update(status='done', finished_at=timezone.now(), locked_at=None, heartbeat_at=None):
+        return lost(job)
+    return 'done'
+
+
+def fail(job, error, config=None):
+    """Schedule a retry, or dead-letter the job once its attempts are used up"""
+    config = config or get_config()
+    if job.attempts >= job.max_attempts:
+        if not owned(job).update(
+            status='dead', last_error=error, finished_at=timezone.now(), locked_at=None, heartbeat_at=None
+        ):
+            return lost(job)
+        logger.error('Job %s #%s dead after %s attempts: %s', job.name, job.pk, job.attempts, error)
+        return 'dead'
+    if not owned(job).update(
+        status='queued', last_error=error, locked_at=None, heartbeat_at=None,
+        run_at=timezone.now() + backoff(job.attempts, config),
+    ):
+        return lost(job)
+    logger.warning('Job %s #%s failed (attempt %s/%s): %s', job.name, job.pk, job.attempts, job.max_attempts, error)
+    return 'retry'
+
+
+def run(job, config=None):
+    """Run one claimed job; returns 'done', 'retry', 'dead' or 'lost'"""
+    try:
+        get_handler(job.name)(job.payload)
+    except Exception:
+        return fail(job, traceback.format_exc(), config)
+    return complete(job)
+
+
+def requeue(queryset):
+    """Give dead jobs a fresh set of attempts"""
+    return queryset.filter(status='dead').update(
+        status='queued', attempts=0, run_at=timezone.now(), finished_at=None
+    )
+
+
+def purge(days=None):
+    """Delete finished jobs older than ``days`` (default KEEP_DONE_DAYS)"""
+    days = get_config()['KEEP_DONE_DAYS'] if days is None else days
+    deleted, _ = Job.objects.filter(
+        status='done', finished_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
+
+
+def queue_stats():
+    """Jobs per status and the age of the oldest due job, in one query"""
+    now = timezone.now()
+    row = Job.objects.aggregate(
+        **{status: Count('id', filter=Q(status=status)) for status, _ in Job.STATUS_CHOICES},
+        oldest_due=Min('run_at', filter=Q(status='queued', run_at__lte=now)),
+    )
+    oldest_due = row.pop('oldest_due')
+    row['oldest_due_seconds'] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0
+    return row
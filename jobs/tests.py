@@ -0,0 +1,130 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+from .worker import Worker
+
+CALLS = []
+
+
+@queue.register('tests.record')
+def record(payload):
+    CALLS.append(payload)
+
+
+@queue.register('tests.fail')
+def fail(payload):
+    raise RuntimeError('printer on fire')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_commits_with_the_producer(self):
+        job = queue.enqueue('tests.record', {'n': 1})
+        self.assertEqual((job.status, job.attempts, job.max_attempts), ('queued', 0, 5))
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            queue.enqueue('tests.record', {'n': 2})
+            raise RuntimeError('rolled back')
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'n': 1}])
+
+        queue.enqueue_many([queue.build('tests.record', {'n': n}) for n in range(3)])
+        self.assertEqual(Job.objects.count(), 4)
+
+    def test_claim_takes_due_jobs_once(self):
+        later = queue.enqueue('tests.record', run_at=timezone.now() + timedelta(hours=1))
+        due = [queue.enqueue('tests.record', {'n': n}) for n in range(3)]
+
+        claimed = queue.claim('a', limit=2)
+        self.assertEqual([job.pk for job in claimed], [due[0].pk, due[1].pk])
+        self.assertTrue(all(job.status == 'running' and job.locked_by == 'a' and job.attempts == 1 for job in claimed))
+        self.assertEqual([job.pk for job in queue.claim('b', limit=10)], [due[2].pk])
+        self.assertEqual(queue.claim('c', limit=10), [])
+        self.assertEqual(Job.objects.get(pk=later.pk).status, 'queued')
+
+    @skipUnless(connection.features.has_select_for_update_skip_locked, 'needs SELECT ... FOR UPDATE SKIP LOCKED')
+    def test_claim_skips_locked_rows(self):
+        queue.enqueue('tests.record')
+        with CaptureQueriesContext(connection) as queries:
+            queue.claim('a', limit=1)
+        self.assertTrue(any('SKIP LOCKED' in query['sql'] for query in queries))
+
+    def test_only_jobs_without_a_recent_heartbeat_are_reclaimed(self):
+        job = queue.enqueue('tests.record')
+        queue.claim('a', limit=1)
+        long_ago = timezone.now() - timedelta(hours=1)
+        # A long job of a live worker: claimed long ago, heartbeat current
+        Job.objects.filter(pk=job.pk).update(locked_at=long_ago)
+        self.assertEqual(queue.heartbeat('a', [job.pk]), 1)
+        self.assertEqual(queue.claim('b', limit=1), [])
+
+        # The worker died: the heartbeat stops and another worker takes over
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+        self.assertEqual(queue.heartbeat('b', [job.pk]), 0)  # not b's job yet
+        [reclaimed] = queue.claim('b', limit=1)
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ('b', 2))
+
+        # The first worker's late result is discarded
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(queue.run(job), 'lost')
+        self.assertEqual(queue.run(reclaimed), 'done')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+
+    def test_failures_back_off_then_dead_letter(self):
+        job = queue.enqueue('tests.fail', max_attempts=2)
+        [claimed] = queue.claim('a', limit=1)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(queue.run(claimed), 'retry')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('printer on fire', job.last_error)
+        delay = (job.run_at - timezone.now()).total_seconds()
+        self.assertTrue(29 <= delay <= 30 * 1.25, delay)
+        self.assertEqual(queue.claim('a', limit=1), [])  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        [claimed] = queue.claim('a', limit=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(queue.run(claimed), 'dead')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('dead', 2))
+        self.assertIsNotNone(job.finished_at)
+
+        self.assertEqual(queue.requeue(Job.objects.all()), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        config = {**queue.get_config(), 'BACKOFF_BASE': 30, 'BACKOFF_MAX': 3600}
+        with mock.patch('jobs.queue.random.uniform', return_value=1):
+            delays = [queue.backoff(attempts, config).total_seconds() for attempts in [1, 2, 3, 8, 20]]
+        self.assertEqual(delays, [30, 60, 120, 3600, 3600])
+
+    def test_run_calls_the_handler(self):
+        queue.enqueue('tests.record', {'n': 7})
+        [claimed] = queue.claim('a', limit=1)
+        self.assertEqual(queue.run(claimed), 'done')
+        self.assertEqual(CALLS, [{'n': 7}])
+        self.assertEqual(Job.objects.get().status, 'done')
+
+
+class WorkerTests(TestCase):
+    def test_errors_outside_the_handler_are_logged(self):
+        worker = Worker(threads=1)
+        job = queue.enqueue('tests.record')
+        future = Future()
+        future.set_exception(RuntimeError('database went away'))
+        running = {future: job}
+        with self.assertLogs('jobs.worker', 'ERROR') as logs:
+            worker.collect(running, {future})
+        self.assertEqual(running, {})
+        self.assertIn('database went away', '\n'.join(logs.output))
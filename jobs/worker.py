@@ -0,0 +1,146 @@
+"""
+Thread-pool worker for the database job queue (run by ``manage.py run_jobs``).
+
+The main thread polls: it claims a batch of due jobs (never more than there
+are idle threads), hands them to the pool and sleeps ``POLL_INTERVAL`` when
+nothing is due. Every thread uses its own database connection, closed after
+each job so no connection outlives a broken database.
+
+While jobs run, the main thread refreshes their ``heartbeat_at`` every
+``HEARTBEAT_INTERVAL`` so other workers don't reclaim them, however long
+they take. Errors raised outside a handler (e.g. the database going away
+while a job is marked done) are logged; the job's heartbeat then stops and
+it is retried after ``LOCK_TIMEOUT``.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import close_old_connections, connection
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600  # seconds
+
+
+class WorkerMetrics:
+    """Throughput counters of one worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.outcomes = defaultdict(int)
+        self.by_name = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+
+    def record(self, name, outcome, seconds):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.by_name[name]['count'] += 1
+            self.by_name[name]['seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            processed = sum(self.outcomes.values())
+            return {
+                'uptime_seconds': round(uptime, 1),
+                'processed': processed,
+                'per_second': round(processed / uptime, 2) if uptime else 0.0,
+                'outcomes': dict(self.outcomes),
+                'jobs': {
+                    name: {
+                        'count': stats['count'],
+                        'avg_ms': round(stats['seconds'] / stats['count'] * 1000, 1),
+                    }
+                    for name, stats in self.by_name.items()
+                },
+            }
+
+
+class Worker:
+    def __init__(self, threads=None, batch_size=None, poll_interval=None, config=None):
+        self.config = config or queue.get_config()
+        self.threads = threads or self.config['THREADS']
+        self.batch_size = batch_size or self.config['BATCH_SIZE']
+        self.poll_interval = self.config['POLL_INTERVAL'] if poll_interval is None else poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.metrics = WorkerMetrics()
+        self.stopping = threading.Event()
+        self.last_purge = 0.0
+        self.last_heartbeat = 0.0
+
+    def execute(self, job):
+        """Run one job on a pool thread"""
+        started = time.monotonic()
+        try:
+            outcome = queue.run(job, self.config)
+        finally:
+            connection.close()
+        self.metrics.record(job.name, outcome, time.monotonic() - started)
+        return outcome
+
+    def run(self, once=False, on_tick=None):
+        """
+        Process jobs until ``stop()``; with ``once``, return as soon as no job
+        is due. ``on_tick`` is called once per poll (e.g. for reporting).
+        """
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as pool:
+            running = {}
+            while not self.stopping.is_set():
+                close_old_connections()
+                if on_tick:
+                    on_tick()
+                free = self.threads - len(running)
+                jobs = queue.claim(self.worker_id, min(free, self.batch_size), self.config) if free else []
+                running.update((pool.submit(self.execute, job), job) for job in jobs)
+
+                if running:
+                    done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    self.collect(running, done)
+                    self.heartbeat_if_due(running)
+                    continue
+                if once:
+                    break
+                self.purge_if_due()
+                self.stopping.wait(self.poll_interval)
+            while running:
+                done, _ = wait(running, timeout=self.poll_interval)
+                self.collect(running, done)
+                self.heartbeat_if_due(running)
+        connection.close()
+
+    def collect(self, running, done):
+        """Forget finished futures, logging errors raised outside the job handler"""
+        for future in done:
+            job = running.pop(future)
+            try:
+                future.result()
+            except Exception:
+                logger.exception('Worker thread failed on job %s #%s', job.name, job.pk)
+
+    def heartbeat_if_due(self, running):
+        if time.monotonic() - self.last_heartbeat < self.config['HEARTBEAT_INTERVAL']:
+            return
+        self.last_heartbeat = time.monotonic()
+        try:
+            queue.heartbeat(self.worker_id, [job.pk for job in running.values()])
+        except Exception:
+            logger.exception('Job heartbeat failed')
+
+    def purge_if_due(self):
+        if time.monotonic() - self.last_purge < PURGE_INTERVAL:
+            return
+        self.last_purge = time.monotonic()
+        deleted = queue.purge()
+        if deleted:
+            logger.info('Purged %s finished job(s)', deleted)
+
+    def stop(self):
+        self.stopping.set()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Booking
+from django.db import transaction
+from . import availability, rollups
+from .models import Booking, BookingDailyStats, BookingSlot
 
 
 @admin.register(Booking)
@@ -15,8 +17,9 @@ class BookingAdmin(admin.ModelAdmin):
         'frequency',
         'selected_date',
         'selected_time',
+        'slot_count',
         'status',
-        'total_price',
+        'price_total',
         'created_at',
     ]
     
@@ -44,7 +47,11 @@ class BookingAdmin(admin.ModelAdmin):
         'updated_at',
         'full_name',
         'full_address',
-        'total_price',
+        'price_total',
+        'price_subtotal',
+        'price_discount',
+        'price_add_ons',
+        'slot_count',
     ]
     
     fieldsets = (
@@ -54,6 +61,7 @@ class BookingAdmin(admin.ModelAdmin):
                 'frequency',
                 'selected_date',
                 'selected_time',
+                'slot_count',
                 'status',
             )
         }),
@@ -108,7 +116,10 @@ class BookingAdmin(admin.ModelAdmin):
         ('Price Details', {
             'fields': (
                 'price_details',
-                'total_price',
+                'price_total',
+                'price_subtotal',
+                'price_discount',
+                'price_add_ons',
             ),
             'classes': ('collapse',),
         }),
@@ -126,20 +137,57 @@ class BookingAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled']
     
+    def update_status(self, queryset, new_status):
+        """Bulk status change that keeps slot reservations and the daily rollup in sync"""
+        with transaction.atomic():
+            availability.update_status(queryset, new_status)
+            return rollups.update_status(queryset, new_status)
+    
     def mark_as_confirmed(self, request, queryset):
         """Bulk action to mark bookings as confirmed"""
-        updated = queryset.update(status='confirmed')
+        updated = self.update_status(queryset, 'confirmed')
         self.message_user(request, f'{updated} booking(s) marked as confirmed.')
     mark_as_confirmed.short_description = "Mark selected as Confirmed"
     
     def mark_as_completed(self, request, queryset):
         """Bulk action to mark bookings as completed"""
-        updated = queryset.update(status='completed')
+        updated = self.update_status(queryset, 'completed')
         self.message_user(request, f'{updated} booking(s) marked as completed.')
     mark_as_completed.short_description = "Mark selected as Completed"
     
     def mark_as_cancelled(self, request, queryset):
         """Bulk action to mark bookings as cancelled"""
-        updated = queryset.update(status='cancelled')
+        updated = self.update_status(queryset, 'cancelled')
         self.message_user(request, f'{updated} booking(s) marked as cancelled.')
     mark_as_cancelled.short_description = "Mark selected as Cancelled"
+
+
+@admin.register(BookingSlot)
+class BookingSlotAdmin(admin.ModelAdmin):
+    """Slot calendar; capacity can be changed per slot, reservations are maintained by bookings"""
+    
+    list_display = ['date', 'start_time', 'capacity', 'reserved']
+    list_editable = ['capacity']
+    list_filter = ['date']
+    date_hierarchy = 'date'
+    readonly_fields = ['reserved']
+    list_per_page = 50
+
+
+@admin.register(BookingDailyStats)
+class BookingDailyStatsAdmin(admin.ModelAdmin):
+    """Read-only view of the daily booking rollup"""
+    
+    list_display = ['date', 'service_type', 'status', 'count', 'revenue']
+    list_filter = ['service_type', 'status', 'date']
+    date_hierarchy = 'date'
+    list_per_page = 50
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,260 @@
+"""
+Time-slot availability for bookings.
+
+Each day is split into ``SLOT_MINUTES`` slots between ``DAY_START`` and
+``DAY_END``. A ``BookingSlot`` row per (date, slot) holds the crew capacity
+and how many bookings currently run in it; rows are created on first use
+with ``CREWS`` as capacity and can be edited in the admin afterwards.
+
+A booking holds ``slot_count`` consecutive slots from its ``selected_time``,
+derived from the service type and property size (``duration_minutes``).
+
+- ``free_slots``: start times with room for a job, for the next N days, from
+  one query over the slot rows plus in-process computation
+- ``reserve``: locks the covered slot rows (``SELECT ... FOR UPDATE``, in
+  time order) and only then checks and increments them, so concurrent
+  submissions cannot overbook. A start time between two grid slots holds
+  every slot the job overlaps.
+- reschedules, cancellations and deletes move the reservation through the
+  signal handlers in leads/signals.py (``move``) and admin bulk actions
+  (``update_status``); staff changes are applied without a capacity check
+- ``backfill`` (``manage.py backfill_booking_slots``): reserves slots for
+  bookings made before slots were tracked
+"""
+
+import math
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_time as parse_time_string
+
+from .models import Booking, BookingSlot
+
+DEFAULTS = {
+    'DAY_START': '08:00',
+    'DAY_END': '18:00',
+    'SLOT_MINUTES': 30,
+    'CREWS': 2,
+    'HORIZON_DAYS': 60,
+    'CLOSED_WEEKDAYS': [],  # 0 = Monday
+}
+
+# Job length by service type, plus extra time per room/storey above one
+SERVICE_MINUTES = {
+    'general': 120,
+    'deep': 240,
+    'endOfLease': 300,
+    'moveIn': 240,
+}
+EXTRA_MINUTES = {
+    'bedrooms': 30,
+    'bathrooms': 30,
+    'storey': 30,
+}
+
+RESERVATION_FIELDS = {'selected_date', 'selected_time', 'slot_count', 'status'}
+
+
+class SlotUnavailable(Exception):
+    """The requested time can't take another booking"""
+
+
+def get_config():
+    """Return availability settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'BOOKING_AVAILABILITY', {})}
+
+
+def parse_time(value):
+    return value if isinstance(value, time) else parse_time_string(value)
+
+
+def day_grid(config=None):
+    """Start times of the slots of one day"""
+    config = config or get_config()
+    step = timedelta(minutes=config['SLOT_MINUTES'])
+    current = datetime.combine(datetime.min, parse_time(config['DAY_START']))
+    end = datetime.combine(datetime.min, parse_time(config['DAY_END']))
+    grid = []
+    while current + step <= end:
+        grid.append(current.time())
+        current += step
+    return grid
+
+
+def duration_minutes(service_type, bedrooms=1, bathrooms=1, storey=1):
+    """Estimated job length for a service and property size"""
+    sizes = {'bedrooms': bedrooms, 'bathrooms': bathrooms, 'storey': storey}
+    minutes = SERVICE_MINUTES.get(service_type, SERVICE_MINUTES['general'])
+    for field, extra in EXTRA_MINUTES.items():
+        minutes += max((sizes[field] or 1) - 1, 0) * extra
+    return minutes
+
+
+def slots_needed(service_type, bedrooms=1, bathrooms=1, storey=1, config=None):
+    """Consecutive slots a job takes (a job longer than the day takes the whole day)"""
+    config = config or get_config()
+    slots = math.ceil(duration_minutes(service_type, bedrooms, bathrooms, storey) / config['SLOT_MINUTES'])
+    return max(min(slots, len(day_grid(config))), 1)
+
+
+def span(start_time, slot_count, config=None):
+    """Slot start times covered by a job starting at ``start_time``"""
+    config = config or get_config()
+    grid = day_grid(config)
+    step = timedelta(minutes=config['SLOT_MINUTES'])
+    start = datetime.combine(datetime.min, parse_time(start_time))
+    end = start + step * slot_count
+    return [
+        slot for slot in grid
+        if start < datetime.combine(datetime.min, slot) + step
+        and datetime.combine(datetime.min, slot) < end
+    ]
+
+
+def check_request(selected_date, selected_time, slot_count, config):
+    """Raise SlotUnavailable for a start time customers can't pick"""
+    if selected_date < timezone.localdate():
+        raise SlotUnavailable('The selected date is in the past.')
+    if selected_date.weekday() in config['CLOSED_WEEKDAYS']:
+        raise SlotUnavailable('We are closed on the selected day.')
+    grid = day_grid(config)
+    # Times between grid slots are accepted; the job then holds every slot it overlaps
+    start = datetime.combine(datetime.min, selected_time)
+    opens = datetime.combine(datetime.min, grid[0])
+    closes = datetime.combine(datetime.min, grid[-1]) + timedelta(minutes=config['SLOT_MINUTES'])
+    if start < opens or start + timedelta(minutes=config['SLOT_MINUTES']) * slot_count > closes:
+        raise SlotUnavailable('The selected time is outside our booking hours.')
+
+
+def reserve(selected_date, selected_time, slot_count, force=False):
+    """
+    Take one unit of capacity in every slot of the job.
+    Raises SlotUnavailable if a slot is full, unless ``force`` (staff changes).
+    """
+    config = get_config()
+    if not force:
+        check_request(selected_date, selected_time, slot_count, config)
+    times = span(selected_time, slot_count, config)
+    if not times:
+        return
+
+    with transaction.atomic():
+        BookingSlot.objects.bulk_create(
+            [BookingSlot(date=selected_date, start_time=slot, capacity=config['CREWS']) for slot in times],
+            ignore_conflicts=True,
+        )
+        # Locking in time order keeps overlapping reservations from deadlocking
+        slots = list(
+            BookingSlot.objects.select_for_update()
+            .filter(date=selected_date, start_time__in=times)
+            .order_by('start_time')
+        )
+        if not force and any(slot.reserved >= slot.capacity for slot in slots):
+            raise SlotUnavailable('The selected time is fully booked, please choose another time.')
+        BookingSlot.objects.filter(pk__in=[slot.pk for slot in slots]).update(reserved=F('reserved') + 1)
+
+
+def release(selected_date, selected_time, slot_count):
+    """Give back the capacity taken by ``reserve``"""
+    times = span(selected_time, slot_count)
+    BookingSlot.objects.filter(
+        date=selected_date, start_time__in=times, reserved__gt=0
+    ).update(reserved=F('reserved') - 1)
+
+
+def reservation_state(booking):
+    """(date, time, slot_count) a booking currently holds, or None"""
+    if not booking.slot_count or not booking.selected_time or booking.status == 'cancelled':
+        return None
+    return booking.selected_date, booking.selected_time, booking.slot_count
+
+
+def stored_booking(booking):
+    """The row as it is in the database, with only the reservation fields, or None"""
+    return Booking.objects.filter(pk=booking.pk).only(*RESERVATION_FIELDS).first()
+
+
+def move(old_state, new_state):
+    """Move a booking's reservation after a staff change"""
+    if old_state == new_state:
+        return
+    if old_state is not None:
+        release(*old_state)
+    if new_state is not None:
+        reserve(*new_state, force=True)
+
+
+def update_status(queryset, new_status):
+    """Release or re-take reservations for a bulk status change (before the update runs)"""
+    bookings = queryset.exclude(status=new_status).filter(slot_count__isnull=False).only(*RESERVATION_FIELDS)
+    for booking in bookings:
+        old_state = reservation_state(booking)
+        booking.status = new_status
+        move(old_state, reservation_state(booking))
+
+
+def backfill(from_date=None, chunk_size=500):
+    """
+    Reserve slots for bookings from ``from_date`` (default today) made before
+    slots were tracked, without a capacity check. Returns the number of
+    bookings updated.
+    """
+    config = get_config()
+    bookings = (
+        Booking.objects.filter(
+            selected_date__gte=from_date or timezone.localdate(),
+            selected_time__isnull=False,
+            slot_count__isnull=True,
+        )
+        .exclude(status='cancelled')
+        .only('pk', 'service_type', 'bedrooms', 'bathrooms', 'storey', 'selected_date', 'selected_time')
+        .order_by('pk')
+    )
+    updated = 0
+    for booking in bookings.iterator(chunk_size=chunk_size):
+        slot_count = slots_needed(booking.service_type, booking.bedrooms, booking.bathrooms, booking.storey, config)
+        with transaction.atomic():
+            # The filter on slot_count keeps a concurrent run from reserving twice
+            if Booking.objects.filter(pk=booking.pk, slot_count__isnull=True).update(slot_count=slot_count):
+                reserve(booking.selected_date, booking.selected_time, slot_count, force=True)
+                updated += 1
+    return updated
+
+
+def overbooked(from_date=None):
+    """Slots from ``from_date`` (default today) holding more bookings than their capacity"""
+    return BookingSlot.objects.filter(date__gte=from_date or timezone.localdate(), reserved__gt=F('capacity'))
+
+
+def free_slots(start_date, days, slot_count):
+    """
+    Start times with room for a ``slot_count`` job on each open day from
+    ``start_date``: ``[{'date', 'slots': [{'time', 'remaining'}]}]``
+    """
+    config = get_config()
+    grid = day_grid(config)
+    end_date = start_date + timedelta(days=days - 1)
+    remaining = {
+        (slot.date, slot.start_time): slot.remaining
+        for slot in BookingSlot.objects.filter(date__range=(start_date, end_date))
+    }
+
+    now = timezone.localtime()
+    calendar = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        if day < now.date() or day.weekday() in config['CLOSED_WEEKDAYS']:
+            continue
+        free = [remaining.get((day, slot), config['CREWS']) for slot in grid]
+        slots = []
+        for index in range(len(grid) - slot_count + 1):
+            if day == now.date() and grid[index] <= now.time():
+                continue
+            room = min(free[index:index + slot_count])
+            if room > 0:
+                slots.append({'time': grid[index].strftime('%H:%M'), 'remaining': room})
+        calendar.append({'date': day, 'slots': slots})
+    return calendar
@@ -0,0 +1,149 @@
+"""
+Duplicate suppression for booking submissions.
+
+Every POST to /api/bookings/ is identified by up to two keys:
+
+- ``key:<sha256>`` of the client's ``Idempotency-Key`` header (kept ``KEY_TTL``)
+- ``fp:<sha256>`` content fingerprint of the whole submitted payload
+  (kept ``FINGERPRINT_TTL``), which catches double-clicks and retries from
+  clients that don't send a key
+
+``begin`` claims the keys in ``BookingSubmission`` before the booking is
+validated. A request whose key is already stored gets the stored response
+back (``Idempotent-Replayed: true``) without touching the booking table; one
+whose twin is still being processed gets 409, and one reusing an
+Idempotency-Key for a different payload gets 422. ``finish`` stores a
+successful response, or frees the keys after an error (including an
+exception, see ``BookingViewSet.create``) so the client can fix and resend.
+
+Expired rows are removed by ``manage.py sweep_booking_submissions``.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import BookingSubmission, normalize_email
+
+DEFAULTS = {
+    'HEADER': 'Idempotency-Key',
+    'KEY_TTL': 24 * 3600,  # seconds
+    'FINGERPRINT_TTL': 600,
+    'IN_FLIGHT_TIMEOUT': 60,  # an unfinished claim older than this is taken over
+}
+
+def get_config():
+    """Return idempotency settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'BOOKING_IDEMPOTENCY', {})}
+
+
+def digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def fingerprint(data):
+    """Content hash of the whole payload; key order and email case don't matter"""
+    values = dict(data.lists()) if hasattr(data, 'lists') else dict(data)
+    if isinstance(values.get('email'), str):
+        values['email'] = normalize_email(values['email'])
+    return digest(json.dumps(values, sort_keys=True, separators=(',', ':'), default=str))
+
+
+def request_keys(request, config):
+    """(dedup keys with their TTL in seconds, fingerprint) for a booking POST"""
+    content = fingerprint(request.data)
+    keys = {f'fp:{content}': config['FINGERPRINT_TTL']}
+    header = request.headers.get(config['HEADER'], '').strip()
+    if header:
+        keys[f'key:{digest(header)}'] = config['KEY_TTL']
+    return keys, content
+
+
+def replay(submission, content):
+    """Response for a request whose key is already stored (None: claimed by a twin that failed)"""
+    if submission is not None and submission.key.startswith('key:') and submission.fingerprint != content:
+        return Response(
+            {
+                'success': False,
+                'message': 'Idempotency-Key was already used for a different booking',
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if submission is None or submission.response_status is None:
+        return Response(
+            {
+                'success': False,
+                'message': 'This booking is already being processed',
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(
+        submission.response_body,
+        status=submission.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def begin(request):
+    """
+    Claim the request's dedup keys.
+    Returns ``(response, None)`` for a duplicate, else ``(None, claimed keys)``.
+    """
+    config = get_config()
+    keys, content = request_keys(request, config)
+    now = timezone.now()
+    stale = now - timedelta(seconds=config['IN_FLIGHT_TIMEOUT'])
+
+    # Expired records and claims abandoned by a crashed request no longer count
+    dead = Q(expires_at__lte=now) | Q(response_status__isnull=True, created_at__lt=stale)
+
+    # An Idempotency-Key match wins over a fingerprint match
+    existing = sorted(
+        BookingSubmission.objects.filter(key__in=keys).exclude(dead),
+        key=lambda submission: not submission.key.startswith('key:'),
+    )
+    if existing:
+        return replay(existing[0], content), None
+
+    try:
+        with transaction.atomic():
+            # Dead records still hold the unique key
+            BookingSubmission.objects.filter(dead, key__in=keys).delete()
+            BookingSubmission.objects.bulk_create([
+                BookingSubmission(
+                    key=key, fingerprint=content, expires_at=now + timedelta(seconds=ttl)
+                )
+                for key, ttl in keys.items()
+            ])
+    except IntegrityError:
+        # A twin request claimed the keys in the meantime
+        submission = BookingSubmission.objects.filter(key__in=keys).order_by('key').last()
+        return replay(submission, content), None
+    return None, list(keys)
+
+
+def finish(keys, response):
+    """Store a successful response for replays, or release the keys after an error (``response`` None)"""
+    claimed = BookingSubmission.objects.filter(key__in=keys, response_status__isnull=True)
+    if response is not None and status.is_success(response.status_code):
+        data = response.data.get('data') or {}
+        claimed.update(
+            booking_id=data.get('id'),
+            response_status=response.status_code,
+            response_body=response.data,
+        )
+    else:
+        claimed.delete()
+
+
+def sweep():
+    """Delete expired dedup rows, returns the number removed"""
+    deleted, _ = BookingSubmission.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
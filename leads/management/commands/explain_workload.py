@@ -0,0 +1,125 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
+
+from blog.counters import get_buffer
+from blog.models import BlogPost
+from leads.models import Booking
+
+# Models whose declared Meta.indexes are compared
+INDEXED_MODELS = [Booking, BlogPost]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the GET requests of a captured workload (JSON lines with a 'path' "
+        "or 'url' key, e.g. '/api/bookings/?status=pending&ordering=selected_date') "
+        "and print EXPLAIN plans of their queries with and without the declared indexes. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('workload', help='Path to a JSON lines workload file')
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only; executes the queries)',
+        )
+
+    def handle(self, *args, **options):
+        requests = self.load_workload(options['workload'])
+        if not requests:
+            raise CommandError('No replayable GET requests found in the workload.')
+
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+        prefix = connection.ops.explain_query_prefix(**explain_options)
+
+        with transaction.atomic():
+            queries = self.capture_queries(requests)
+            with_indexes = self.explain(prefix, queries, 'with indexes')
+            dropped = self.drop_indexes()
+            without_indexes = self.explain(prefix, queries, 'without indexes')
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Compared without/with {dropped} index(es) on {connection.vendor}.\n')
+        for (path, sql), before, after in zip(queries, without_indexes, with_indexes):
+            self.stdout.write(self.style.MIGRATE_HEADING(path))
+            self.stdout.write(sql)
+            self.stdout.write(self.style.WARNING('  without indexes:'))
+            self.stdout.write(self.indent(before))
+            self.stdout.write(self.style.SUCCESS('  with indexes:'))
+            self.stdout.write(self.indent(after))
+            self.stdout.write('')
+
+    def load_workload(self, filename):
+        requests = []
+        with open(filename) as workload:
+            for line_number, line in enumerate(workload, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    self.stderr.write(f'Line {line_number}: not valid JSON, skipped')
+                    continue
+                path = entry.get('path') or entry.get('url') if isinstance(entry, dict) else None
+                method = (entry.get('method') or 'GET').upper() if isinstance(entry, dict) else None
+                if not path or method != 'GET':
+                    continue
+                requests.append(path)
+        return requests
+
+    def capture_queries(self, paths):
+        """Run each request once and collect its distinct SELECT statements"""
+        allowed_hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host]
+        factory = RequestFactory(SERVER_NAME=(allowed_hosts or ['localhost'])[0].lstrip('.'))
+        queries, seen = [], set()
+
+        for path in paths:
+            try:
+                match = resolve(path.split('?', 1)[0])
+            except Resolver404:
+                self.stderr.write(f'{path}: no matching URL, skipped')
+                continue
+
+            request = factory.get(path)
+            with CaptureQueriesContext(connection) as context:
+                match.func(request, *match.args, **match.kwargs).render()
+
+            for query in context.captured_queries:
+                sql = query['sql']
+                if sql.lstrip().upper().startswith('SELECT') and sql not in seen:
+                    seen.add(sql)
+                    queries.append((path, sql))
+
+        # Replayed blog retrieves are not real views
+        get_buffer().drain()
+        return queries
+
+    def explain(self, prefix, queries, label):
+        plans = []
+        with connection.cursor() as cursor:
+            for _, sql in queries:
+                # The label keeps SQLite from reusing a statement prepared before the DROP
+                cursor.execute(f'{prefix} {sql} /* {label} */')
+                plans.append('\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall()))
+        return plans
+
+    def drop_indexes(self):
+        """Drop the declared indexes (undone by the surrounding rollback)"""
+        dropped = 0
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+                    dropped += 1
+        return dropped
+
+    def indent(self, text):
+        return '\n'.join(f'    {line}' for line in text.splitlines())
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from leads import transfer
+from leads.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Write all bookings as CSV or NDJSON, streamed through a server-side cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(transfer.FORMATS), default='csv', dest='fmt')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--status', choices=[value for value, _ in Booking.STATUS_CHOICES])
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help=f'Rows fetched per round trip (default: {transfer.CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Booking.objects.order_by('id')
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for line in transfer.stream(queryset, options['fmt'], options['chunk_size']):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
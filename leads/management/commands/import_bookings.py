@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leads import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import bookings from a CSV or NDJSON file (e.g. written by export_bookings). "
+        "Rows are validated with BookingSerializer and inserted in batches; invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file')
+        parser.add_argument('--format', choices=list(transfer.FORMATS), dest='fmt', help='Default: from the file extension')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=transfer.BATCH_SIZE,
+            help=f'Rows per INSERT (default: {transfer.BATCH_SIZE})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, insert nothing')
+
+    def handle(self, *args, **options):
+        fmt = options['fmt'] or transfer.detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as source:
+                report = transfer.import_file(source, fmt, options['batch_size'], options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        summary = f"{verb} {report['created']} of {report['rows']} row(s), {report['failed']} failed."
+        self.stdout.write(self.style.SUCCESS(summary) if not report['failed'] else self.style.WARNING(summary))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leads.idempotency import sweep
+
+
+class Command(BaseCommand):
+    help = "Delete expired booking dedup records (Idempotency-Key / fingerprint store). Run periodically, e.g. hourly."
+
+    def handle(self, *args, **options):
+        deleted = sweep()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired submission record(s).'))
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0003_booking_selected_time"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="booking_created_id_idx"
+            ),
+        ),
+    ]
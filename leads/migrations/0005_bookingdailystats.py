@@ -0,0 +1,111 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:41
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_rollup(apps, schema_editor):
+    # Same computation as `manage.py rebuild_booking_stats`, on historical models
+    Booking = apps.get_model("leads", "Booking")
+    BookingDailyStats = apps.get_model("leads", "BookingDailyStats")
+    totals = defaultdict(lambda: [0, Decimal("0.00")])
+    bookings = Booking.objects.only(
+        "created_at", "service_type", "status", "price_details"
+    ).order_by("pk")
+    for booking in bookings.iterator(chunk_size=2000):
+        key = (
+            timezone.localdate(booking.created_at),
+            booking.service_type,
+            booking.status,
+        )
+        details = (
+            booking.price_details if isinstance(booking.price_details, dict) else {}
+        )
+        try:
+            revenue = Decimal(str(details.get("total") or 0)).quantize(Decimal("0.00"))
+        except (InvalidOperation, TypeError, ValueError):
+            revenue = Decimal("0.00")
+        totals[key][0] += 1
+        totals[key][1] += revenue
+    BookingDailyStats.objects.bulk_create(
+        [
+            BookingDailyStats(
+                date=day,
+                service_type=service_type,
+                status=status,
+                count=count,
+                revenue=revenue,
+            )
+            for (day, service_type, status), (count, revenue) in totals.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0004_booking_booking_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(help_text="Booking creation date")),
+                (
+                    "service_type",
+                    models.CharField(
+                        choices=[
+                            ("general", "General Cleaning"),
+                            ("deep", "Deep Cleaning"),
+                            ("endOfLease", "End of Lease"),
+                            ("moveIn", "Move-in Cleaning"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("confirmed", "Confirmed"),
+                            ("completed", "Completed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+            options={
+                "verbose_name": "Booking Daily Stats",
+                "verbose_name_plural": "Booking Daily Stats",
+                "ordering": ["-date", "service_type", "status"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "service_type", "status"),
+                        name="unique_booking_daily_stats",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
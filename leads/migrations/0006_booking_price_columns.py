@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:42
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+PRICE_COLUMNS = {
+    "price_total": ["total"],
+    "price_subtotal": ["subtotal"],
+    "price_discount": ["discount"],
+    "price_add_ons": ["addons", "addons_extra"],
+}
+PRICE_LIMIT = Decimal(10) ** 8
+
+
+def backfill_price_columns(apps, schema_editor):
+    Booking = apps.get_model("leads", "Booking")
+    batch = []
+    bookings = Booking.objects.only("pk", "price_details").order_by("pk")
+    for booking in bookings.iterator(chunk_size=1000):
+        details = (
+            booking.price_details if isinstance(booking.price_details, dict) else {}
+        )
+        for column, keys in PRICE_COLUMNS.items():
+            values = [
+                details[key] for key in keys if details.get(key) not in (None, "")
+            ]
+            try:
+                value = sum(Decimal(str(v)) for v in values).quantize(Decimal("0.01"))
+            except (InvalidOperation, TypeError, ValueError):
+                value = None
+            if value is not None and not (
+                value.is_finite() and abs(value) < PRICE_LIMIT
+            ):
+                value = None  # would not fit max_digits=10, decimal_places=2
+            setattr(booking, column, value if values else None)
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, list(PRICE_COLUMNS))
+            batch = []
+    Booking.objects.bulk_update(batch, list(PRICE_COLUMNS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0005_bookingdailystats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="price_add_ons",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="price_discount",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="price_subtotal",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="price_total",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_price_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0006_booking_price_columns"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "selected_date"], name="booking_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["service_type", "-created_at"],
+                name="booking_service_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["selected_date", "selected_time"], name="booking_date_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["-created_at"],
+                name="booking_pending_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:45
+
+import re
+
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS booking_customer_search_trgm "
+    "ON leads_booking USING gin (customer_search gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS booking_email_normalized_like "
+    "ON leads_booking (email_normalized varchar_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS booking_phone_digits_like "
+    "ON leads_booking (phone_digits varchar_pattern_ops)",
+]
+
+
+def backfill_search_columns(apps, schema_editor):
+    Booking = apps.get_model("leads", "Booking")
+    columns = ["email_normalized", "phone_digits", "customer_search"]
+    batch = []
+    bookings = Booking.objects.only(
+        "pk", "first_name", "last_name", "email", "phone", "suburb", "postcode"
+    ).order_by("pk")
+    for booking in bookings.iterator(chunk_size=1000):
+        booking.email_normalized = (booking.email or "").strip().lower()
+        booking.phone_digits = re.sub(r"\D", "", booking.phone or "")
+        booking.customer_search = " ".join(
+            " ".join(
+                [
+                    booking.first_name,
+                    booking.last_name,
+                    booking.email_normalized,
+                    booking.phone_digits,
+                    booking.suburb,
+                    booking.postcode,
+                ]
+            )
+            .lower()
+            .split()
+        )
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, columns)
+            batch = []
+    Booking.objects.bulk_update(batch, columns)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm and pattern-ops indexes only exist on PostgreSQL; other databases
+    # use the prefix fallback in leads/search.py
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for statement in TRIGRAM_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in [
+        "booking_customer_search_trgm",
+        "booking_email_normalized_like",
+        "booking_phone_digits_like",
+    ]:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0007_booking_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="customer_search",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="email_normalized",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=254
+            ),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="phone_digits",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=20
+            ),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leads", "0008_booking_customer_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="slot_count",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="BookingSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("start_time", models.TimeField()),
+                (
+                    "capacity",
+                    models.PositiveSmallIntegerField(
+                        help_text="Bookings that can run in this slot at once"
+                    ),
+                ),
+                ("reserved", models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Booking Slot",
+                "verbose_name_plural": "Booking Slots",
+                "ordering": ["date", "start_time"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "start_time"), name="unique_booking_slot"
+                    )
+                ],
+            },
+        ),
+    ]
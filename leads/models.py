@@ -1,7 +1,74 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
 
+# Typed Booking columns promoted out of price_details, with the JSON keys summed into each
+PRICE_COLUMNS = {
+    'price_total': ['total'],
+    'price_subtotal': ['subtotal'],
+    'price_discount': ['discount'],
+    'price_add_ons': ['addons', 'addons_extra'],
+}
+
+# max_digits and decimal_places of the price columns below
+PRICE_DIGITS = 10
+PRICE_PLACES = 2
+PRICE_LIMIT = Decimal(10) ** (PRICE_DIGITS - PRICE_PLACES)
+CENT = Decimal(1).scaleb(-PRICE_PLACES)
+
+
+def extract_price_columns(price_details, exact=False):
+    """
+    Decimal values for the typed price columns (None when no key is present).
+    Raises ValueError if a price value is not numeric or doesn't fit the
+    column, or with ``exact`` if it has more than two decimal places
+    (otherwise it is rounded to cents).
+    """
+    details = price_details if isinstance(price_details, dict) else {}
+    columns = {}
+    for column, keys in PRICE_COLUMNS.items():
+        values = [details[key] for key in keys if details.get(key) not in (None, '')]
+        if not values:
+            columns[column] = None
+            continue
+        try:
+            amounts = [Decimal(str(value)) for value in values]
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"Invalid numeric value for {', '.join(keys)}")
+        if not all(amount.is_finite() for amount in amounts):
+            raise ValueError(f"Invalid numeric value for {', '.join(keys)}")
+        if exact and any(amount != amount.quantize(CENT) for amount in amounts):
+            raise ValueError(f"{', '.join(keys)} must have at most {PRICE_PLACES} decimal places")
+        total = sum(amounts).quantize(CENT)
+        if abs(total) >= PRICE_LIMIT:
+            raise ValueError(f"{', '.join(keys)} must be less than {PRICE_LIMIT:,}")
+        columns[column] = total
+    return columns
+
+
+# Customer fields folded into the normalized search columns (see leads/search.py)
+CUSTOMER_SEARCH_SOURCES = ['first_name', 'last_name', 'email', 'phone', 'suburb', 'postcode']
+CUSTOMER_SEARCH_COLUMNS = ['email_normalized', 'phone_digits', 'customer_search']
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    """Digits only, so '0420 629 191' and '0420-629-191' compare equal"""
+    return re.sub(r'\D', '', value or '')
+
+
+def normalize_search_text(value):
+    """Lowercased words separated by single spaces"""
+    return ' '.join((value or '').lower().split())
+
+
 class Booking(models.Model):
     """Model to store booking/lead information from the frontend calculator"""
     
@@ -108,6 +175,20 @@ class Booking(models.Model):
     # Price details (stored as JSON)
     price_details = models.JSONField(default=dict, blank=True, null=True)
     
+    # Hot price_details values as typed columns, kept in sync on save()
+    price_total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    price_subtotal = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    price_discount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    price_add_ons = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    
+    # Normalized customer search columns, kept in sync on save()
+    email_normalized = models.CharField(max_length=254, blank=True, editable=False, db_index=True)
+    phone_digits = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    customer_search = models.TextField(blank=True, editable=False)
+    
+    # Consecutive BookingSlot rows held from selected_time (see leads/availability.py)
+    slot_count = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    
     # Status tracking
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -123,12 +204,62 @@ class Booking(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on (created_at, id), see core/pagination.py
+            models.Index(fields=['-created_at', '-id'], name='booking_created_id_idx'),
+            # BookingViewSet filter/order shapes (check with `manage.py explain_workload`)
+            models.Index(fields=['status', 'selected_date'], name='booking_status_date_idx'),
+            models.Index(fields=['service_type', '-created_at'], name='booking_service_created_idx'),
+            models.Index(fields=['selected_date', 'selected_time'], name='booking_date_time_idx'),
+            # Pending bookings are the working set of the admin dashboard
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(status='pending'),
+                name='booking_pending_created_idx',
+            ),
+        ]
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.service_type} ({self.selected_date})"
     
+    def sync_price_columns(self):
+        """Copy price_details values into the typed columns (invalid values become NULL)"""
+        try:
+            columns = extract_price_columns(self.price_details)
+        except ValueError:
+            columns = dict.fromkeys(PRICE_COLUMNS)
+        for column, value in columns.items():
+            setattr(self, column, value)
+        return columns
+    
+    def sync_search_columns(self):
+        """Refresh the normalized customer search columns from the customer fields"""
+        self.email_normalized = normalize_email(self.email)
+        self.phone_digits = normalize_phone(self.phone)
+        self.customer_search = normalize_search_text(' '.join([
+            self.first_name,
+            self.last_name,
+            self.email_normalized,
+            self.phone_digits,
+            self.suburb,
+            self.postcode,
+        ]))
+    
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        update_fields = kwargs.get('update_fields')
+        if 'price_details' not in deferred:
+            self.sync_price_columns()
+            if update_fields is not None and 'price_details' in update_fields:
+                kwargs['update_fields'] = update_fields = {*update_fields, *PRICE_COLUMNS}
+        if not deferred.intersection(CUSTOMER_SEARCH_SOURCES):
+            self.sync_search_columns()
+            if update_fields is not None and set(update_fields) & set(CUSTOMER_SEARCH_SOURCES):
+                kwargs['update_fields'] = {*update_fields, *CUSTOMER_SEARCH_COLUMNS}
+        super().save(*args, **kwargs)
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -143,6 +274,97 @@ class Booking(models.Model):
     
     @property
     def total_price(self):
+        if self.price_total is not None:
+            return self.price_total
+        return self.submitted_total
+    
+    @property
+    def submitted_total(self):
+        """price_details['total'] as submitted, the value the API returns as total_price"""
         if isinstance(self.price_details, dict) and 'total' in self.price_details:
             return self.price_details['total']
         return 0
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup bucket as loaded, so saves can move it (leads/rollups.py)
+        from .rollups import ROLLUP_FIELDS, rollup_state
+        if ROLLUP_FIELDS.issubset(field_names):
+            instance._rollup_state = rollup_state(instance)
+        # Same for the reserved time slots (leads/availability.py)
+        from .availability import RESERVATION_FIELDS, reservation_state
+        if RESERVATION_FIELDS.issubset(field_names):
+            instance._reservation_state = reservation_state(instance)
+        # And the booked start, which the SMS reminder follows (leads/notifications.py)
+        from .notifications import SCHEDULE_FIELDS, schedule
+        if SCHEDULE_FIELDS.issubset(field_names):
+            instance._schedule = schedule(instance)
+        return instance
+
+
+class BookingDailyStats(models.Model):
+    """Per-day booking counts and revenue by service type and status, maintained by leads/rollups.py"""
+    
+    date = models.DateField(help_text="Booking creation date")
+    service_type = models.CharField(max_length=20, choices=Booking.SERVICE_TYPES)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['-date', 'service_type', 'status']
+        verbose_name = 'Booking Daily Stats'
+        verbose_name_plural = 'Booking Daily Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'service_type', 'status'], name='unique_booking_daily_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.service_type}/{self.status}: {self.count}"
+
+
+class BookingSlot(models.Model):
+    """Crew capacity of one time slot on one day, reserved by bookings (leads/availability.py)"""
+    
+    date = models.DateField()
+    start_time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField(help_text="Bookings that can run in this slot at once")
+    reserved = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['date', 'start_time']
+        verbose_name = 'Booking Slot'
+        verbose_name_plural = 'Booking Slots'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'start_time'], name='unique_booking_slot'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.start_time:%H:%M}: {self.reserved}/{self.capacity}"
+    
+    @property
+    def remaining(self):
+        return max(self.capacity - self.reserved, 0)
+
+
+class BookingSubmission(models.Model):
+    """
+    Dedup record of a booking POST, keyed by its Idempotency-Key or content
+    fingerprint, holding the original response for replays (leads/idempotency.py)
+    """
+    
+    key = models.CharField(max_length=80, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Empty while in flight")
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'Booking Submission'
+        verbose_name_plural = 'Booking Submissions'
+    
+    def __str__(self):
+        return f"{self.key} -> {self.booking_id}"
@@ -0,0 +1,178 @@
+"""
+Side effects of a new booking, run by the background job worker (jobs/queue.py).
+
+``booking_created`` is called by ``BookingViewSet.perform_create`` inside the
+booking's transaction and only writes job rows (one INSERT); the email, SMS,
+admin notification and analytics work happens later in ``manage.py run_jobs``.
+When a booking is moved, ``reschedule_reminder`` (leads/signals.py) moves its
+queued SMS reminder with it; a reminder that was already sent isn't repeated.
+
+Delivery goes through pluggable backends so everything can be exercised
+locally: email uses Django's ``EMAIL_BACKEND`` (console by default) and SMS
+the ``BOOKING_NOTIFICATIONS['SMS_BACKEND']`` class (``ConsoleSMSBackend``).
+"""
+
+import json
+import logging
+import sys
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs import queue
+from jobs.models import Job
+
+from .models import Booking
+
+analytics_logger = logging.getLogger('leads.analytics')
+
+DEFAULTS = {
+    'SMS_BACKEND': 'leads.notifications.ConsoleSMSBackend',
+    'ADMIN_EMAILS': [],
+    'REMINDER_HOURS_BEFORE': 24,
+    'DEFAULT_START_TIME': '08:00',
+}
+
+SCHEDULE_FIELDS = {'selected_date', 'selected_time'}
+
+
+def get_config():
+    """Return notification settings merged with defaults"""
+    return {**DEFAULTS, **getattr(settings, 'BOOKING_NOTIFICATIONS', {})}
+
+
+class ConsoleSMSBackend:
+    """Writes messages to stdout instead of sending them"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, to, message):
+        self.stream.write(f'SMS to {to}: {message}\n')
+        self.stream.flush()
+
+
+def get_sms_backend():
+    return import_string(get_config()['SMS_BACKEND'])()
+
+
+def reminder_time(booking, config):
+    """When the SMS reminder is due: REMINDER_HOURS_BEFORE the booked start"""
+    start_time = booking.selected_time or time.fromisoformat(config['DEFAULT_START_TIME'])
+    start = timezone.make_aware(datetime.combine(booking.selected_date, start_time))
+    return max(start - timedelta(hours=config['REMINDER_HOURS_BEFORE']), timezone.now())
+
+
+def booking_created(booking):
+    """Queue the side effects of a new booking (call inside its transaction)"""
+    config = get_config()
+    payload = {'booking_id': booking.pk}
+    jobs = [
+        queue.build('leads.confirmation_email', payload),
+        queue.build('leads.analytics', {**payload, 'event': 'booking_created'}),
+    ]
+    if config['ADMIN_EMAILS']:
+        jobs.append(queue.build('leads.admin_notification', payload))
+    if booking.sms_reminders and booking.phone:
+        jobs.append(queue.build('leads.sms_reminder', payload, run_at=reminder_time(booking, config)))
+    queue.enqueue_many(jobs)
+
+
+def schedule(booking):
+    """Booked start a reminder depends on"""
+    return booking.selected_date, booking.selected_time
+
+
+def reschedule_reminder(booking):
+    """Move the booking's queued SMS reminder after a date or time change (one UPDATE)"""
+    run_at = reminder_time(booking, get_config())
+    return (
+        Job.objects.filter(name='leads.sms_reminder', status='queued', payload__booking_id=booking.pk)
+        .exclude(run_at=run_at)
+        .update(run_at=run_at)
+    )
+
+
+def load_booking(payload):
+    """The job's booking, or None if it was deleted in the meantime"""
+    return Booking.objects.filter(pk=payload['booking_id']).first()
+
+
+def describe(booking):
+    service = dict(Booking.SERVICE_TYPES).get(booking.service_type, booking.service_type)
+    when = booking.selected_date.strftime('%A %d %B %Y')
+    if booking.selected_time:
+        when += f" at {booking.selected_time.strftime('%I:%M %p').lstrip('0')}"
+    return f'{service} on {when}'
+
+
+@queue.register('leads.confirmation_email')
+def send_confirmation_email(payload):
+    booking = load_booking(payload)
+    if booking is None:
+        return
+    lines = [
+        f'Hi {booking.first_name},',
+        '',
+        f'Thanks for your booking request for {describe(booking)} at {booking.full_address}.',
+    ]
+    if booking.price_total is not None:
+        lines.append(f'Quoted total: ${booking.price_total}.')
+    lines += ['', 'We will be in touch shortly to confirm.']
+    send_mail(
+        subject='Your Sustainable Shine booking request',
+        message='\n'.join(lines) + '\n',
+        from_email=None,
+        recipient_list=[booking.email],
+    )
+
+
+@queue.register('leads.admin_notification')
+def send_admin_notification(payload):
+    booking = load_booking(payload)
+    recipients = get_config()['ADMIN_EMAILS']
+    if booking is None or not recipients:
+        return
+    send_mail(
+        subject=f'New booking #{booking.pk}: {booking.full_name}',
+        message=(
+            f'{describe(booking)}\n'
+            f'{booking.full_address}\n'
+            f'{booking.email} / {booking.phone}\n'
+            f'Total: ${booking.total_price}\n'
+        ),
+        from_email=None,
+        recipient_list=recipients,
+    )
+
+
+@queue.register('leads.sms_reminder')
+def send_sms_reminder(payload):
+    booking = load_booking(payload)
+    # Customers can opt out and bookings can be cancelled after the job was queued
+    if booking is None or not booking.sms_reminders or booking.status == 'cancelled':
+        return
+    get_sms_backend().send(
+        booking.phone,
+        f'Sustainable Shine reminder: {describe(booking)}. Reply STOP to opt out.',
+    )
+
+
+@queue.register('leads.analytics')
+def record_analytics(payload):
+    booking = load_booking(payload)
+    if booking is None:
+        return
+    analytics_logger.info(json.dumps({
+        'event': payload.get('event', 'booking_created'),
+        'booking_id': booking.pk,
+        'service_type': booking.service_type,
+        'frequency': booking.frequency,
+        'suburb': booking.suburb,
+        'postcode': booking.postcode,
+        'total': str(booking.total_price),
+        'hear_about_us': booking.hear_about_us,
+    }))
@@ -0,0 +1,237 @@
+"""
+Server-side booking quotes.
+
+Prices follow the frontend calculator's ``price_details`` layout
+(all amounts GST inclusive):
+
+- ``base``: service type price for the number of bedrooms
+- ``addons``: rooms above the included count (extra bathrooms, kitchens, ...)
+- ``addons_extra``: selected add-ons, ``price x quantity``
+- ``discount``: frequency discount on base + addons
+- ``total``: base + addons + addons_extra - discount, ``gst`` = total / 11,
+  ``subtotal`` = total - gst
+
+The tables in ``DEFAULT_PRICING`` (overridable through the ``BOOKING_PRICING``
+setting) are compiled once into Decimal lookups, and quotes are memoized per
+normalized input, so repeated calculator requests are answered from memory.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_PRICING = {
+    # price = base + per_bedroom x bedrooms
+    'SERVICES': {
+        'general': {'base': 118, 'per_bedroom': 30},
+        'deep': {'base': 178, 'per_bedroom': 60},
+        'endOfLease': {'base': 238, 'per_bedroom': 95},
+        'moveIn': {'base': 238, 'per_bedroom': 95},
+    },
+    # (rooms included in the base price, price per extra room)
+    'ROOMS': {
+        'bathrooms': (1, 25),
+        'kitchen': (1, 40),
+        'living_dining': (1, 30),
+        'laundry': (1, 20),
+        'storey': (1, 50),
+    },
+    'FREQUENCY_DISCOUNTS': {
+        'once': 0,
+        'weekly': '0.15',
+        'fortnightly': '0.10',
+        'monthly': '0.05',
+    },
+    'ADD_ONS': {
+        'insideFridge': 40,
+        'ovenSteamer': 60,
+        'interiorWindows': 60,
+        'exteriorWindows': 60,
+        'spotClean60': 60,
+        'slidingDoor': 30,
+        'smallBalcony': 30,
+        'blindsRoller': 10,
+        'blindsVenetian': 20,
+    },
+    'MAX_BEDROOMS': 10,
+    'MAX_ROOMS': 10,
+    'MAX_QUANTITY': 50,
+    'GST_DIVISOR': 11,
+    # Reject bookings whose submitted total differs from the quote by more than TOLERANCE
+    # (off: mismatches and unpriceable bookings are only logged). Turn it on once these
+    # tables match the frontend calculator.
+    'VERIFY': False,
+    'TOLERANCE': '1.00',
+}
+
+# Distinct calculator inputs kept in memory per process
+QUOTE_CACHE_SIZE = 4096
+
+CENT = Decimal('0.01')
+
+ROOM_FIELDS = list(DEFAULT_PRICING['ROOMS'])
+
+# Booking fields a quote depends on
+QUOTE_FIELDS = ['service_type', 'frequency', 'bedrooms', 'selected_add_ons', 'add_on_details', *ROOM_FIELDS]
+
+
+class QuoteError(ValueError):
+    """The input can't be priced (unknown service, add-on or out-of-range count)"""
+
+
+def get_config():
+    """Return pricing settings merged with defaults"""
+    return {**DEFAULT_PRICING, **getattr(settings, 'BOOKING_PRICING', {})}
+
+
+def money(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@lru_cache(maxsize=1)
+def price_tables():
+    """Pricing settings compiled into Decimal lookup tables"""
+    config = get_config()
+    bedroom_range = range(config['MAX_BEDROOMS'] + 1)
+    return {
+        'base': {
+            service: tuple(money(rates['base']) + money(rates['per_bedroom']) * count for count in bedroom_range)
+            for service, rates in config['SERVICES'].items()
+        },
+        'rooms': {
+            field: (included, money(rate)) for field, (included, rate) in config['ROOMS'].items()
+        },
+        'discounts': {
+            frequency: Decimal(str(rate)) for frequency, rate in config['FREQUENCY_DISCOUNTS'].items()
+        },
+        'add_ons': {key: money(price) for key, price in config['ADD_ONS'].items()},
+        'max_rooms': config['MAX_ROOMS'],
+        'max_quantity': config['MAX_QUANTITY'],
+        'gst_divisor': Decimal(config['GST_DIVISOR']),
+    }
+
+
+def add_on_quantities(selected_add_ons, add_on_details=None):
+    """
+    ``{key: quantity}`` for the chosen add-ons. ``selected_add_ons`` maps keys to
+    true/false or a quantity; quantities in ``add_on_details`` take precedence.
+    """
+    details = add_on_details if isinstance(add_on_details, dict) else {}
+    quantities = {}
+    for key, value in (selected_add_ons or {}).items():
+        if value is False or value is None:
+            continue
+        quantity = 1 if value is True else value
+        detail = details.get(key)
+        if isinstance(detail, dict) and detail.get('quantity') is not None:
+            quantity = detail['quantity']
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            raise QuoteError(f"Invalid quantity for add-on '{key}'")
+        if quantity > 0:
+            quantities[key] = quantity
+    return quantities
+
+
+def quote_key(service_type, frequency='once', bedrooms=1, add_ons=None, **rooms):
+    """Hashable normalized input; equal inputs share one memoized quote"""
+    return (
+        service_type,
+        frequency or 'once',
+        int(1 if bedrooms is None else bedrooms),
+        tuple(int(1 if rooms.get(field) is None else rooms[field]) for field in ROOM_FIELDS),
+        tuple(sorted((add_ons or {}).items())),
+    )
+
+
+def compute_quote(key):
+    service_type, frequency, bedrooms, rooms, add_ons = key
+    tables = price_tables()
+
+    if service_type not in tables['base']:
+        raise QuoteError(f"Unknown service type '{service_type}'")
+    if frequency not in tables['discounts']:
+        raise QuoteError(f"Unknown frequency '{frequency}'")
+    base_prices = tables['base'][service_type]
+    if not 0 <= bedrooms < len(base_prices):
+        raise QuoteError(f'Bedrooms must be between 0 and {len(base_prices) - 1}')
+
+    base = base_prices[bedrooms]
+    addons = Decimal('0.00')
+    for field, count in zip(ROOM_FIELDS, rooms):
+        if not 0 <= count <= tables['max_rooms']:
+            raise QuoteError(f"{field} must be between 0 and {tables['max_rooms']}")
+        included, rate = tables['rooms'][field]
+        addons += max(count - included, 0) * rate
+
+    addons_extra = Decimal('0.00')
+    for name, quantity in add_ons:
+        if name not in tables['add_ons']:
+            raise QuoteError(f"Unknown add-on '{name}'")
+        if quantity > tables['max_quantity']:
+            raise QuoteError(f"Quantity for add-on '{name}' must be at most {tables['max_quantity']}")
+        addons_extra += tables['add_ons'][name] * quantity
+
+    discount = money((base + addons) * tables['discounts'][frequency])
+    total = base + addons + addons_extra - discount
+    gst = money(total / tables['gst_divisor'])
+    return {
+        'base': base,
+        'addons': addons,
+        'addons_extra': addons_extra,
+        'discount': discount,
+        'subtotal': total - gst,
+        'gst': gst,
+        'total': total,
+    }
+
+
+@lru_cache(maxsize=QUOTE_CACHE_SIZE)
+def memoized_quote(key):
+    return compute_quote(key)
+
+
+def quote(service_type, frequency='once', bedrooms=1, selected_add_ons=None, add_on_details=None, **rooms):
+    """
+    Price breakdown for a booking request, as a new dict of Decimals.
+    Raises QuoteError for input outside the price tables.
+    """
+    add_ons = add_on_quantities(selected_add_ons, add_on_details)
+    try:
+        key = quote_key(service_type, frequency, bedrooms, add_ons, **rooms)
+    except (TypeError, ValueError):
+        raise QuoteError('Room counts must be integers')
+    return dict(memoized_quote(key))
+
+
+def quote_for_booking(data):
+    """Quote for validated booking data (a serializer's attrs or a model's fields)"""
+    return quote(
+        data.get('service_type'),
+        data.get('frequency', 'once'),
+        data.get('bedrooms', 1),
+        data.get('selected_add_ons'),
+        data.get('add_on_details'),
+        **{field: data.get(field, 1) for field in ROOM_FIELDS},
+    )
+
+
+def verify_total(submitted_total, quoted):
+    """True if a submitted total matches the quote within the configured tolerance"""
+    tolerance = Decimal(str(get_config()['TOLERANCE']))
+    return abs(money(submitted_total) - quoted['total']) <= tolerance
+
+
+def cache_info():
+    return memoized_quote.cache_info()
+
+
+@receiver(setting_changed)
+def reset_price_tables(setting, **kwargs):
+    if setting == 'BOOKING_PRICING':
+        price_tables.cache_clear()
+        memoized_quote.cache_clear()
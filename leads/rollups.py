@@ -0,0 +1,156 @@
+"""
+Incrementally maintained BookingDailyStats rollup.
+
+Every booking counts once towards the (creation date, service_type, status)
+bucket it is in, together with its price_total. The bucket is moved
+whenever a booking is created, changed or deleted:
+
+- ``Booking.save`` / ``delete`` / ``queryset.delete``: via the signal handlers
+  in leads/signals.py, using the state remembered in ``Booking.from_db``
+- ``queryset.update(status=...)`` (admin bulk actions): via ``update_status``
+- ``bulk_create`` (imports, leads/transfer.py): via ``add_bookings``
+
+``rebuild`` recomputes the table from scratch and ``compare`` reports drift.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Booking, BookingDailyStats
+from .stats import revenue_expression
+
+ROLLUP_FIELDS = {'created_at', 'service_type', 'status', 'price_total'}
+
+ZERO = Decimal('0.00')
+
+
+def booking_revenue(booking):
+    """Booking total as a Decimal (0 when missing)"""
+    return booking.price_total if booking.price_total is not None else ZERO
+
+
+def rollup_state(booking):
+    """(bucket key, revenue) a booking currently counts towards"""
+    key = (timezone.localdate(booking.created_at), booking.service_type, booking.status)
+    return key, booking_revenue(booking)
+
+
+def stored_state(booking):
+    """Rollup state of the row as it is in the database, or None if it doesn't exist"""
+    stored = Booking.objects.filter(pk=booking.pk).only(*ROLLUP_FIELDS).first()
+    return rollup_state(stored) if stored else None
+
+
+def apply_delta(key, count, revenue):
+    """Add count/revenue to one bucket with atomic F() updates"""
+    if not count and not revenue:
+        return
+    day, service_type, status = key
+    bucket = BookingDailyStats.objects.filter(date=day, service_type=service_type, status=status)
+    changes = {'count': F('count') + count, 'revenue': F('revenue') + revenue}
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            BookingDailyStats.objects.create(
+                date=day, service_type=service_type, status=status, count=count, revenue=revenue
+            )
+    except IntegrityError:
+        # Created concurrently, fall back to the update
+        bucket.update(**changes)
+
+
+def move(old_state, new_state):
+    """Move a booking from one bucket/revenue to another"""
+    if old_state == new_state:
+        return
+    if old_state is not None:
+        key, revenue = old_state
+        apply_delta(key, -1, -revenue)
+    if new_state is not None:
+        key, revenue = new_state
+        apply_delta(key, 1, revenue)
+
+
+def add_bookings(bookings):
+    """Count bookings inserted with bulk_create() (which sends no signals)"""
+    totals = defaultdict(lambda: [0, ZERO])
+    for booking in bookings:
+        key, revenue = rollup_state(booking)
+        totals[key][0] += 1
+        totals[key][1] += revenue
+    for key, (count, revenue) in totals.items():
+        apply_delta(key, count, revenue)
+
+
+def grouped(queryset):
+    """Rollup rows for a queryset of bookings, grouped in the database"""
+    return (
+        queryset.annotate(day=TruncDate('created_at'))
+        .values('day', 'service_type', 'status')
+        .annotate(
+            count=Count('id'),
+            revenue=Coalesce(Sum(revenue_expression()), 0, output_field=DecimalField()),
+        )
+        .order_by()
+    )
+
+
+def update_status(queryset, new_status):
+    """``queryset.update(status=new_status)`` that keeps the rollup in sync"""
+    with transaction.atomic():
+        changed = Booking.objects.select_for_update().filter(
+            pk__in=list(queryset.exclude(status=new_status).values_list('pk', flat=True))
+        )
+        groups = list(grouped(changed))
+        updated = changed.update(status=new_status, updated_at=timezone.now())
+        for group in groups:
+            revenue = Decimal(group['revenue'])
+            apply_delta((group['day'], group['service_type'], group['status']), -group['count'], -revenue)
+            apply_delta((group['day'], group['service_type'], new_status), group['count'], revenue)
+    return updated
+
+
+def expected_rollup(chunk_size=2000):
+    """Rollup computed from scratch by streaming bookings in chunks"""
+    totals = defaultdict(lambda: [0, ZERO])
+    bookings = Booking.objects.only(*ROLLUP_FIELDS).order_by('pk')
+    for booking in bookings.iterator(chunk_size=chunk_size):
+        key, revenue = rollup_state(booking)
+        totals[key][0] += 1
+        totals[key][1] += revenue
+    return {key: (count, revenue) for key, (count, revenue) in totals.items()}
+
+
+def rebuild(chunk_size=2000):
+    """Replace the rollup table with freshly computed rows, returns the row count"""
+    expected = expected_rollup(chunk_size)
+    rows = [
+        BookingDailyStats(date=day, service_type=service_type, status=status, count=count, revenue=revenue)
+        for (day, service_type, status), (count, revenue) in expected.items()
+    ]
+    with transaction.atomic():
+        BookingDailyStats.objects.all().delete()
+        BookingDailyStats.objects.bulk_create(rows, batch_size=chunk_size)
+    return len(rows)
+
+
+def compare(chunk_size=2000):
+    """Buckets whose stored (count, revenue) differs from a fresh computation"""
+    expected = expected_rollup(chunk_size)
+    stored = {
+        (row.date, row.service_type, row.status): (row.count, row.revenue)
+        for row in BookingDailyStats.objects.all()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, (0, ZERO))
+        have = stored.get(key, (0, ZERO))
+        if want[0] != have[0] or want[1] != have[1]:
+            mismatches.append({'bucket': key, 'expected': want, 'stored': have})
+    return mismatches
@@ -0,0 +1,115 @@
+"""
+Customer lookup for bookings.
+
+Searches run against normalized columns maintained in ``Booking.save``
+(``email_normalized``, ``phone_digits`` and the combined ``customer_search``)
+instead of unanchored ILIKE over six raw columns:
+
+- exact fast paths: a full email address or phone number is an indexed equality lookup
+- PostgreSQL: trigram word similarity on ``customer_search`` (GIN gin_trgm_ops
+  index), plus prefix matches on email/phone served by pattern-ops indexes
+- other databases: every query word must prefix a word of ``customer_search``,
+  ranked in Python
+"""
+
+from django.db import connection
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from .models import normalize_email, normalize_phone, normalize_search_text
+
+# Shortest digit string treated as a (partial) phone number
+MIN_PHONE_DIGITS = 6
+
+PHONE_CHARACTERS = set('0123456789 +-()')
+
+
+def exact_match(queryset, text):
+    """Indexed equality lookup for a full email or phone number, or None"""
+    if '@' in text:
+        return queryset.filter(email_normalized=normalize_email(text))
+    digits = normalize_phone(text)
+    if len(digits) >= 8 and set(text) <= PHONE_CHARACTERS:
+        return queryset.filter(phone_digits=digits)
+    return None
+
+
+def prefix_filter(text):
+    """Q matching bookings where every query word prefixes a customer_search word"""
+    condition = Q()
+    for word in normalize_search_text(text).split():
+        condition &= Q(customer_search__startswith=word) | Q(customer_search__contains=f' {word}')
+    digits = normalize_phone(text)
+    if len(digits) >= MIN_PHONE_DIGITS:
+        condition |= Q(phone_digits__startswith=digits)
+    return condition
+
+
+def candidates(queryset, text):
+    if connection.vendor == 'postgresql':
+        return queryset.filter(
+            Q(customer_search__trigram_word_similar=normalize_search_text(text))
+            | Q(email_normalized__startswith=normalize_email(text))
+            | prefix_filter(text)
+        )
+    return queryset.filter(prefix_filter(text))
+
+
+def rank(booking, words):
+    """Share of query words matching a whole word (1.0) or a word prefix (0.5)"""
+    if not words:
+        return 0.0
+    document = booking.customer_search.split()
+    score = 0.0
+    for word in words:
+        if word in document:
+            score += 1.0
+        elif any(token.startswith(word) for token in document):
+            score += 0.5
+    return round(score / len(words), 4)
+
+
+def filter_customers(queryset, text):
+    """Bookings matching a customer query (unordered)"""
+    text = text.strip()
+    exact = exact_match(queryset, text)
+    if exact is not None:
+        return exact
+    return candidates(queryset, text)
+
+
+def search_customers(queryset, text, limit=50):
+    """Bookings matching a customer query, best match first, each with a ``rank``"""
+    text = text.strip()
+    exact = exact_match(queryset, text)
+    if exact is not None:
+        results = list(exact[:limit])
+        for booking in results:
+            booking.rank = 1.0
+        return results
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        return list(
+            candidates(queryset, text)
+            .annotate(rank=TrigramWordSimilarity(normalize_search_text(text), 'customer_search'))
+            .order_by('-rank', '-created_at')[:limit]
+        )
+
+    words = normalize_search_text(text).split()
+    results = list(candidates(queryset, text))
+    for booking in results:
+        booking.rank = rank(booking, words)
+    results.sort(key=lambda booking: (booking.rank, booking.created_at), reverse=True)
+    return results[:limit]
+
+
+class CustomerSearchFilter(SearchFilter):
+    """``?search=`` served from the normalized customer columns"""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return filter_customers(queryset, text)
@@ -1,14 +1,21 @@
 from rest_framework import serializers
-from .models import Booking
+from core.instrumentation import TimedSerializerMixin
+from core.serializers import CompiledListSerializer
+from .models import Booking, extract_price_columns
+from . import pricing
 import json
+import logging
 
+logger = logging.getLogger(__name__)
 
-class BookingSerializer(serializers.ModelSerializer):
+
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Booking model"""
     
     full_name = serializers.ReadOnlyField()
     full_address = serializers.ReadOnlyField()
-    total_price = serializers.ReadOnlyField()
+    # As submitted, so the JSON type doesn't follow the typed price_total column
+    total_price = serializers.ReadOnlyField(source='submitted_total')
     
     # Allow these JSON fields to accept both dict and string (will be parsed)
     selected_add_ons = serializers.JSONField(required=False, default=dict)
@@ -55,15 +62,22 @@ class BookingSerializer(serializers.ModelSerializer):
         return value if value else {}
     
     def validate_price_details(self, value):
-        """Ensure price_details is a dict"""
+        """Ensure price_details is a dict with numeric price values"""
         if value is None or value == '':
             return {}
         if isinstance(value, str):
             try:
-                return json.loads(value) or {}
+                value = json.loads(value) or {}
             except json.JSONDecodeError:
                 raise serializers.ValidationError("Invalid JSON format for price_details")
-        return value if value else {}
+        if not value:
+            return {}
+        # Hot values are copied into typed decimal columns on save, so they must fit them
+        try:
+            extract_price_columns(value, exact=True)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
     
     def validate(self, data):
         """Ensure all JSON fields have default values if not provided"""
@@ -73,15 +87,45 @@ class BookingSerializer(serializers.ModelSerializer):
             data['add_on_details'] = {}
         if 'price_details' not in data or data.get('price_details') is None:
             data['price_details'] = {}
+        self.verify_price(data)
         return data
+    
+    def verify_price(self, data):
+        """
+        Check a submitted price_details total against the server-side quote.
+        Mismatches are rejected with VERIFY on, and only logged otherwise.
+        """
+        submitted = data['price_details'].get('total') if 'price_details' in self.initial_data else None
+        if submitted in (None, '') or not self.context.get('verify_price', True):
+            return
+        enforce = pricing.get_config()['VERIFY']
+        
+        # Partial updates are quoted with the stored values for missing fields
+        booking = {
+            field: data[field] if field in data else getattr(self.instance, field, None)
+            for field in pricing.QUOTE_FIELDS
+        }
+        try:
+            quoted = pricing.quote_for_booking({k: v for k, v in booking.items() if v is not None})
+        except pricing.QuoteError as e:
+            if enforce:
+                raise serializers.ValidationError({'price_details': str(e)})
+            logger.warning('Booking price not verified: %s', e)
+            return
+        if not pricing.verify_total(submitted, quoted):
+            message = f"Submitted total {submitted} does not match the quoted total {quoted['total']}"
+            if enforce:
+                raise serializers.ValidationError({'price_details': message})
+            logger.warning('Booking price mismatch: %s', message)
 
 
-class BookingListSerializer(serializers.ModelSerializer):
+class BookingListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Simplified serializer for listing bookings (admin view)"""
     
     full_name = serializers.ReadOnlyField()
     full_address = serializers.ReadOnlyField()
-    total_price = serializers.ReadOnlyField()
+    # As submitted, so the JSON type doesn't follow the typed price_total column
+    total_price = serializers.ReadOnlyField(source='submitted_total')
     
     class Meta:
         model = Booking
@@ -99,4 +143,29 @@ class BookingListSerializer(serializers.ModelSerializer):
             'full_address',
             'created_at',
         ]
+        # many=True renders rows with a precompiled converter (see core/serializers.py)
+        list_serializer_class = CompiledListSerializer
 
+
+class BookingSearchResultSerializer(BookingListSerializer):
+    """Booking list fields plus the customer search rank"""
+    
+    rank = serializers.FloatField(read_only=True)
+    
+    class Meta(BookingListSerializer.Meta):
+        fields = BookingListSerializer.Meta.fields + ['rank']
+
+
+class QuoteRequestSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Calculator input for the quote endpoint"""
+    
+    service_type = serializers.ChoiceField(choices=Booking.SERVICE_TYPES)
+    frequency = serializers.ChoiceField(choices=Booking.FREQUENCY_CHOICES, default='once')
+    bedrooms = serializers.IntegerField(min_value=0, default=1)
+    bathrooms = serializers.IntegerField(min_value=0, default=1)
+    kitchen = serializers.IntegerField(min_value=0, default=1)
+    living_dining = serializers.IntegerField(min_value=0, default=1)
+    laundry = serializers.IntegerField(min_value=0, default=1)
+    storey = serializers.IntegerField(min_value=0, default=1)
+    selected_add_ons = serializers.DictField(required=False, default=dict)
+    add_on_details = serializers.DictField(required=False, default=dict)
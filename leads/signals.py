@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import availability, notifications, rollups
+from .models import Booking
+
+
+@receiver(pre_save, sender=Booking)
+def remember_rollup_state(sender, instance, raw=False, **kwargs):
+    """Load the stored state when the instance wasn't fully fetched from the database"""
+    if raw or instance._state.adding or hasattr(instance, '_rollup_state'):
+        return
+    instance._rollup_state = rollups.stored_state(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_reservation_state(sender, instance, raw=False, **kwargs):
+    """Load the stored reservation and booked start (one query, shared with the reminder)"""
+    if raw or instance._state.adding or (hasattr(instance, '_reservation_state') and hasattr(instance, '_schedule')):
+        return
+    stored = availability.stored_booking(instance)
+    instance._reservation_state = availability.reservation_state(stored) if stored else None
+    instance._schedule = notifications.schedule(stored) if stored else None
+
+
+@receiver(post_save, sender=Booking)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_rollup_state', None)
+    new_state = rollups.rollup_state(instance)
+    rollups.move(old_state, new_state)
+    instance._rollup_state = new_state
+
+
+@receiver(post_save, sender=Booking)
+def update_reservation_on_save(sender, instance, created, raw=False, **kwargs):
+    """Follow reschedules and cancellations (new bookings reserve in BookingViewSet.perform_create)"""
+    new_state = availability.reservation_state(instance)
+    if not raw and not created:
+        availability.move(getattr(instance, '_reservation_state', None), new_state)
+    instance._reservation_state = new_state
+
+
+@receiver(post_save, sender=Booking)
+def move_reminder_on_reschedule(sender, instance, created, raw=False, **kwargs):
+    new_schedule = notifications.schedule(instance)
+    if not raw and not created and getattr(instance, '_schedule', new_schedule) != new_schedule:
+        notifications.reschedule_reminder(instance)
+    instance._schedule = new_schedule
+
+
+@receiver(post_delete, sender=Booking)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    old_state = getattr(instance, '_rollup_state', None) or rollups.rollup_state(instance)
+    rollups.move(old_state, None)
+
+
+@receiver(post_delete, sender=Booking)
+def release_reservation_on_delete(sender, instance, **kwargs):
+    old_state = getattr(instance, '_reservation_state', None) or availability.reservation_state(instance)
+    availability.move(old_state, None)
@@ -0,0 +1,83 @@
+"""
+Booking statistics served from the BookingDailyStats rollup.
+
+The rollup (leads/rollups.py) holds one row per creation day, service type
+and status, so the dashboard reads a few rows per day instead of scanning
+every booking. ``booking_summary`` answers the whole dashboard (totals,
+status and service breakdowns, recent count, revenue) with one
+conditional-aggregation query; ``booking_buckets`` adds a daily/weekly time
+series with one GROUP BY. Both work in whole days of the local timezone.
+Revenue is only included when asked for (staff).
+"""
+
+from datetime import timedelta
+
+from django.db.models import DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek
+from django.utils import timezone
+
+from .models import Booking
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+}
+
+RECENT_DAYS = 30
+
+
+def revenue_expression():
+    """Booking total from the typed price_total column"""
+    return F('price_total')
+
+
+def count_of(**lookups):
+    return Coalesce(Sum('count', filter=Q(**lookups) if lookups else None), 0)
+
+
+def booking_summary(rollup, revenue=False):
+    """Totals and breakdowns for a BookingDailyStats ``rollup`` queryset in a single query"""
+    since = timezone.localdate() - timedelta(days=RECENT_DAYS)
+    aggregates = {
+        'total': count_of(),
+        'recent': count_of(date__gte=since),
+    }
+    if revenue:
+        aggregates['revenue'] = Coalesce(Sum('revenue'), 0, output_field=DecimalField())
+    for value, _ in Booking.STATUS_CHOICES:
+        aggregates[f'status_{value}'] = count_of(status=value)
+    for value, _ in Booking.SERVICE_TYPES:
+        aggregates[f'service_{value}'] = count_of(service_type=value)
+
+    row = rollup.aggregate(**aggregates)
+
+    summary = {
+        'total_bookings': row['total'],
+        'status_breakdown': {
+            value: row[f'status_{value}'] for value, _ in Booking.STATUS_CHOICES
+        },
+        'service_breakdown': {
+            value: row[f'service_{value}'] for value, _ in Booking.SERVICE_TYPES
+        },
+        f'recent_bookings_{RECENT_DAYS}_days': row['recent'],
+    }
+    if revenue:
+        summary['total_revenue'] = row['revenue']
+    return summary
+
+
+def booking_buckets(rollup, bucket, revenue=False):
+    """Bookings (and revenue) per day or week of creation"""
+    totals = {'count': Sum('count')}
+    if revenue:
+        totals['revenue'] = Coalesce(Sum('revenue'), 0, output_field=DecimalField())
+    rows = (
+        rollup.annotate(period=BUCKETS[bucket]('date'))
+        .values('period')
+        .annotate(**totals)
+        .order_by('period')
+    )
+    return [
+        {key: row[key] for key in ['period', *totals]}
+        for row in rows
+    ]
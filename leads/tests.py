@@ -1,3 +1,527 @@
-from django.test import TestCase
+import io
+import json
+from datetime import time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.querybudget import query_budget
+from jobs.models import Job
+
+from . import idempotency, pricing
+from .models import Booking, BookingSlot, BookingSubmission
+from .serializers import BookingListSerializer, BookingSerializer
+from .views import BookingViewSet
+
+SIZES = [1, 10, 100]
+
+STANDARD_ACTIONS = ['list', 'create', 'retrieve', 'update', 'partial_update', 'destroy']
+
+
+@override_settings(BOOKING_PRICING={'VERIFY': False})
+class BookingQueryBudgetTests(TestCase):
+    """Every BookingViewSet action stays within its declared query budget at 1, 10 and 100 bookings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='office', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.date = timezone.localdate() + timedelta(days=3)
+
+    def booking_data(self, index):
+        return {
+            'service_type': 'general',
+            'frequency': 'weekly' if index % 2 else 'once',
+            'selected_date': self.date.isoformat(),
+            'first_name': f'Customer{index}',
+            'last_name': 'Smith',
+            'email': f'customer{index}@example.com',
+            'phone': f'04{index:08d}',
+            'street': f'{index} George St',
+            'suburb': 'Sydney',
+            'postcode': '2000',
+            'bedrooms': 2,
+            'bathrooms': 1,
+            'price_details': {'total': 180},
+        }
+
+    def create_bookings(self, count):
+        Booking.objects.all().delete()
+        for index in range(count):
+            Booking.objects.create(**self.booking_data(index))
+        return Booking.objects.order_by('id').first()
+
+    def assert_within_budget(self, action, size, call):
+        budget = BookingViewSet.query_budgets[action]
+        with query_budget(budget, label=f'{action} with {size} bookings'):
+            response = call()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 300, getattr(response, 'data', None))
+        return response
+
+    def test_every_action_has_a_budget(self):
+        actions = STANDARD_ACTIONS + [view.__name__ for view in BookingViewSet.get_extra_actions()]
+        self.assertEqual(sorted(set(actions) - set(BookingViewSet.query_budgets)), [])
+
+    def test_read_actions(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                booking = self.create_bookings(size)
+                self.client.force_authenticate(self.staff)
+                self.assert_within_budget('list', size, lambda: self.client.get('/api/bookings/?page_size=100'))
+                self.assert_within_budget('retrieve', size, lambda: self.client.get(f'/api/bookings/{booking.pk}/'))
+                self.assert_within_budget(
+                    'detailed', size, lambda: self.client.get(f'/api/bookings/{booking.pk}/detailed/')
+                )
+                self.assert_within_budget('customers', size, lambda: self.client.get('/api/bookings/customers/?q=smith'))
+                self.assert_within_budget('statistics', size, lambda: self.client.get('/api/bookings/statistics/?bucket=day'))
+                self.assert_within_budget('export', size, lambda: self.client.get('/api/bookings/export/?output=csv'))
+                self.assert_within_budget(
+                    'availability', size, lambda: self.client.get(f'/api/bookings/availability/?from={self.date}&days=7')
+                )
+                self.client.force_authenticate(None)
+                self.assert_within_budget(
+                    'quote', size, lambda: self.client.get('/api/bookings/quote/?service_type=general&bedrooms=2')
+                )
+
+    def test_write_actions(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                booking = self.create_bookings(size)
+                self.client.force_authenticate(self.staff)
+                data = {**self.booking_data(size), 'selected_time': '09:00'}
+                created = self.assert_within_budget(
+                    'create', size, lambda: self.client.post('/api/bookings/', data, format='json')
+                )
+                pk = created.data['data']['id']
+                moved = {**data, 'selected_time': time(13, 0).isoformat()}
+                self.assert_within_budget(
+                    'update', size, lambda: self.client.put(f'/api/bookings/{pk}/', moved, format='json')
+                )
+                self.assert_within_budget(
+                    'partial_update',
+                    size,
+                    lambda: self.client.patch(f'/api/bookings/{pk}/', {'special_notes': 'Key under mat'}, format='json'),
+                )
+                self.assert_within_budget(
+                    'update_status',
+                    size,
+                    lambda: self.client.patch(f'/api/bookings/{booking.pk}/update_status/', {'status': 'confirmed'}),
+                )
+                self.assert_within_budget('destroy', size, lambda: self.client.delete(f'/api/bookings/{pk}/'))
+
+    def test_import(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                self.create_bookings(1)
+                lines = [json.dumps(self.booking_data(index)) for index in range(size)]
+                upload = io.BytesIO('\n'.join(lines).encode())
+                upload.name = 'bookings.ndjson'
+                self.client.force_authenticate(self.staff)
+                response = self.assert_within_budget(
+                    'import_bookings',
+                    size,
+                    lambda: self.client.post('/api/bookings/import/', {'file': upload}, format='multipart'),
+                )
+                self.assertEqual(response.data['created'], size)
+
+
+@override_settings(BOOKING_PRICING={'VERIFY': False})
+class BookingConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='office', is_staff=True))
+        self.booking = Booking.objects.create(
+            service_type='general',
+            selected_date=timezone.localdate() + timedelta(days=3),
+            first_name='Ann',
+            last_name='Lee',
+            email='ann@example.com',
+            phone='0400000000',
+            street='1 George St',
+            suburb='Sydney',
+            postcode='2000',
+        )
+
+    def test_list_304_costs_one_query(self):
+        first = self.client.get('/api/bookings/')
+        with self.assertNumQueries(1):
+            again = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        self.client.patch(f'/api/bookings/{self.booking.pk}/update_status/', {'status': 'confirmed'})
+        self.assertEqual(self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_retrieve_and_detailed_have_separate_validators(self):
+        retrieved = self.client.get(f'/api/bookings/{self.booking.pk}/')
+        detailed = self.client.get(f'/api/bookings/{self.booking.pk}/detailed/')
+        self.assertNotEqual(retrieved['ETag'], detailed['ETag'])
+        self.assertEqual(
+            self.client.get(f'/api/bookings/{self.booking.pk}/', HTTP_IF_NONE_MATCH=retrieved['ETag']).status_code, 304
+        )
+        self.assertEqual(
+            self.client.get(f'/api/bookings/{self.booking.pk}/detailed/', HTTP_IF_NONE_MATCH=retrieved['ETag']).status_code,
+            200,
+        )
+
+
+class CompiledRowTests(TestCase):
+    def test_booking_rows_match_stock_serializer(self):
+        for index, time_slot in enumerate([None, time(9, 0)]):
+            Booking.objects.create(
+                service_type='general',
+                selected_date=timezone.localdate(),
+                selected_time=time_slot,
+                first_name='Ann',
+                last_name=f'Lee{index}',
+                email=f'ann{index}@example.com',
+                phone='0400000000',
+                unit_number='4' if index else '',
+                street='1 George St',
+                suburb='Sydney',
+                postcode='2000',
+                price_details={'total': 180.5} if index else {},
+            )
+        bookings = Booking.objects.all()
+        for zone in ['UTC', 'Australia/Sydney']:
+            with self.subTest(zone=zone), timezone.override(zone):
+                compiled = BookingListSerializer(bookings, many=True).data
+                with override_settings(API_COMPILED_ROWS=False):
+                    stock = BookingListSerializer(bookings, many=True).data
+                self.assertEqual(JSONRenderer().render(compiled), JSONRenderer().render(stock))
+
+
+@override_settings(BOOKING_PRICING={'VERIFY': False})
+class PriceColumnTests(TestCase):
+    def booking_data(self, price_details):
+        return {
+            'service_type': 'general',
+            'selected_date': (timezone.localdate() + timedelta(days=3)).isoformat(),
+            'first_name': 'Ann',
+            'last_name': 'Lee',
+            'email': 'ann@example.com',
+            'phone': '0400000000',
+            'street': '1 George St',
+            'suburb': 'Sydney',
+            'postcode': '2000',
+            'price_details': price_details,
+        }
+
+    def test_serializer_rejects_values_that_do_not_fit_the_columns(self):
+        invalid = [
+            {'total': 'call us'},
+            {'total': 100000000},
+            {'addons': 99999999.99, 'addons_extra': 1},
+            {'total': 180.005},
+        ]
+        for details in invalid:
+            with self.subTest(details=details):
+                serializer = BookingSerializer(data=self.booking_data(details))
+                self.assertFalse(serializer.is_valid())
+                self.assertIn('price_details', serializer.errors)
+
+        response = APIClient().post('/api/bookings/', self.booking_data({'total': 1e12}), format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_columns_are_filled_on_save(self):
+        serializer = BookingSerializer(data=self.booking_data({'total': '99999999.99', 'addons': 20.5, 'addons_extra': 4}))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        booking = serializer.save()
+        booking.refresh_from_db()
+        self.assertEqual(booking.price_total, Decimal('99999999.99'))
+        self.assertEqual(booking.price_add_ons, Decimal('24.50'))
+
+        # Rows written without the serializer keep NULL instead of failing the save
+        booking.price_details = {'total': 1e12, 'subtotal': 'n/a'}
+        booking.save()
+        booking.refresh_from_db()
+        self.assertIsNone(booking.price_total)
+        self.assertIsNone(booking.price_subtotal)
+
+    def test_api_total_price_keeps_the_submitted_value(self):
+        booking = Booking.objects.create(**self.booking_data({'total': 180}))
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_price, Decimal('180.00'))
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='office', is_staff=True))
+        totals = [
+            client.get(f'/api/bookings/{booking.pk}/').json()['total_price'],
+            client.get('/api/bookings/').json()['results'][0]['total_price'],
+        ]
+        self.assertEqual([(total, type(total)) for total in totals], [(180, int), (180, int)])
+
+
+class CustomerSearchTests(TestCase):
+    def test_only_staff_can_search_customers(self):
+        Booking.objects.create(
+            service_type='general', selected_date=timezone.localdate(), first_name='Ann', last_name='Smith',
+            email='ann@example.com', phone='0400000000', street='1 George St', suburb='Sydney', postcode='2000',
+        )
+        client = APIClient()
+        self.assertEqual(client.get('/api/bookings/customers/?q=smith').status_code, 403)
+        client.force_authenticate(User.objects.create(username='customer'))
+        self.assertEqual(client.get('/api/bookings/customers/?q=smith').status_code, 403)
+        client.force_authenticate(User.objects.create(username='office', is_staff=True))
+        response = client.get('/api/bookings/customers/?q=smith')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ann@example.com', response.content.decode())
+
+
+class StatisticsTests(TestCase):
+    def create(self, status, total):
+        return Booking.objects.create(
+            service_type='general', selected_date=timezone.localdate(), first_name='Ann', last_name='Smith',
+            email='ann@example.com', phone='0400000000', street='1 George St', suburb='Sydney', postcode='2000',
+            status=status, price_details={'total': total},
+        )
+
+    def test_totals_come_from_the_rollup_and_revenue_is_staff_only(self):
+        self.create('pending', 180)
+        self.create('confirmed', 220.5)
+        Booking.objects.filter(status='pending').delete()
+        self.create('confirmed', 100)
+        today = timezone.localdate()
+
+        client = APIClient()
+        with self.assertNumQueries(2):
+            data = client.get('/api/bookings/statistics/?bucket=day').data
+        self.assertEqual((data['total_bookings'], data['recent_bookings_30_days']), (2, 2))
+        self.assertEqual((data['status_breakdown']['confirmed'], data['status_breakdown']['pending']), (2, 0))
+        self.assertNotIn('total_revenue', data)
+        self.assertEqual(data['buckets'], [{'period': today, 'count': 2}])
+
+        client.force_authenticate(User.objects.create(username='customer'))
+        self.assertNotIn('total_revenue', client.get('/api/bookings/statistics/').data)
+
+        client.force_authenticate(User.objects.create(username='office', is_staff=True))
+        data = client.get('/api/bookings/statistics/?bucket=week').data
+        self.assertEqual(data['total_revenue'], Decimal('320.50'))
+        self.assertEqual(data['buckets'][0]['revenue'], Decimal('320.50'))
+
+        tomorrow = (today + timedelta(days=1)).isoformat()
+        self.assertEqual(client.get(f'/api/bookings/statistics/?from={tomorrow}').data['total_bookings'], 0)
+
+
+@override_settings(BOOKING_PRICING={'VERIFY': False}, BOOKING_AVAILABILITY={'CREWS': 2})
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.date = timezone.localdate() + timedelta(days=3)
+
+    def book(self, selected_time, index=0, **extra):
+        data = {
+            'service_type': 'general',
+            'selected_date': self.date.isoformat(),
+            'selected_time': selected_time,
+            'first_name': 'Ann',
+            'last_name': f'Lee{index}',
+            'email': f'ann{index}@example.com',
+            'phone': '0400000000',
+            'street': '1 George St',
+            'suburb': 'Sydney',
+            'postcode': '2000',
+            **extra,
+        }
+        return self.client.post('/api/bookings/', data, format='json')
+
+    def reserved(self):
+        return dict(BookingSlot.objects.filter(date=self.date).values_list('start_time', 'reserved'))
+
+    def test_booking_reserves_its_slots_until_capacity_runs_out(self):
+        self.assertEqual(self.book('09:00').status_code, 201)
+        # A two hour general clean holds four 30 minute slots
+        self.assertEqual(self.reserved(), {time(9, 0): 1, time(9, 30): 1, time(10, 0): 1, time(10, 30): 1})
+        self.assertEqual(Booking.objects.get().slot_count, 4)
+
+        self.assertEqual(self.book('10:30', index=1).status_code, 201)
+        response = self.book('10:00', index=2)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('fully booked', response.data['error'])
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(self.reserved()[time(10, 0)], 1)
+
+        # Cancelling gives the capacity back
+        booking = Booking.objects.get(last_name='Lee0')
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.book('10:00', index=2).status_code, 201)
+
+    def test_off_grid_times_hold_every_overlapping_slot(self):
+        self.assertEqual(self.book('09:15').status_code, 201)
+        self.assertEqual(set(self.reserved()), {time(9, 0), time(9, 30), time(10, 0), time(10, 30), time(11, 0)})
+
+        for selected_time in ['07:45', '16:15']:
+            with self.subTest(selected_time=selected_time):
+                response = self.book(selected_time, index=1)
+                self.assertEqual(response.status_code, 409)
+                self.assertIn('booking hours', response.data['error'])
+
+    def test_reschedule_moves_the_sms_reminder(self):
+        self.assertEqual(self.book('09:00').status_code, 201)
+        booking = Booking.objects.get()
+        reminder = Job.objects.get(name='leads.sms_reminder')
+        booking.special_notes = 'Key under mat'
+        booking.save()
+        self.assertEqual(Job.objects.get(pk=reminder.pk).run_at, reminder.run_at)
+
+        booking.selected_date += timedelta(days=1)
+        booking.selected_time = time(13, 0)
+        booking.save()
+        self.assertEqual(Job.objects.get(pk=reminder.pk).run_at - reminder.run_at, timedelta(hours=28))
+
+    def test_backfill_reserves_existing_bookings_once(self):
+        for index in range(3):
+            Booking.objects.create(
+                service_type='general', selected_date=self.date, selected_time=time(9, 0), first_name='Ann',
+                last_name=f'Lee{index}', email='ann@example.com', phone='0400000000', street='1 George St',
+                suburb='Sydney', postcode='2000', status='cancelled' if index == 2 else 'pending',
+            )
+        out = io.StringIO()
+        call_command('backfill_booking_slots', stdout=out)
+        self.assertIn('Reserved slots for 2 booking(s).', out.getvalue())
+        self.assertEqual(self.reserved(), {time(9, 0): 2, time(9, 30): 2, time(10, 0): 2, time(10, 30): 2})
+
+        call_command('backfill_booking_slots', stdout=io.StringIO())
+        self.assertEqual(self.reserved()[time(9, 0)], 2)
+        self.assertEqual(self.book('09:00', index=3).status_code, 409)
+
+
+class PricingTests(TestCase):
+    def booking_data(self, total, **extra):
+        return {
+            'service_type': 'general',
+            'frequency': 'weekly',
+            'bedrooms': 2,
+            'bathrooms': 2,
+            'selected_add_ons': {'insideFridge': True},
+            'selected_date': (timezone.localdate() + timedelta(days=3)).isoformat(),
+            'first_name': 'Ann',
+            'last_name': 'Lee',
+            'email': 'ann@example.com',
+            'phone': '0400000000',
+            'street': '1 George St',
+            'suburb': 'Sydney',
+            'postcode': '2000',
+            'price_details': {'total': total},
+            **extra,
+        }
+
+    def mismatches(self):
+        return [self.booking_data('150'), self.booking_data('212.55', selected_add_ons={'goldPlating': True})]
+
+    def test_quote_breakdown(self):
+        quoted = pricing.quote('general', 'weekly', 2, {'insideFridge': True}, bathrooms=2)
+        # 118 + 2 x 30 base, one extra bathroom, 15% weekly discount on both, then the fridge
+        self.assertEqual(quoted['base'], Decimal('178.00'))
+        self.assertEqual(quoted['addons'], Decimal('25.00'))
+        self.assertEqual(quoted['discount'], Decimal('30.45'))
+        self.assertEqual(quoted['addons_extra'], Decimal('40.00'))
+        self.assertEqual(quoted['total'], Decimal('212.55'))
+        self.assertEqual(quoted['gst'] + quoted['subtotal'], quoted['total'])
+
+        with self.assertRaises(pricing.QuoteError):
+            pricing.quote('general', selected_add_ons={'goldPlating': True})
+        with self.assertRaises(pricing.QuoteError):
+            pricing.quote('general', bedrooms=99)
+
+    def test_equivalent_inputs_share_one_memoized_quote(self):
+        self.assertEqual(
+            pricing.quote_key('general', None, None, {'b': 1, 'a': 2}, bathrooms=None),
+            pricing.quote_key('general', 'once', 1, {'a': 2, 'b': 1}, bathrooms=1),
+        )
+        pricing.memoized_quote.cache_clear()
+        first = pricing.quote('deep', 'once', 3, {'ovenSteamer': True})
+        first['total'] = Decimal('0')  # callers get a copy
+        again = pricing.quote('deep', 'once', 3, {'ovenSteamer': 1}, {'ovenSteamer': {'quantity': 1}})
+        self.assertEqual(pricing.cache_info().hits, 1)
+        self.assertEqual(again['total'], Decimal('418.00'))
+
+    def test_serializer_checks_the_submitted_total(self):
+        with override_settings(BOOKING_PRICING={'VERIFY': True}):
+            self.assertTrue(BookingSerializer(data=self.booking_data('212.55')).is_valid())
+            self.assertTrue(BookingSerializer(data=self.booking_data('213.00')).is_valid())  # within TOLERANCE
+            for data in self.mismatches():
+                with self.subTest(data=data['price_details'], add_ons=data['selected_add_ons']):
+                    serializer = BookingSerializer(data=data)
+                    self.assertFalse(serializer.is_valid())
+                    self.assertIn('price_details', serializer.errors)
+
+        # Off by default: mismatches and unknown add-ons are logged, the booking goes through
+        for data in self.mismatches():
+            with self.subTest(data=data['price_details'], add_ons=data['selected_add_ons']):
+                with self.assertLogs('leads.serializers', 'WARNING'):
+                    self.assertTrue(BookingSerializer(data=data).is_valid())
+
+
+@override_settings(BOOKING_PRICING={'VERIFY': False})
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def booking_data(self, **extra):
+        return {
+            'service_type': 'general',
+            'selected_date': (timezone.localdate() + timedelta(days=3)).isoformat(),
+            'selected_time': '09:00',
+            'first_name': 'Ann',
+            'last_name': 'Lee',
+            'email': 'ann@example.com',
+            'phone': '0400000000',
+            'street': '1 George St',
+            'suburb': 'Sydney',
+            'postcode': '2000',
+            **extra,
+        }
+
+    def post(self, data, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/bookings/', data, format='json', **headers)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post(self.booking_data(), key='abc')
+        self.assertEqual(first.status_code, 201)
+        again = self.post(self.booking_data(), key='abc')
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(again.data, first.data)
+
+        # Without a key, a double click is caught by the payload fingerprint (email case ignored)
+        self.assertEqual(self.post(self.booking_data(email='ANN@example.com'))['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_other_start_time_is_another_booking(self):
+        self.assertEqual(self.post(self.booking_data()).status_code, 201)
+        self.assertEqual(self.post(self.booking_data(selected_time='13:00')).status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_key_reused_for_another_payload_is_rejected(self):
+        self.assertEqual(self.post(self.booking_data(), key='abc').status_code, 201)
+        response = self.post(self.booking_data(selected_time='13:00'), key='abc')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_twin_still_in_flight_gets_409(self):
+        data = self.booking_data()
+        content = idempotency.fingerprint(data)
+        BookingSubmission.objects.create(
+            key=f'fp:{content}', fingerprint=content, expires_at=timezone.now() + timedelta(minutes=10)
+        )
+        response = self.post(data)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_keys_are_released_when_the_request_fails(self):
+        with mock.patch.object(BookingViewSet, 'create_booking', side_effect=RuntimeError('worker killed')):
+            with self.assertRaises(RuntimeError):
+                self.post(self.booking_data(), key='abc')
+        self.assertFalse(BookingSubmission.objects.exists())
+        self.assertEqual(self.post(self.booking_data(), key='abc').status_code, 201)
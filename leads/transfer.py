@@ -0,0 +1,183 @@
+"""
+Bulk booking export and import (CSV or NDJSON).
+
+Exports stream ``values_list`` rows from a server-side cursor
+(``iterator(chunk_size=...)``) straight into the response, so memory stays
+flat whatever the table size. Imports read the file row by row, validate
+each row with ``BookingSerializer`` and insert every ``batch_size`` valid
+rows with one ``bulk_create``, collecting per-row errors.
+
+The columns are the booking's input fields plus ``id``, ``status``,
+``created_at`` and ``updated_at``; derived columns (typed prices, search
+columns) are recomputed on import. An export can be imported again as is:
+ids are reassigned, status and created_at are kept. Imported bookings don't
+reserve time slots or queue notifications.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import rollups
+from .models import Booking
+from .serializers import BookingSerializer
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = [
+    'id',
+    *[field.name for field in Booking._meta.concrete_fields if field.editable and not field.primary_key],
+    'created_at',
+    'updated_at',
+]
+JSON_FIELDS = {field.name for field in Booking._meta.concrete_fields if field.get_internal_type() == 'JSONField'}
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Booking rows as tuples of EXPORT_FIELDS, read through a server-side cursor"""
+    return queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    json_columns = [index for index, name in enumerate(EXPORT_FIELDS) if name in JSON_FIELDS]
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = list(row)
+        for index in json_columns:
+            row[index] = json.dumps(row[index]) if row[index] is not None else ''
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream(queryset, fmt, chunk_size=CHUNK_SIZE):
+    """Generator of export lines in ``fmt`` ('csv' or 'ndjson')"""
+    rows = export_rows(queryset, chunk_size)
+    return csv_lines(rows) if fmt == 'csv' else ndjson_lines(rows)
+
+
+def read_rows(text_file, fmt):
+    """
+    Yield one dict per input row. Unparseable rows are yielded as an error
+    message string so they can be reported with their row number.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(text_file):
+            # Empty cells mean "not given", so model defaults apply
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+    for line in text_file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f'Invalid JSON: {e}'
+            continue
+        yield row if isinstance(row, dict) else 'Expected a JSON object'
+
+
+def detect_format(filename, default='csv'):
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def build_booking(row):
+    """Unsaved Booking for a valid row, or the serializer errors"""
+    serializer = BookingSerializer(data=row, context={'verify_price': False})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    booking = Booking(**serializer.validated_data)
+    if row.get('status') in dict(Booking.STATUS_CHOICES):
+        booking.status = row['status']
+    # bulk_create() skips save(), so derived columns are filled here
+    booking.sync_price_columns()
+    booking.sync_search_columns()
+    return booking, None
+
+
+def insert(bookings, created_at):
+    """One bulk INSERT plus the rollup for a batch of valid bookings"""
+    with transaction.atomic():
+        Booking.objects.bulk_create(bookings)
+        # auto_now_add overwrote created_at, put back the exported values
+        restored = []
+        for booking in bookings:
+            if id(booking) in created_at:
+                booking.created_at = created_at[id(booking)]
+                restored.append(booking)
+        if restored:
+            Booking.objects.bulk_update(restored, ['created_at'])
+        rollups.add_bookings(bookings)
+
+
+def import_rows(rows, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Validate and insert rows in batches. Returns
+    ``{'rows', 'created', 'failed', 'errors': [{'row', 'errors'}]}`` (errors capped at MAX_REPORTED_ERRORS).
+    """
+    report = {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    numbered = enumerate(rows, start=1)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            break
+        bookings, created_at = [], {}
+        for number, row in batch:
+            report['rows'] += 1
+            if isinstance(row, str):
+                booking, errors = None, {'non_field_errors': [row]}
+            else:
+                booking, errors = build_booking(row)
+            if errors:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'row': number, 'errors': errors})
+                continue
+            timestamp = parse_datetime(str(row.get('created_at') or ''))
+            if timestamp is not None:
+                if timezone.is_naive(timestamp):
+                    timestamp = timezone.make_aware(timestamp)
+                created_at[id(booking)] = timestamp
+            bookings.append(booking)
+        if bookings and not dry_run:
+            insert(bookings, created_at)
+        report['created'] += len(bookings)
+    return report
+
+
+def import_file(binary_file, fmt, batch_size=BATCH_SIZE, dry_run=False):
+    """Import from a binary file object (upload or opened file)"""
+    text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        return import_rows(read_rows(text_file, fmt), batch_size, dry_run)
+    finally:
+        text_file.detach()
@@ -1,42 +1,89 @@
+import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Booking
-from .serializers import BookingSerializer
+from core.conditional import add_validators, make_etag, not_modified
+from core.pagination import FlexiblePagination
+from core.querybudget import QueryBudgetMixin
+from rest_framework.filters import OrderingFilter
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from . import availability, idempotency, notifications, pricing, transfer
+from .models import Booking, BookingDailyStats
+from .search import CustomerSearchFilter, search_customers
+from .serializers import BookingSerializer, BookingSearchResultSerializer, QuoteRequestSerializer
 
+logger = logging.getLogger(__name__)
 
-class BookingViewSet(viewsets.ModelViewSet):
+
+class BookingViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Booking/Lead management
     
     Endpoints:
     - GET /api/bookings/ - List all bookings with full details (requires authentication for admin)
-    - POST /api/bookings/ - Create new booking (public)
+    - POST /api/bookings/ - Create new booking (public, deduplicated by Idempotency-Key header and content)
     - GET /api/bookings/{id}/ - Retrieve specific booking
     - GET /api/bookings/{id}/detailed/ - Get detailed structured booking information
     - PATCH /api/bookings/{id}/update_status/ - Update booking status
-    - GET /api/bookings/statistics/ - Get booking statistics
+    - GET /api/bookings/statistics/ - Get booking statistics (?from=&to=&bucket=day|week)
+    - GET /api/bookings/customers/?q= - Ranked customer lookup (exact email/phone fast path)
+    - GET/POST /api/bookings/quote/ - Server-side price breakdown (GET: ?add_ons=ovenSteamer,blindsRoller:3)
+    - GET /api/bookings/export/?output=csv|ndjson - Stream all (filtered) bookings (staff only)
+    - POST /api/bookings/import/ - Bulk import a CSV/NDJSON 'file' upload (staff only, ?dry_run=true)
+    - GET /api/bookings/availability/ - Free start times (?from=&days=&service_type=&bedrooms=&bathrooms=&storey=)
     - PUT/PATCH /api/bookings/{id}/ - Update booking
     - DELETE /api/bookings/{id}/ - Delete booking
+    
+    Lists accept ?pagination=cursor (keyset on created_at, id) and ?count=false
+    List, retrieve and detailed send ETag/Last-Modified and answer conditional requests with 304
     """
     
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = FlexiblePagination
+    filter_backends = [DjangoFilterBackend, CustomerSearchFilter, OrderingFilter]
     
     # Filter options
-    filterset_fields = ['service_type', 'frequency', 'status', 'selected_date']
+    filterset_fields = {
+        'service_type': ['exact'],
+        'frequency': ['exact'],
+        'status': ['exact'],
+        'selected_date': ['exact'],
+        'price_total': ['exact', 'lte', 'gte'],
+    }
     
-    # Search options
-    search_fields = ['first_name', 'last_name', 'email', 'phone', 'suburb', 'postcode']
+    # Search options: ?search= matches name, email, phone, suburb and postcode
+    # through the normalized customer columns (see leads/search.py)
     
     # Ordering options
-    ordering_fields = ['created_at', 'selected_date', 'status']
+    ordering_fields = ['created_at', 'selected_date', 'status', 'price_total']
     ordering = ['-created_at']
     
+    # Maximum queries per action, asserted at 1, 10 and 100 bookings in leads/tests.py
+    # (see core/querybudget.py); session authentication queries are not included
+    query_budgets = {
+        'list': 3,  # ETag aggregate + count + page (only the aggregate when answering 304)
+        'retrieve': 1,
+        'detailed': 1,
+        'customers': 1,
+        'statistics': 2,  # summary + buckets
+        'export': 1,  # one server-side cursor
+        'availability': 1,
+        'quote': 0,  # memoized price tables
+        'create': 16,  # dedup claim, slot reservation, insert, rollup, jobs, stored response
+        'update': 9,  # includes moving the slot reservation and the SMS reminder
+        'partial_update': 4,
+        'update_status': 7,
+        'destroy': 5,
+        'import_bookings': 8,  # per batch; SQLite splits the INSERT by its variable limit
+    }
+    
     def get_serializer_class(self):
         """Use full serializer with all details"""
         return BookingSerializer
@@ -45,15 +92,53 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         Allow public access to create, delete, and update_status endpoints
         Require authentication for list and full update
+        Staff only for customer search, export and import
         """
-        if self.action in ['create', 'destroy', 'update_status']:
+        if self.action in ['create', 'destroy', 'update_status', 'quote']:
             permission_classes = [AllowAny]
+        elif self.action in ['customers', 'export', 'import_bookings']:
+            permission_classes = [IsAdminUser]
         else:
             permission_classes = [IsAuthenticatedOrReadOnly]
         return [permission() for permission in permission_classes]
     
+    def booking_etag(self, booking):
+        return make_etag('booking', self.action, booking.pk, booking.updated_at.isoformat())
+    
+    def list(self, request, *args, **kwargs):
+        """List bookings; one aggregate query answers 304 when the filtered set is unchanged"""
+        state = self.filter_queryset(self.get_queryset()).aggregate(count=Count('id'), latest=Max('updated_at'))
+        etag = make_etag('bookings', request.get_full_path(), state['count'], state['latest'])
+        unchanged = not_modified(request, etag, state['latest'])
+        if unchanged is not None:
+            return unchanged
+        return add_validators(super().list(request, *args, **kwargs), etag, state['latest'])
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a booking (304 if the client's copy is current)"""
+        booking = self.get_object()
+        etag = self.booking_etag(booking)
+        unchanged = not_modified(request, etag, booking.updated_at)
+        if unchanged is not None:
+            return unchanged
+        serializer = self.get_serializer(booking)
+        return add_validators(Response(serializer.data), etag, booking.updated_at)
+    
     def create(self, request, *args, **kwargs):
-        """Create new booking/lead"""
+        """Create new booking/lead, replaying the original response for duplicate submissions"""
+        duplicate, keys = idempotency.begin(request)
+        if duplicate is not None:
+            return duplicate
+        
+        response = None
+        try:
+            response = self.create_booking(request)
+        finally:
+            # Also frees the keys if the request dies, so the client can resend at once
+            idempotency.finish(keys, response)
+        return response
+    
+    def create_booking(self, request):
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
@@ -69,16 +154,17 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_201_CREATED,
                 headers=headers
             )
+        except availability.SlotUnavailable as e:
+            return Response(
+                {
+                    'success': False,
+                    'message': 'Failed to create booking',
+                    'error': str(e)
+                },
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
-            # Log the error for debugging
-            import traceback
-            error_detail = {
-                'success': False,
-                'message': 'Failed to create booking',
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            }
-            print("Booking creation error:", error_detail)  # This will appear in server logs
+            logger.exception('Booking creation error')
             
             # Return user-friendly error
             return Response(
@@ -90,6 +176,22 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    def perform_create(self, serializer):
+        """Save the booking with its time slot reservation and queued side-effect jobs"""
+        data = serializer.validated_data
+        slot_count = None
+        with transaction.atomic():
+            if data.get('selected_time'):
+                slot_count = availability.slots_needed(
+                    data['service_type'],
+                    data.get('bedrooms', 1),
+                    data.get('bathrooms', 1),
+                    data.get('storey', 1),
+                )
+                availability.reserve(data['selected_date'], data['selected_time'], slot_count)
+            booking = serializer.save(slot_count=slot_count)
+            notifications.booking_created(booking)
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update booking status"""
@@ -114,8 +216,12 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def detailed(self, request, pk=None):
-        """Get detailed booking information in a structured format"""
+        """Get detailed booking information in a structured format (304 if unchanged)"""
         booking = self.get_object()
+        etag = self.booking_etag(booking)
+        unchanged = not_modified(request, etag, booking.updated_at)
+        if unchanged is not None:
+            return unchanged
         
         # Get human-readable labels
         service_type_label = dict(Booking.SERVICE_TYPES).get(booking.service_type, booking.service_type)
@@ -177,45 +283,186 @@ class BookingViewSet(viewsets.ModelViewSet):
             }
         }
         
+        return add_validators(
+            Response({
+                'success': True,
+                'data': detailed_data
+            }),
+            etag,
+            booking.updated_at
+        )
+    
+    @action(detail=False, methods=['get'])
+    def customers(self, request):
+        """Find bookings by customer name, email, phone, suburb or postcode, best match first"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Query parameter "q" is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = search_customers(self.get_queryset(), query)
+        serializer = BookingSearchResultSerializer(results, many=True)
         return Response({
-            'success': True,
-            'data': detailed_data
+            'count': len(results),
+            'results': serializer.data,
         })
     
     @action(detail=False, methods=['get'])
-    def statistics(self, request):
-        """Get booking statistics"""
-        from django.db.models import Count, Q
-        from datetime import datetime, timedelta
-        
-        # Total bookings
-        total = self.queryset.count()
-        
-        # Status breakdown
-        status_counts = dict(
-            self.queryset.values('status')
-            .annotate(count=Count('status'))
-            .values_list('status', 'count')
+    def export(self, request):
+        """Stream bookings matching the list filters as CSV or NDJSON"""
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in transfer.FORMATS:
+            return Response(
+                {'error': f'output must be one of: {", ".join(transfer.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            transfer.stream(queryset, fmt),
+            content_type=transfer.FORMATS[fmt],
         )
+        response['Content-Disposition'] = f'attachment; filename="bookings.{fmt}"'
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_bookings(self, request):
+        """Validate and bulk insert bookings from an uploaded CSV or NDJSON file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Upload the bookings as a "file" field'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Service type breakdown
-        service_counts = dict(
-            self.queryset.values('service_type')
-            .annotate(count=Count('service_type'))
-            .values_list('service_type', 'count')
+        fmt = request.query_params.get('input') or transfer.detect_format(upload.name)
+        if fmt not in transfer.FORMATS:
+            return Response(
+                {'error': f'input must be one of: {", ".join(transfer.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = request.query_params.get('dry_run', '').lower() in ('true', '1', 'yes')
+        report = transfer.import_file(upload.file, fmt, dry_run=dry_run)
+        return Response(
+            {'success': not report['failed'], 'dry_run': dry_run, **report},
+            status=status.HTTP_201_CREATED if report['created'] and not dry_run else status.HTTP_200_OK
         )
+    
+    @action(detail=False, methods=['get', 'post'], authentication_classes=[])
+    def quote(self, request):
+        """Price a calculator request from the memoized price tables"""
+        if request.method == 'GET':
+            data = request.query_params.dict()
+            data['selected_add_ons'] = {}
+            for item in filter(None, data.pop('add_ons', '').split(',')):
+                key, _, quantity = item.partition(':')
+                data['selected_add_ons'][key.strip()] = quantity.strip() or True
+        else:
+            data = request.data
+        
+        serializer = QuoteRequestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            price_details = pricing.quote_for_booking(serializer.validated_data)
+        except pricing.QuoteError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'service_type': serializer.validated_data['service_type'],
+            'frequency': serializer.validated_data['frequency'],
+            'price_details': price_details,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """Free start times for a job of the given service type and property size"""
+        params = request.query_params
+        config = availability.get_config()
+        start_date = timezone.localdate()
+        if params.get('from'):
+            start_date = parse_date(params['from'])
+            if start_date is None:
+                return Response(
+                    {'error': 'Invalid date for "from", expected YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        # Recent bookings (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_count = self.queryset.filter(created_at__gte=thirty_days_ago).count()
+        service_type = params.get('service_type', 'general')
+        if service_type not in dict(Booking.SERVICE_TYPES):
+            return Response(
+                {'error': 'Invalid service_type'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            days = int(params.get('days', 7))
+            sizes = {field: int(params.get(field, 1)) for field in ('bedrooms', 'bathrooms', 'storey')}
+        except ValueError:
+            return Response(
+                {'error': 'days, bedrooms, bathrooms and storey must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= config['HORIZON_DAYS']:
+            return Response(
+                {'error': f'days must be between 1 and {config["HORIZON_DAYS"]}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        slot_count = availability.slots_needed(service_type, config=config, **sizes)
         return Response({
-            'total_bookings': total,
-            'status_breakdown': status_counts,
-            'service_breakdown': service_counts,
-            'recent_bookings_30_days': recent_count,
+            'service_type': service_type,
+            'duration_minutes': availability.duration_minutes(service_type, **sizes),
+            'slot_minutes': config['SLOT_MINUTES'],
+            'days': availability.free_slots(start_date, days, slot_count),
         })
     
+    @action(detail=False, methods=['get'])
+    def statistics(self, request):
+        """
+        Get booking statistics
+        Optional filters: ?from=YYYY-MM-DD&to=YYYY-MM-DD (creation date, inclusive)
+        Optional time series: ?bucket=day|week
+        Read from the BookingDailyStats rollup; revenue is only shown to staff
+        """
+        from django.utils.dateparse import parse_date
+        from .stats import BUCKETS, booking_buckets, booking_summary
+        
+        queryset = BookingDailyStats.objects.all()
+        date_range = {}
+        for param, lookup in [('from', 'date__gte'), ('to', 'date__lte')]:
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                return Response(
+                    {'error': f'Invalid "{param}" date, expected YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(**{lookup: parsed})
+            date_range[param] = parsed
+        
+        bucket = request.query_params.get('bucket')
+        if bucket and bucket not in BUCKETS:
+            return Response(
+                {'error': f'Invalid bucket, expected one of: {", ".join(BUCKETS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        revenue = request.user.is_staff
+        data = booking_summary(queryset, revenue=revenue)
+        data['range'] = {'from': date_range.get('from'), 'to': date_range.get('to')}
+        if bucket:
+            data['buckets'] = booking_buckets(queryset, bucket, revenue=revenue)
+        
+        return Response(data)
+    
     def destroy(self, request, *args, **kwargs):
         """Delete a booking from the database"""
         try: